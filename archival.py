@@ -0,0 +1,170 @@
+"""
+Archival of past events into cold storage
+
+The event table holds the hot working set: recent and upcoming events. Events
+that ended more than EVENT_ARCHIVE_AFTER_DAYS ago are moved, with their
+category links, to event_archive / event_archive_categories by
+``flask archive-events`` (run it daily, e.g. from cron). Listings, approvals
+and "upcoming"/"pending" queries therefore only ever touch hot rows. Each
+moved event gets an 'archive' entry in the change log, so the change feed,
+the SSE stream and the per-worker indexes drop it like a deleted event.
+
+On PostgreSQL event_archive is range-partitioned by start_datetime, one
+partition per year, created as events for that year are archived. The hot
+event table is not partitioned: archival keeps it small instead. Other
+databases (SQLite) get a plain table with the same columns.
+
+History stays reachable: event details, the CSV export and the calendar fall
+back to the archive, and dashboard totals add archived counts. Those are
+cached per worker until the next archival run bumps the archive's stamp.
+"""
+
+import threading
+from datetime import datetime, timedelta
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from flask_login import current_user
+from sqlalchemy import and_, case, delete, func, insert, literal, or_, select, text
+from sqlalchemy.orm import selectinload
+
+from change_tracking import bump_stamps, get_stamps, record_event_changes
+from extensions import db
+from models import ArchivedEvent, Event, archived_event_categories, event_categories
+from scoping import owner_filter, sees_all_events
+
+ARCHIVE_TABLE = ArchivedEvent.__tablename__
+
+def archive_cutoff(days=None):
+    """Events that ended before this moment belong in the archive"""
+    if days is None:
+        days = current_app.config['EVENT_ARCHIVE_AFTER_DAYS']
+    # Event times are local, as entered in the forms
+    return datetime.now() - timedelta(days=days)
+
+def _archivable(cutoff):
+    # Written as two range conditions so the end/start datetime indexes apply
+    return or_(Event.end_datetime < cutoff,
+               and_(Event.end_datetime.is_(None), Event.start_datetime < cutoff))
+
+def ensure_partitions(connection, years):
+    """Create the yearly partitions of event_archive that don't exist yet (PostgreSQL only)"""
+    if connection.dialect.name != 'postgresql':
+        return
+    for year in sorted(set(years)):
+        connection.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {ARCHIVE_TABLE}_{year:04d} PARTITION OF {ARCHIVE_TABLE} "
+            f"FOR VALUES FROM ('{year:04d}-01-01') TO ('{year + 1:04d}-01-01')"
+        ))
+
+def archive_events(cutoff, batch_size=500):
+    """Move events that ended before ``cutoff`` to the archive; returns how many were moved.
+
+    Each batch is copied, logged and deleted in one transaction, so an
+    interrupted run leaves every event in exactly one of the two tables.
+    """
+    columns = [column.name for column in Event.__table__.columns if column.name in ArchivedEvent.__table__.c]
+    moved = 0
+    while True:
+        events = Event.query.options(selectinload(Event.categories)).filter(_archivable(cutoff)) \
+            .order_by(Event.id).limit(batch_size).with_for_update().all()
+        if not events:
+            break
+        event_ids = [event.id for event in events]
+        connection = db.session.connection()
+        ensure_partitions(connection, (event.start_datetime.year for event in events))
+        # The snapshot is the event's last state, as for a delete
+        record_event_changes(events, 'archive')
+
+        db.session.execute(insert(ArchivedEvent.__table__).from_select(
+            columns + ['archived_at'],
+            select(*[Event.__table__.c[name] for name in columns], literal(datetime.utcnow()))
+            .where(Event.id.in_(event_ids))
+        ))
+        db.session.execute(insert(archived_event_categories).from_select(
+            ['event_id', 'category_id'],
+            select(event_categories.c.event_id, event_categories.c.category_id)
+            .where(event_categories.c.event_id.in_(event_ids))
+        ))
+        db.session.execute(delete(event_categories).where(event_categories.c.event_id.in_(event_ids)))
+        db.session.execute(delete(Event.__table__).where(Event.__table__.c.id.in_(event_ids)))
+        bump_stamps(connection, ['event', ARCHIVE_TABLE])
+        db.session.commit()
+        moved += len(event_ids)
+    return moved
+
+def get_archived_event(event_id):
+    return ArchivedEvent.query.filter(ArchivedEvent.id == event_id).first()
+
+def scoped_archive(query, user=None):
+    """Limit a query over ArchivedEvent to the viewer's events (see scoping.owner_filter)"""
+    criteria = owner_filter(ArchivedEvent.user_id, user)
+    return query if criteria is None else query.filter(criteria)
+
+class ArchiveSummary:
+    """Per-worker cache of archive aggregates, dropped whenever the archive changes"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._values = {}
+
+    def _get(self, key, compute):
+        version = get_stamps(ARCHIVE_TABLE)[ARCHIVE_TABLE][0]
+        with self._lock:
+            if self._version != version:
+                self._version = version
+                self._values = {}
+            if key in self._values:
+                return self._values[key]
+        value = compute()
+        with self._lock:
+            if self._version == version:
+                self._values[key] = value
+        return value
+
+    def horizon(self):
+        """Latest end (or start) of any archived event; None if the archive is empty"""
+        return self._get('horizon', lambda: db.session.query(
+            func.max(func.coalesce(ArchivedEvent.end_datetime, ArchivedEvent.start_datetime))
+        ).scalar())
+
+    def totals(self, user=None):
+        """Dashboard counters over the viewer's archived events.
+
+        Archived events ended before the archive cutoff, so none are upcoming
+        or still awaiting approval, and the counts only change when the
+        archive does.
+        """
+        user = user or current_user
+
+        def count_if(condition):
+            return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+        def compute():
+            total, online, completed = scoped_archive(db.session.query(
+                func.count(ArchivedEvent.id),
+                count_if(ArchivedEvent.is_online == True),
+                func.count(ArchivedEvent.end_datetime),
+            ), user).one()
+            return {
+                'total_events': int(total),
+                'upcoming_events': 0,
+                'online_events': int(online),
+                'offline_events': int(total) - int(online),
+                'pending_events': 0,
+                'completed_events': int(completed),
+            }
+        return self._get(('totals', None if sees_all_events(user) else user.id), compute)
+
+archive_summary = ArchiveSummary()
+
+@click.command('archive-events')
+@click.option('--days', type=int, default=None, help='Archive events that ended more than this many days ago')
+@click.option('--batch-size', type=int, default=None, help='Events moved per transaction')
+@with_appcontext
+def archive_events_command(days, batch_size):
+    """Move past events to the archive (run daily)"""
+    cutoff = archive_cutoff(days)
+    moved = archive_events(cutoff, batch_size or current_app.config['EVENT_ARCHIVE_BATCH_SIZE'])
+    click.echo(f'Archived {moved} events that ended before {cutoff:%Y-%m-%d %H:%M}')
@@ -0,0 +1,248 @@
+"""
+Audit trail of admin actions
+
+record() is called where an admin action succeeds (users added, deleted or
+imported, events deleted or bulk approved/rejected, settings changed,
+categories, event types and venues edited). It only puts the record on an
+in-memory queue; a background thread in each worker writes the queue to
+audit_log in batches: a batch is written AUDIT_FLUSH_INTERVAL seconds after
+its first record, or as soon as it reaches AUDIT_BATCH_SIZE. Requests don't
+wait for the insert or contend for locks on the table.
+
+- The queue holds AUDIT_QUEUE_SIZE records. When it's full (the database
+  is slow or down) record() waits up to AUDIT_ENQUEUE_TIMEOUT seconds for
+  room, then writes the record itself: requests slow down, but no record is
+  dropped.
+- A failed batch is retried; after AUDIT_MAX_RETRIES its records are
+  written to the log instead.
+- Whatever is queued is flushed when the process exits (atexit, and
+  gunicorn's worker_exit hook).
+
+query() backs GET /api/audit: filters by actor, target, action and time
+range, newest first, with a cursor for the next page.
+"""
+
+import atexit
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from flask import current_app, has_request_context, request
+from flask_login import current_user
+from sqlalchemy import and_, insert, or_
+
+from extensions import db
+from models import AuditLog
+
+# Longest string kept for a value in ``details``
+MAX_VALUE_LENGTH = 500
+# Longest the writer blocks before checking for shutdown (seconds)
+POLL_INTERVAL = 0.25
+
+def _clip(value):
+    if isinstance(value, str) and len(value) > MAX_VALUE_LENGTH:
+        return value[:MAX_VALUE_LENGTH] + '...'
+    if isinstance(value, dict):
+        return {key: _clip(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_clip(item) for item in value]
+    return value
+
+class AuditWriter:
+    """Per-worker queue of audit records and the thread writing them"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.app = None
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._queue = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    def configure(self, app):
+        self.app = app
+        self.batch_size = app.config['AUDIT_BATCH_SIZE']
+        self.flush_interval = app.config['AUDIT_FLUSH_INTERVAL']
+        self.enqueue_timeout = app.config['AUDIT_ENQUEUE_TIMEOUT']
+        self.max_retries = app.config['AUDIT_MAX_RETRIES']
+        self.queue_size = app.config['AUDIT_QUEUE_SIZE']
+
+    def _ensure_started(self):
+        if self._pid != os.getpid():
+            # A forked worker: the parent's queue is the parent's to write
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._reset()
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            if self._queue is None:
+                self._queue = queue.Queue(maxsize=self.queue_size)
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+            self._thread.start()
+
+    def put(self, entry):
+        self._ensure_started()
+        try:
+            self._queue.put(entry, timeout=self.enqueue_timeout)
+        except queue.Full:
+            self.app.logger.warning('Audit queue is full; writing the record synchronously')
+            self._write([entry])
+
+    def _take_batch(self, timeout, linger=0.0):
+        """Up to batch_size records: waits ``timeout`` for the first, then
+        collects more for up to ``linger`` seconds. Stops waiting at shutdown."""
+        batch = []
+        deadline = time.monotonic() + timeout
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0 or self._stop.is_set():
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=min(remaining, POLL_INTERVAL)))
+                    if len(batch) == 1:
+                        deadline = time.monotonic() + linger
+            except queue.Empty:
+                if remaining <= 0 or self._stop.is_set():
+                    break
+        return batch
+
+    def _write(self, batch):
+        with self.app.app_context():
+            with db.engine.begin() as connection:
+                connection.execute(insert(AuditLog.__table__), batch)
+
+    def _write_with_retries(self, batch):
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                self._write(batch)
+                return
+            except Exception as e:
+                self.app.logger.error(f'Error writing {len(batch)} audit records (attempt {attempt}): {str(e)}')
+                if attempt < self.max_retries and not self._stop.is_set():
+                    time.sleep(min(2 ** attempt, 30))
+        for entry in batch:
+            self.app.logger.error(f'Audit record not saved: {entry}')
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._take_batch(self.flush_interval, self.flush_interval)
+            if batch:
+                self._write_with_retries(batch)
+                self._done(batch)
+        self._drain()
+
+    def _drain(self):
+        while True:
+            batch = self._take_batch(0)
+            if not batch:
+                return
+            self._write_with_retries(batch)
+            self._done(batch)
+
+    def _done(self, batch):
+        for _ in batch:
+            self._queue.task_done()
+
+    def flush(self, timeout=10.0):
+        """Wait up to ``timeout`` seconds until everything queued so far is written"""
+        if self._queue is None or self._pid != os.getpid():
+            return True
+        deadline = time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def shutdown(self, timeout=10.0):
+        """Stop the thread once the queue is written"""
+        if self._queue is None or self._pid != os.getpid() or self.app is None:
+            return
+        self._stop.set()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout)
+        else:
+            self._drain()
+
+audit_writer = AuditWriter()
+
+def record(action, target_type=None, target_id=None, details=None, actor=None):
+    """Queue an audit record of ``action`` by ``actor`` (default: the logged-in user)"""
+    if actor is None and has_request_context() and current_user.is_authenticated:
+        actor = current_user
+    entry = {
+        'created_at': datetime.utcnow(),
+        'actor_id': actor.id if actor is not None else None,
+        'actor_email': actor.email if actor is not None else None,
+        'action': action,
+        'target_type': target_type,
+        'target_id': str(target_id) if target_id is not None else None,
+        'details': _clip(details) if details else None,
+        'ip_address': request.remote_addr if has_request_context() else None,
+    }
+    if audit_writer.app is None:
+        audit_writer.configure(current_app._get_current_object())
+    audit_writer.put(entry)
+
+def init_app(app):
+    """Write audit records from a background thread; flush them at exit"""
+    audit_writer.configure(app)
+    atexit.register(audit_writer.shutdown)
+
+def parse_cursor(cursor):
+    """(created_at, id) from a cursor returned by query(); ValueError if malformed"""
+    created_at, _, record_id = cursor.rpartition('_')
+    return datetime.fromisoformat(created_at), int(record_id)
+
+def query(actor_id=None, target_type=None, target_id=None, action=None, start=None, end=None,
+          before=None, limit=50):
+    """Audit records matching the filters, newest first; returns (records, next cursor or None).
+
+    ``start`` is inclusive and ``end`` exclusive; ``before`` is a cursor from
+    the previous page.
+    """
+    conditions = []
+    if actor_id is not None:
+        conditions.append(AuditLog.actor_id == actor_id)
+    if target_type:
+        conditions.append(AuditLog.target_type == target_type)
+    if target_id is not None:
+        conditions.append(AuditLog.target_id == str(target_id))
+    if action:
+        conditions.append(AuditLog.action == action)
+    if start is not None:
+        conditions.append(AuditLog.created_at >= start)
+    if end is not None:
+        conditions.append(AuditLog.created_at < end)
+    if before is not None:
+        created_at, record_id = before
+        conditions.append(or_(AuditLog.created_at < created_at,
+                              and_(AuditLog.created_at == created_at, AuditLog.id < record_id)))
+    rows = AuditLog.query.filter(*conditions) \
+        .order_by(AuditLog.created_at.desc(), AuditLog.id.desc()).limit(limit + 1).all()
+    next_cursor = f'{rows[limit - 1].created_at.isoformat()}_{rows[limit - 1].id}' if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+def record_to_dict(entry):
+    return {
+        'id': entry.id,
+        'created_at': entry.created_at.isoformat(),
+        'actor_id': entry.actor_id,
+        'actor_email': entry.actor_email,
+        'action': entry.action,
+        'target_type': entry.target_type,
+        'target_id': entry.target_id,
+        'details': entry.details,
+        'ip_address': entry.ip_address,
+    }
@@ -0,0 +1,95 @@
+"""
+Template caching for PharmaEvents
+
+- Jinja bytecode cache on disk, so templates are compiled once per deploy and
+  shared by every worker on the host instead of being compiled per worker.
+- An in-process fragment cache for per-event card HTML on /events. Keys include
+  the event's last-modified time, so an edit made through any worker produces a
+  new key everywhere; the routes also drop the old entries of the worker that
+  made the change.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from flask import render_template
+from flask_login import current_user
+from jinja2 import FileSystemBytecodeCache, pass_context
+from markupsafe import Markup
+
+class FragmentCache:
+    """Thread-safe LRU cache of rendered HTML fragments.
+
+    Keys are tuples whose first item is the id of the object they render, so
+    all fragments of one object can be dropped together.
+    """
+
+    def __init__(self, max_entries=2000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, object_id):
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == object_id]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+event_card_cache = FragmentCache()
+
+def event_card_key(event, theme_color, can_approve):
+    """Cache key for an event card: id + last-modified + theme + viewer permissions"""
+    last_modified = event.updated_at or event.created_at
+    return (event.id, last_modified.isoformat() if last_modified else None, theme_color, can_approve)
+
+@pass_context
+def render_event_card(context, event):
+    """Render components/event_card.html for ``event``, reusing cached HTML when possible"""
+    can_approve = bool(current_user.is_authenticated and current_user.can_approve_events())
+    key = event_card_key(event, context.get('theme_color'), can_approve)
+    html = event_card_cache.get(key)
+    if html is None:
+        html = render_template('components/event_card.html', event=event)
+        event_card_cache.set(key, html)
+    return Markup(html)
+
+def invalidate_event_card(event_id):
+    """Drop this worker's cached cards for an event after it changes"""
+    event_card_cache.invalidate(event_id)
+
+def init_app(app):
+    """Install the bytecode cache and the ``render_event_card`` template helper.
+
+    Must run before anything touches ``app.jinja_env``.
+    """
+    cache_dir = app.config.get('JINJA_BYTECODE_CACHE_DIR')
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+        app.jinja_options = {**app.jinja_options, 'bytecode_cache': FileSystemBytecodeCache(cache_dir)}
+    event_card_cache.max_entries = app.config.get('EVENT_CARD_CACHE_SIZE', 2000)
+    app.jinja_env.globals['render_event_card'] = render_event_card
@@ -0,0 +1,191 @@
+"""
+Automatic change tracking for PharmaEvents models
+
+- Event.updated_at is bumped on every flush that modifies an event, including
+  changes to its categories (which don't touch the event row on their own).
+- Event create/update/status/delete operations are appended to the
+  EventChange log by record_event_change() (record_event_changes() for bulk
+  writes), in the caller's transaction. Readers tailing the log move their
+  cursor with settled_change_id(), which follows commit order.
+- Each tracked table has a TableStamp row whose version is incremented in the
+  same transaction as the write, so any worker can cheaply tell whether data
+  changed (used for ETag/Last-Modified on pages and JSON APIs).
+
+Writes that bypass the ORM unit of work (bulk UPDATE/DELETE, raw SQL) must
+call bump_stamps() themselves.
+"""
+
+from datetime import datetime, timedelta
+from itertools import chain
+from flask_login import current_user
+from sqlalchemy import event, insert, update
+from sqlalchemy.orm import Session
+
+from extensions import db
+from models import (AppSetting, ArchivedEvent, Event, EventCategory, EventChange, EventType, Governorate,
+                    GovernorateAlias, TableStamp, User, Venue)
+
+# Models whose writes bump their table's stamp
+TRACKED_MODELS = (Event, EventCategory, EventType, AppSetting, User, ArchivedEvent, Venue, Governorate, GovernorateAlias)
+
+def bump_stamps(connection, table_names):
+    """Increment the change stamp of each table, inserting missing stamp rows"""
+    now = datetime.utcnow()
+    stamps = TableStamp.__table__
+    for name in sorted(set(table_names)):
+        result = connection.execute(
+            update(stamps)
+            .where(stamps.c.name == name)
+            .values(version=stamps.c.version + 1, changed_at=now)
+        )
+        if result.rowcount == 0:
+            connection.execute(insert(stamps).values(name=name, version=1, changed_at=now))
+
+def get_stamps(*table_names):
+    """Return {table_name: (version, changed_at)} for the given tables.
+
+    Tables that were never written have version 0 and no changed_at.
+    """
+    rows = db.session.query(TableStamp.name, TableStamp.version, TableStamp.changed_at) \
+        .filter(TableStamp.name.in_(table_names)).all()
+    stamps = {name: (0, None) for name in table_names}
+    stamps.update({name: (version, changed_at) for name, version, changed_at in rows})
+    return stamps
+
+def stamp_validators(*table_names, extra=()):
+    """ETag parts and Last-Modified for a response built from the given tables.
+
+    The viewer's id and role are included because every page and API is
+    scoped by role. Use with http_cache.conditional.
+    """
+    stamps = get_stamps(*table_names)
+    versions = tuple(sorted((name, version) for name, (version, _) in stamps.items()))
+    last_modified = max((changed_at for _, changed_at in stamps.values() if changed_at), default=None)
+    return (current_user.id, current_user.role, versions) + tuple(extra), last_modified
+
+def ensure_stamps():
+    """Create stamp rows for all tracked tables (run from database init)"""
+    existing = {name for (name,) in db.session.query(TableStamp.name).all()}
+    for model in TRACKED_MODELS:
+        if model.__tablename__ not in existing:
+            db.session.add(TableStamp(name=model.__tablename__, version=0, changed_at=datetime.utcnow()))
+    db.session.commit()
+
+def _format_datetime(value):
+    return value.isoformat() if value else None
+
+def event_snapshot(event):
+    """JSON-serialisable state of an event as recorded in the change log"""
+    return {
+        'id': event.id,
+        'name': event.name,
+        'description': event.description,
+        'event_type_id': event.event_type_id,
+        'is_online': event.is_online,
+        'start_datetime': _format_datetime(event.start_datetime),
+        'end_datetime': _format_datetime(event.end_datetime),
+        'governorate': event.governorate,
+        'governorate_id': event.governorate_id,
+        'venue_id': event.venue_id,
+        'status': event.status,
+        'user_id': event.user_id,
+        'category_ids': sorted(category.id for category in event.categories),
+        'created_at': _format_datetime(event.created_at),
+        'updated_at': _format_datetime(event.updated_at),
+    }
+
+def record_event_change(event, operation, actor_id=None, previous_status=None):
+    """Append a change-log row for ``event``; committed with the caller's transaction.
+
+    ``operation`` is one of create, update, status, delete or archive (moved
+    to event_archive); for delete and archive the snapshot is the event's
+    last state. Status changes should pass the
+    ``previous_status`` so consumers can compute count deltas. The event must
+    already have an id (flush first when creating).
+    """
+    data = event_snapshot(event)
+    if previous_status is not None:
+        data['previous_status'] = previous_status
+    db.session.add(EventChange(
+        event_id=event.id,
+        owner_id=event.user_id,
+        actor_id=actor_id,
+        operation=operation,
+        data=data,
+        changed_at=datetime.utcnow(),
+    ))
+
+def record_event_changes(events, operation, actor_id=None, previous_statuses=None):
+    """Append change-log rows for many events with one multi-row INSERT.
+
+    Bulk counterpart of record_event_change(); ``previous_statuses`` maps
+    event id to its status before a bulk status change.
+    """
+    now = datetime.utcnow()
+    rows = []
+    for changed in events:
+        data = event_snapshot(changed)
+        if previous_statuses and changed.id in previous_statuses:
+            data['previous_status'] = previous_statuses[changed.id]
+        rows.append({
+            'event_id': changed.id,
+            'owner_id': changed.user_id,
+            'actor_id': actor_id,
+            'operation': operation,
+            'data': data,
+            'changed_at': now,
+        })
+    if rows:
+        db.session.execute(insert(EventChange), rows)
+
+def settled_change_id(since, settle_seconds, limit=None):
+    """How far a reader of the change log at ``since`` can move its cursor.
+
+    Returns (id, more): every change up to ``id`` is committed, and ``more``
+    is True if ``limit`` ids were scanned without reaching the end.
+
+    Ids are assigned at INSERT but rows become visible at COMMIT, so a
+    transaction still in flight leaves a gap below changes that are already
+    visible; a cursor moved past the gap would skip its row for good. The
+    cursor stops before the first gap, unless the change after it was made
+    more than ``settle_seconds`` ago: no transaction runs that long, so the
+    gap's transaction rolled back. (SQLite has one writer at a time and
+    never leaves gaps.)
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=settle_seconds)
+    query = db.session.query(EventChange.id, EventChange.changed_at) \
+        .filter(EventChange.id > since).order_by(EventChange.id)
+    if limit is not None:
+        query = query.limit(limit)
+    settled = since
+    scanned = 0
+    for change_id, changed_at in query:
+        if change_id != settled + 1 and changed_at > cutoff:
+            return settled, False
+        settled = change_id
+        scanned += 1
+    return settled, limit is not None and scanned == limit
+
+def _touch_updated_at(session, flush_context, instances):
+    now = datetime.utcnow()
+    for obj in session.dirty:
+        if isinstance(obj, Event) and session.is_modified(obj):
+            obj.updated_at = now
+
+def _bump_changed_tables(session, flush_context):
+    changed = set()
+    for obj in chain(session.new, session.deleted):
+        if isinstance(obj, TRACKED_MODELS):
+            changed.add(obj.__tablename__)
+    for obj in session.dirty:
+        if isinstance(obj, TRACKED_MODELS) and session.is_modified(obj):
+            changed.add(obj.__tablename__)
+    if changed:
+        bump_stamps(session.connection(), changed)
+
+def register_listeners():
+    """Install the session listeners (idempotent)"""
+    if not event.contains(Session, 'before_flush', _touch_updated_at):
+        event.listen(Session, 'before_flush', _touch_updated_at)
+    if not event.contains(Session, 'after_flush', _bump_changed_tables):
+        event.listen(Session, 'after_flush', _bump_changed_tables)
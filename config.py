@@ -0,0 +1,146 @@
+"""
+Configuration for PharmaEvents
+
+create_app() loads Config by default. A deployment role (PHARMAEVENTS_ROLE)
+picks which blueprints a process mounts, so e.g. API-only workers never
+import the settings or spreadsheet import code.
+"""
+
+import os
+import tempfile
+
+# Blueprints mounted for each deployment role
+ROLE_BLUEPRINTS = {
+    'web': ('auth', 'events', 'dashboard', 'events_api', 'settings', 'imports'),
+    'api': ('dashboard', 'events_api'),
+    'admin': ('auth', 'settings', 'imports'),
+    'imports': ('auth', 'imports'),
+}
+
+def blueprints_from_env():
+    """Blueprint names from PHARMAEVENTS_BLUEPRINTS, or else from PHARMAEVENTS_ROLE"""
+    explicit = os.environ.get('PHARMAEVENTS_BLUEPRINTS')
+    if explicit:
+        return tuple(name.strip() for name in explicit.split(',') if name.strip())
+    role = os.environ.get('PHARMAEVENTS_ROLE', 'web')
+    if role not in ROLE_BLUEPRINTS:
+        raise ValueError(f'Unknown PHARMAEVENTS_ROLE "{role}". Must be one of: {", ".join(ROLE_BLUEPRINTS)}')
+    return ROLE_BLUEPRINTS[role]
+
+class Config:
+    SECRET_KEY = os.environ.get("SESSION_SECRET", "dev-secret-key-for-pharmaevents-2025")
+    REMEMBER_COOKIE_HTTPONLY = True
+    SESSION_COOKIE_HTTPONLY = True
+    SESSION_COOKIE_SAMESITE = 'Lax'
+    
+    # Configure database - Use PostgreSQL if available, SQLite as fallback
+    SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URL", "sqlite:///pharmaevents.db")
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        "pool_recycle": 300,
+        "pool_pre_ping": True,
+        "pool_reset_on_return": "commit"
+    }
+    
+    # Read replicas, comma separated; GET requests read from them (see db_routing.py)
+    DATABASE_REPLICA_URLS = [url.strip() for url in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if url.strip()]
+    # After writing, a user's session reads from the primary for this long
+    READ_YOUR_WRITES_SECONDS = float(os.environ.get('READ_YOUR_WRITES_SECONDS', '10'))
+    # Replicas further behind than this get no reads until they catch up
+    REPLICA_MAX_LAG_SECONDS = float(os.environ.get('REPLICA_MAX_LAG_SECONDS', '5'))
+    REPLICA_CHECK_INTERVAL = float(os.environ.get('REPLICA_CHECK_INTERVAL', '2'))
+    
+    # Events that ended this long ago are moved to the archive by `flask archive-events`
+    EVENT_ARCHIVE_AFTER_DAYS = int(os.environ.get('EVENT_ARCHIVE_AFTER_DAYS', '730'))
+    EVENT_ARCHIVE_BATCH_SIZE = int(os.environ.get('EVENT_ARCHIVE_BATCH_SIZE', '500'))
+    
+    # Scheduling conflicts (see conflicts.py): dimensions that block saving an
+    # event; the others only warn
+    EVENT_CONFLICT_BLOCKING = [name.strip() for name in os.environ.get('EVENT_CONFLICT_BLOCKING', 'creator,venue').split(',') if name.strip()]
+    # Slot taken by events without an end time
+    EVENT_DEFAULT_DURATION_MINUTES = int(os.environ.get('EVENT_DEFAULT_DURATION_MINUTES', '60'))
+    # Full reload of each worker's conflict index at least this often (seconds)
+    CONFLICT_INDEX_MAX_AGE = float(os.environ.get('CONFLICT_INDEX_MAX_AGE', '300'))
+    
+    # On-demand profiling of single requests (see profiling.py); '' disables it
+    PROFILE_DIR = os.environ.get('PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'pharmaevents-profiles'))
+    PROFILE_TOKEN_MAX_AGE = int(os.environ.get('PROFILE_TOKEN_MAX_AGE', '3600'))
+    PROFILE_MAX_REPORTS = int(os.environ.get('PROFILE_MAX_REPORTS', '50'))
+    # 'auto' uses pyinstrument's sampling profiler when installed, else cProfile
+    PROFILER = os.environ.get('PROFILER', 'auto')
+    
+    # Per-request memory figures (see memory.py); '' disables them
+    MEMORY_STATS_DIR = os.environ.get('MEMORY_STATS_DIR', os.path.join(tempfile.gettempdir(), 'pharmaevents-memory'))
+    MEMORY_STATS_INTERVAL = float(os.environ.get('MEMORY_STATS_INTERVAL', '30'))
+    # Share of requests run under tracemalloc, and the stack depth it records
+    MEMORY_SAMPLE_RATE = float(os.environ.get('MEMORY_SAMPLE_RATE', '0.01'))
+    MEMORY_TRACE_FRAMES = int(os.environ.get('MEMORY_TRACE_FRAMES', '1'))
+    # Log requests that grow the worker's RSS by at least this much
+    MEMORY_LOG_GROWTH_MB = float(os.environ.get('MEMORY_LOG_GROWTH_MB', '50'))
+    
+    BLUEPRINTS = blueprints_from_env()
+    
+    # Compiled templates shared by all workers on the host ('' disables)
+    JINJA_BYTECODE_CACHE_DIR = os.environ.get('JINJA_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'pharmaevents-jinja'))
+    # Rendered event cards kept per worker
+    EVENT_CARD_CACHE_SIZE = int(os.environ.get('EVENT_CARD_CACHE_SIZE', '2000'))
+    
+    # Compress dynamic HTML/JSON/CSV responses (see static_assets.py)
+    COMPRESS_RESPONSES = os.environ.get('COMPRESS_RESPONSES', '1').lower() in ('1', 'true', 'yes', 'on')
+    # Precompressed static files and script bundles ('' serves static files as-is)
+    STATIC_COMPRESSED_DIR = os.environ.get('STATIC_COMPRESSED_DIR', os.path.join(tempfile.gettempdir(), 'pharmaevents-static'))
+    # Serve main.js and a page's scripts as one file
+    ASSET_BUNDLING = os.environ.get('ASSET_BUNDLING', '0').lower() in ('1', 'true', 'yes', 'on')
+    
+    # Readers of the event change log don't move past a missing change id until
+    # the change after it is this old (longer than any transaction runs)
+    CHANGE_LOG_SETTLE_SECONDS = float(os.environ.get('CHANGE_LOG_SETTLE_SECONDS', '30'))
+    
+    # Server-Sent Events (/api/events/stream)
+    SSE_POLL_INTERVAL = float(os.environ.get('SSE_POLL_INTERVAL', '1.0'))
+    SSE_MAX_STREAM_SECONDS = int(os.environ.get('SSE_MAX_STREAM_SECONDS', '300'))
+    
+    # Background spreadsheet imports: uploaded files must be readable by every worker
+    IMPORT_UPLOAD_DIR = os.environ.get('IMPORT_UPLOAD_DIR', os.path.join(tempfile.gettempdir(), 'pharmaevents-imports'))
+    IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', '200'))
+    # A running job without progress for this long is treated as abandoned
+    IMPORT_STALE_SECONDS = int(os.environ.get('IMPORT_STALE_SECONDS', '120'))
+    
+    # Largest request body; bigger files go through the chunked upload API (see uploads.py)
+    MAX_CONTENT_LENGTH = int(os.environ.get('MAX_CONTENT_LENGTH', str(32 * 1024 * 1024)))
+    # Chunked uploads: staging files must be readable by every worker
+    UPLOAD_STAGING_DIR = os.environ.get('UPLOAD_STAGING_DIR', os.path.join(tempfile.gettempdir(), 'pharmaevents-uploads'))
+    UPLOAD_CHUNK_SIZE = int(os.environ.get('UPLOAD_CHUNK_SIZE', str(4 * 1024 * 1024)))
+    UPLOAD_MAX_BYTES = int(os.environ.get('UPLOAD_MAX_BYTES', str(200 * 1024 * 1024)))
+    UPLOAD_EXPIRE_HOURS = int(os.environ.get('UPLOAD_EXPIRE_HOURS', '24'))
+    
+    # Event notification emails (see notifications.py); no MAIL_SERVER turns them off
+    MAIL_SERVER = os.environ.get('MAIL_SERVER', '')
+    MAIL_PORT = int(os.environ.get('MAIL_PORT', '25'))
+    MAIL_USE_TLS = os.environ.get('MAIL_USE_TLS', '0').lower() in ('1', 'true', 'yes', 'on')
+    MAIL_USERNAME = os.environ.get('MAIL_USERNAME', '')
+    MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD', '')
+    MAIL_SENDER = os.environ.get('MAIL_SENDER', 'PharmaEvents <no-reply@localhost>')
+    MAIL_TIMEOUT = float(os.environ.get('MAIL_TIMEOUT', '30'))
+    # Prefix for event links in emails, e.g. https://events.example.com ('' leaves links out)
+    APP_BASE_URL = os.environ.get('APP_BASE_URL', '')
+    # Each worker's dispatcher sends whatever is due this often (seconds); set
+    # NOTIFY_BACKGROUND=0 to leave sending to `flask send-notifications`
+    NOTIFY_BACKGROUND = os.environ.get('NOTIFY_BACKGROUND', '1').lower() in ('1', 'true', 'yes', 'on')
+    NOTIFY_INTERVAL = float(os.environ.get('NOTIFY_INTERVAL', '60'))
+    NOTIFY_BATCH_SIZE = int(os.environ.get('NOTIFY_BATCH_SIZE', '500'))
+    # A claimed batch not finished within this long is picked up again
+    NOTIFY_LEASE_SECONDS = int(os.environ.get('NOTIFY_LEASE_SECONDS', '300'))
+    # Retries back off from NOTIFY_RETRY_BASE_SECONDS, doubling, up to an hour
+    NOTIFY_MAX_ATTEMPTS = int(os.environ.get('NOTIFY_MAX_ATTEMPTS', '6'))
+    NOTIFY_RETRY_BASE_SECONDS = int(os.environ.get('NOTIFY_RETRY_BASE_SECONDS', '60'))
+    NOTIFY_KEEP_SENT_DAYS = int(os.environ.get('NOTIFY_KEEP_SENT_DAYS', '30'))
+    
+    # Audit trail of admin actions (see audit.py), written in batches by a
+    # background thread per worker
+    AUDIT_QUEUE_SIZE = int(os.environ.get('AUDIT_QUEUE_SIZE', '10000'))
+    AUDIT_BATCH_SIZE = int(os.environ.get('AUDIT_BATCH_SIZE', '500'))
+    AUDIT_FLUSH_INTERVAL = float(os.environ.get('AUDIT_FLUSH_INTERVAL', '1.0'))
+    # How long record() waits for room in a full queue before writing the record itself
+    AUDIT_ENQUEUE_TIMEOUT = float(os.environ.get('AUDIT_ENQUEUE_TIMEOUT', '0.5'))
+    AUDIT_MAX_RETRIES = int(os.environ.get('AUDIT_MAX_RETRIES', '5'))
@@ -0,0 +1,266 @@
+"""
+Scheduling conflict detection
+
+Two events conflict when their times overlap and they share a resource:
+
+- creator: the same rep (or manager) running both
+- venue: the same venue, for in-person events
+- governorate: the same governorate slot, for in-person events; names are
+  resolved through the governorate aliases, so 'Sharkia' and 'Sharqia' are
+  the same slot
+
+Each worker keeps an in-memory interval index of the hot events per resource,
+so a check is a couple of binary searches instead of a query. The index is
+updated incrementally: when the change log grows, only the EventChange rows
+since the last refresh are applied (their snapshots carry the new times and
+resources). Keying on the log rather than the event stamp means a flush in
+the checking request's own transaction can't hide a change that is logged
+when it commits. The cursor follows commit order (settled_change_id), so a
+change committed after a later id was applied is still picked up; snapshots
+older than the indexed state of their event are skipped. Archived events are
+dropped like deleted ones. The index is reloaded in full after
+CONFLICT_INDEX_MAX_AGE.
+
+Declined events free their slot. Events without an end time occupy
+EVENT_DEFAULT_DURATION_MINUTES.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import func
+
+from change_tracking import settled_change_id
+from extensions import db
+from governorates import governorate_key
+from models import Event, EventChange
+from reference_data import get_reference_data
+
+DIMENSIONS = ('creator', 'venue', 'governorate')
+# Statuses whose events don't occupy their slot
+FREE_STATUSES = ('declined',)
+
+def _effective_end(start, end):
+    if end and end > start:
+        return end
+    return start + timedelta(minutes=current_app.config['EVENT_DEFAULT_DURATION_MINUTES'])
+
+def _governorate_slot(governorate, governorate_id=None):
+    """Governorate id, resolving ``governorate`` when no id is given; else the name's matching form"""
+    if governorate_id is not None:
+        return int(governorate_id)
+    if not governorate or not governorate_key(governorate):
+        return None
+    record = get_reference_data().resolve_governorate(governorate)
+    return record.id if record else governorate_key(governorate)
+
+def _resource_keys(user_id, governorate, venue_id, is_online, governorate_id=None):
+    keys = [('creator', user_id)]
+    if not is_online:
+        if venue_id:
+            keys.append(('venue', int(venue_id)))
+        slot = _governorate_slot(governorate, governorate_id)
+        if slot is not None:
+            keys.append(('governorate', slot))
+    return keys
+
+class _Intervals:
+    """Intervals of one resource sorted by start, with their longest length.
+
+    Everything overlapping [start, end) starts in [start - longest, end), so
+    a query is two bisections plus the matches. ``longest`` never shrinks on
+    removal; that only widens the scan slightly.
+    """
+
+    __slots__ = ('keys', 'ends', 'longest')
+
+    def __init__(self):
+        self.keys = []  # (start, event_id)
+        self.ends = []
+        self.longest = timedelta(0)
+
+    def add(self, start, end, event_id):
+        index = bisect_left(self.keys, (start, event_id))
+        self.keys.insert(index, (start, event_id))
+        self.ends.insert(index, end)
+        self.longest = max(self.longest, end - start)
+
+    def remove(self, start, event_id):
+        index = bisect_left(self.keys, (start, event_id))
+        if index < len(self.keys) and self.keys[index] == (start, event_id):
+            del self.keys[index]
+            del self.ends[index]
+
+    def overlapping(self, start, end):
+        low = bisect_left(self.keys, (start - self.longest,))
+        high = bisect_left(self.keys, (end,))
+        for index in range(low, high):
+            if self.ends[index] > start:
+                yield self.keys[index][1], self.keys[index][0], self.ends[index]
+
+class ConflictIndex:
+    """Per-worker interval index of hot events by creator, venue and governorate"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded_at = None
+        self._last_change_id = 0
+        self._events = {}  # event_id -> (start, end, resource keys)
+        self._updated = {}  # event_id -> updated_at of the indexed state
+        self._resources = {}  # resource key -> _Intervals
+
+    def _put(self, event_id, start, end, status, keys, updated_at=None):
+        indexed = self._updated.get(event_id)
+        if indexed is not None and updated_at is not None and updated_at < indexed:
+            return
+        self._updated[event_id] = updated_at
+        self._drop(event_id)
+        if start is None or status in FREE_STATUSES:
+            return
+        end = _effective_end(start, end)
+        self._events[event_id] = (start, end, keys)
+        for key in keys:
+            if key not in self._resources:
+                self._resources[key] = _Intervals()
+            self._resources[key].add(start, end, event_id)
+
+    def _drop(self, event_id):
+        previous = self._events.pop(event_id, None)
+        if previous:
+            start, _, keys = previous
+            for key in keys:
+                self._resources[key].remove(start, event_id)
+
+    def _load(self):
+        # Changes made before the settle window are committed, so the rows read
+        # below reflect them; later ones are applied again on top
+        cutoff = datetime.utcnow() - timedelta(seconds=current_app.config['CHANGE_LOG_SETTLE_SECONDS'])
+        self._last_change_id = db.session.query(func.max(EventChange.id)) \
+            .filter(EventChange.changed_at <= cutoff).scalar() or 0
+        self._events = {}
+        self._updated = {}
+        self._resources = {}
+        rows = db.session.query(Event.id, Event.start_datetime, Event.end_datetime, Event.status, Event.user_id,
+                                Event.governorate, Event.venue_id, Event.is_online, Event.governorate_id,
+                                Event.updated_at)
+        for event_id, start, end, status, user_id, governorate, venue_id, is_online, governorate_id, updated_at in rows:
+            keys = _resource_keys(user_id, governorate, venue_id, is_online, governorate_id)
+            self._put(event_id, start, end, status, keys, updated_at)
+        self._loaded_at = time.monotonic()
+        self._apply_changes()
+
+    def _apply_changes(self):
+        settled, _ = settled_change_id(self._last_change_id, current_app.config['CHANGE_LOG_SETTLE_SECONDS'])
+        rows = db.session.query(EventChange.id, EventChange.event_id, EventChange.operation, EventChange.data) \
+            .filter(EventChange.id > self._last_change_id, EventChange.id <= settled).order_by(EventChange.id)
+        for change_id, event_id, operation, data in rows:
+            if operation in ('delete', 'archive') or not data:
+                self._drop(event_id)
+                self._updated.pop(event_id, None)
+            else:
+                start = datetime.fromisoformat(data['start_datetime']) if data.get('start_datetime') else None
+                end = datetime.fromisoformat(data['end_datetime']) if data.get('end_datetime') else None
+                updated_at = datetime.fromisoformat(data['updated_at']) if data.get('updated_at') else None
+                keys = _resource_keys(data.get('user_id'), data.get('governorate'), data.get('venue_id'),
+                                      data.get('is_online'), data.get('governorate_id'))
+                self._put(event_id, start, end, data.get('status'), keys, updated_at)
+        self._last_change_id = settled
+
+    def refresh(self):
+        """Bring the index up to date with the database (one small query when nothing changed)"""
+        latest_change_id = db.session.query(func.max(EventChange.id)).scalar() or 0
+        max_age = current_app.config['CONFLICT_INDEX_MAX_AGE']
+        with self._lock:
+            expired = self._loaded_at is None or time.monotonic() - self._loaded_at > max_age
+            # Behind a gap in the log the cursor lags the latest id; keep checking
+            caught_up = self._last_change_id >= latest_change_id
+            if caught_up and not expired:
+                return
+            if expired:
+                self._load()
+            else:
+                self._apply_changes()
+
+    def find(self, start, end, keys, exclude_id=None):
+        """[(dimension, event_id, start, end)] of indexed events overlapping [start, end) on ``keys``"""
+        end = _effective_end(start, end)
+        found = []
+        with self._lock:
+            for key in keys:
+                intervals = self._resources.get(key)
+                if intervals is None:
+                    continue
+                for event_id, event_start, event_end in intervals.overlapping(start, end):
+                    if event_id != exclude_id:
+                        found.append((key[0], event_id, event_start, event_end))
+        return sorted(found, key=lambda item: (item[2], item[1], DIMENSIONS.index(item[0])))
+
+conflict_index = ConflictIndex()
+
+def find_conflicts(start, end, user_id, governorate=None, venue_id=None, is_online=False,
+                   exclude_id=None, dimensions=DIMENSIONS):
+    """Events overlapping a planned slot that share one of ``dimensions`` with it.
+
+    Returns [(dimension, event_id, start, end)] ordered by start. Pass the
+    event's own id as ``exclude_id`` when checking an edit. Only committed
+    events are considered; pending changes in the session are not flushed.
+    """
+    with db.session.no_autoflush:
+        conflict_index.refresh()
+    keys = [key for key in _resource_keys(user_id, governorate, venue_id, is_online) if key[0] in dimensions]
+    return conflict_index.find(start, end, keys, exclude_id)
+
+def check_programme(slots, dimensions=DIMENSIONS):
+    """Conflicts of each planned slot with existing events and with the other slots.
+
+    ``slots`` are dicts with start, end and user_id, and optionally
+    governorate (or governorate_id), venue_id, is_online and id (an existing
+    event being moved).
+    Returns one (existing, planned) pair per slot: existing as returned by
+    find_conflicts(), planned as [(dimension, index of the other slot)].
+    """
+    with db.session.no_autoflush:
+        conflict_index.refresh()
+    # Events this programme moves are only checked at their new times
+    moved = {slot['id'] for slot in slots if slot.get('id')}
+    planned = {}
+    slot_keys = []
+    for index, slot in enumerate(slots):
+        keys = [key for key in _resource_keys(slot['user_id'], slot.get('governorate'), slot.get('venue_id'),
+                                              slot.get('is_online'), slot.get('governorate_id'))
+                if key[0] in dimensions]
+        slot_keys.append(keys)
+        for key in keys:
+            if key not in planned:
+                planned[key] = _Intervals()
+            planned[key].add(slot['start'], _effective_end(slot['start'], slot.get('end')), index)
+    
+    results = []
+    for index, slot in enumerate(slots):
+        existing = [conflict for conflict in conflict_index.find(slot['start'], slot.get('end'), slot_keys[index])
+                    if conflict[1] not in moved]
+        end = _effective_end(slot['start'], slot.get('end'))
+        others = sorted((key[0], other) for key in slot_keys[index]
+                        for other, _, _ in planned[key].overlapping(slot['start'], end) if other != index)
+        results.append((existing, others))
+    return results
+
+def blocking_conflicts(conflicts):
+    """The conflicts on dimensions listed in EVENT_CONFLICT_BLOCKING"""
+    blocking = current_app.config['EVENT_CONFLICT_BLOCKING']
+    return [conflict for conflict in conflicts if conflict[0] in blocking]
+
+def describe_conflicts(conflicts, limit=3):
+    """Human-readable summary for flash messages, e.g. 'Rep visit (creator, 2025-03-01 10:00)'"""
+    event_ids = list(dict.fromkeys(conflict[1] for conflict in conflicts))
+    names = dict(db.session.query(Event.id, Event.name).filter(Event.id.in_(event_ids[:limit])))
+    parts = []
+    for event_id in event_ids[:limit]:
+        dimensions = ', '.join(conflict[0] for conflict in conflicts if conflict[1] == event_id)
+        start = next(conflict[2] for conflict in conflicts if conflict[1] == event_id)
+        parts.append(f'"{names.get(event_id, f"#{event_id}")}" ({dimensions}, {start:%Y-%m-%d %H:%M})')
+    if len(event_ids) > limit:
+        parts.append(f'and {len(event_ids) - limit} more')
+    return '; '.join(parts)
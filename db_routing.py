@@ -0,0 +1,158 @@
+"""
+Read/write splitting between the primary database and read replicas
+
+Replicas are configured as DATABASE_REPLICA_URLS and mounted as extra
+SQLALCHEMY_BINDS (replica1, replica2, ...). Without replicas nothing changes.
+
+- GET/HEAD requests read from one healthy replica, picked per request.
+- Everything else uses the primary: other methods, flushes, INSERT/UPDATE/
+  DELETE, SELECT ... FOR UPDATE, raw SQL, and code running outside a request
+  (background import jobs, CLI commands).
+- Once a request writes, the rest of it reads from the primary, and the
+  user's session sticks to the primary for READ_YOUR_WRITES_SECONDS so
+  they see their own changes on the next pages.
+- Replica lag is measured from the change stamps (see change_tracking.py),
+  so it works for Postgres streaming replicas and for plain copies of a
+  SQLite file alike. Every REPLICA_CHECK_INTERVAL seconds each worker
+  compares the primary's stamp total with each replica's. A replica that
+  is still missing changes the primary had more than REPLICA_MAX_LAG_SECONDS
+  ago, or that can't be reached, gets no reads until it catches up.
+"""
+
+import random
+import threading
+import time
+from flask import current_app, g, has_app_context, request, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import TextClause, text
+from sqlalchemy.sql.dml import UpdateBase
+
+REPLICA_BIND_PREFIX = 'replica'
+
+# Session key holding the time until which the user reads from the primary
+PRIMARY_UNTIL_KEY = '_db_primary_until'
+
+def _is_write(clause):
+    if isinstance(clause, (UpdateBase, TextClause)):
+        return True
+    return getattr(clause, '_for_update_arg', None) is not None
+
+class RoutingSession(Session):
+    """Session sending the reads of read-only requests to the request's replica"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_app_context():
+            if self._flushing or _is_write(clause):
+                # Reads after a write in the same request must see it
+                g._db_wrote = True
+                g._db_replica = None
+            else:
+                replica = g.get('_db_replica')
+                if replica is not None:
+                    return self._db.engines[replica]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+def _stamp_total(engine):
+    """Sum of all change stamp versions; only ever grows as writes are applied"""
+    with engine.connect() as connection:
+        return connection.execute(text('SELECT COALESCE(SUM(version), 0) FROM table_stamps')).scalar()
+
+class ReplicaMonitor:
+    """Per-worker view of which replicas are reachable and caught up"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._checked_at = None
+        # (primary stamp total, when it was first seen), oldest first
+        self._checkpoints = []
+        # Last stamp total read from each replica, kept while it is unreachable
+        self._totals = {}
+        self.healthy = []
+        self.lag = {}
+
+    def check(self, engines, replica_keys, max_lag):
+        now = time.monotonic()
+        primary_total = _stamp_total(engines[None])
+        if not self._checkpoints or self._checkpoints[-1][0] != primary_total:
+            self._checkpoints.append((primary_total, now))
+
+        lag = {}
+        for key in replica_keys:
+            try:
+                total = _stamp_total(engines[key])
+            except Exception as e:
+                # Logged when it drops out, not on every check while it is down
+                if key in self.healthy or self._checked_at is None:
+                    current_app.logger.error(f'Replica {key} is unavailable: {str(e)}')
+                lag[key] = None
+                continue
+            self._totals[key] = total
+            # How long ago the primary first had a state this replica hasn't reached
+            missing = [seen_at for checkpoint, seen_at in self._checkpoints if checkpoint > total]
+            lag[key] = now - missing[0] if missing else 0.0
+
+        # Only checkpoints some replica still lacks are needed (plus the latest).
+        # A replica that is down keeps the ones it lacked, so when it comes
+        # back its lag counts from the first change it missed.
+        lowest = min((self._totals[key] for key in replica_keys if key in self._totals), default=primary_total)
+        self._checkpoints = [item for item in self._checkpoints if item[0] > lowest] or self._checkpoints[-1:]
+
+        healthy = [key for key, seconds in lag.items() if seconds is not None and seconds <= max_lag]
+        for key, seconds in lag.items():
+            if seconds is not None and seconds > max_lag and key in self.healthy:
+                current_app.logger.warning(f'Replica {key} is {seconds:.1f}s behind; reading from the primary instead')
+        self.lag = lag
+        self.healthy = healthy
+        self._checked_at = now
+
+    def pick(self, app):
+        """Bind key of a healthy replica for this request, or None for the primary"""
+        replica_keys = app.config['REPLICA_BIND_KEYS']
+        if not replica_keys:
+            return None
+        if self._checked_at is None or time.monotonic() - self._checked_at >= app.config['REPLICA_CHECK_INTERVAL']:
+            # One thread checks; the others use the previous result meanwhile
+            if self._lock.acquire(blocking=self._checked_at is None):
+                try:
+                    engines = app.extensions['sqlalchemy'].engines
+                    self.check(engines, replica_keys, app.config['REPLICA_MAX_LAG_SECONDS'])
+                except Exception as e:
+                    app.logger.error(f'Error checking replicas: {str(e)}')
+                    self.healthy = []
+                    self._checked_at = time.monotonic()
+                finally:
+                    self._lock.release()
+        healthy = self.healthy
+        return random.choice(healthy) if healthy else None
+
+replica_monitor = ReplicaMonitor()
+
+def _choose_bind():
+    g._db_wrote = False
+    g._db_replica = None
+    if request.method not in ('GET', 'HEAD'):
+        return
+    if session.get(PRIMARY_UNTIL_KEY, 0) > time.time():
+        return
+    g._db_replica = replica_monitor.pick(current_app)
+
+def _remember_write(response):
+    if g.get('_db_wrote'):
+        session[PRIMARY_UNTIL_KEY] = time.time() + current_app.config['READ_YOUR_WRITES_SECONDS']
+    return response
+
+def init_app(app):
+    """Mount the replicas as binds and route requests; call before db.init_app()"""
+    urls = app.config.get('DATABASE_REPLICA_URLS') or []
+    binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+    keys = []
+    for number, url in enumerate(urls, start=1):
+        key = f'{REPLICA_BIND_PREFIX}{number}'
+        binds[key] = url
+        keys.append(key)
+    app.config['SQLALCHEMY_BINDS'] = binds
+    app.config['REPLICA_BIND_KEYS'] = keys
+    if keys:
+        app.before_request(_choose_bind)
+        app.after_request(_remember_write)
+        app.logger.info(f'Reading from {len(keys)} replica(s) on GET requests')
@@ -0,0 +1,325 @@
+"""
+Background bulk event import from CSV/Excel spreadsheets
+
+Rows are streamed from the file (csv module / openpyxl read-only mode) and
+processed in batches. Each batch is validated as a whole: names are resolved
+against lookup maps taken once per job from the reference-data cache, and
+dates are parsed column-wise with pandas. Valid rows go in with one
+multi-row INSERT for the events and one for their category links. A batch
+commits together with the job's progress (ImportJob.next_row), so a job
+interrupted by a worker restart resumes where it stopped without duplicating
+events.
+"""
+
+import csv
+import os
+import threading
+from datetime import date, datetime, time, timedelta
+from itertools import islice
+
+from sqlalchemy import and_, insert, or_, update
+from sqlalchemy.orm import selectinload
+
+from change_tracking import bump_stamps, record_event_changes
+from extensions import db
+from governorates import governorate_key
+from models import Event, ImportJob, ImportRowError, User, event_categories
+from notifications import queue_pending_notifications
+from reference_data import get_reference_data
+
+ALLOWED_EXTENSIONS = {'csv', 'xlsx'}
+
+# Columns of the downloadable template
+TEMPLATE_COLUMNS = ['Name', 'Description', 'Event Type', 'Categories', 'Start Date', 'Start Time',
+                    'End Date', 'End Time', 'Online', 'Governorate']
+
+# Accepted header spellings for each field (compared lowercased)
+COLUMN_ALIASES = {
+    'name': ('name', 'title', 'event name', 'event title'),
+    'description': ('description',),
+    'event_type': ('event type', 'type'),
+    'categories': ('categories', 'category'),
+    'start_date': ('start date',),
+    'start_time': ('start time',),
+    'end_date': ('end date',),
+    'end_time': ('end time',),
+    'is_online': ('online', 'is online'),
+    'governorate': ('governorate',),
+}
+REQUIRED_FIELDS = ('name', 'description', 'event_type', 'start_date')
+
+TRUE_VALUES = {'yes', 'y', 'true', '1', 'online'}
+
+def _cell_text(value):
+    """Cell value as stripped text; Excel dates and times become YYYY-MM-DD / HH:MM"""
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d')
+    if isinstance(value, date):
+        return value.strftime('%Y-%m-%d')
+    if isinstance(value, time):
+        return value.strftime('%H:%M')
+    return str(value).strip()
+
+def iter_sheet(path):
+    """Yield the rows of a CSV file or the first sheet of an XLSX file as lists of text, header first"""
+    if path.lower().endswith('.csv'):
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            for row in csv.reader(f):
+                yield [cell.strip() for cell in row]
+    else:
+        from openpyxl import load_workbook
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            for row in workbook.active.iter_rows(values_only=True):
+                yield [_cell_text(value) for value in row]
+        finally:
+            workbook.close()
+
+def map_columns(header):
+    """Map field name -> column index; raises ValueError if required columns are missing"""
+    positions = {cell.strip().lower(): index for index, cell in enumerate(header) if cell}
+    columns = {}
+    for field, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in positions:
+                columns[field] = positions[alias]
+                break
+    missing = [field.replace('_', ' ').title() for field in REQUIRED_FIELDS if field not in columns]
+    if missing:
+        raise ValueError(f'Missing required columns: {", ".join(missing)}')
+    return columns
+
+def build_lookups():
+    """Lowercased name -> id maps for event types and categories, and governorate_key() -> governorate"""
+    reference = get_reference_data()
+    return {
+        'event_types': reference.event_type_ids,
+        'categories': reference.category_ids,
+        'governorates': {alias_key: reference.governorates_by_id[governorate_id]
+                         for alias_key, governorate_id in reference.governorate_ids.items()},
+    }
+
+def _parse_datetimes(dates, times):
+    """Vectorised YYYY-MM-DD [HH:MM] parsing; invalid or empty dates become NaT"""
+    import pandas as pd
+    times = times.where(times != '', '00:00')
+    return pd.to_datetime(dates + ' ' + times, format='%Y-%m-%d %H:%M', errors='coerce')
+
+def validate_batch(batch, columns, lookups, user_id, status):
+    """Split ``batch`` ([(row_number, cells)]) into event rows to insert and row errors.
+
+    Returns (valid, errors): valid is a list of (event values, category ids),
+    errors a list of (row_number, message). Blank rows are skipped.
+    """
+    import pandas as pd
+
+    def cell(cells, field):
+        index = columns.get(field)
+        return cells[index] if index is not None and index < len(cells) else ''
+
+    batch = [(row_number, cells) for row_number, cells in batch if any(cells)]
+    if not batch:
+        return [], []
+    frame = pd.DataFrame([{field: cell(cells, field) for field in COLUMN_ALIASES} for _, cells in batch])
+
+    # Date checks run on whole columns rather than row by row
+    starts = _parse_datetimes(frame['start_date'], frame['start_time'])
+    ends = _parse_datetimes(frame['end_date'], frame['end_time'])
+    bad_start = starts.isna()
+    bad_end = (frame['end_date'] != '') & ends.isna()
+    end_before_start = ends.notna() & starts.notna() & (ends < starts)
+
+    valid = []
+    errors = []
+    for position, (row_number, _) in enumerate(batch):
+        row = frame.iloc[position]
+        problems = []
+        if not row['name']:
+            problems.append('Name is required')
+        if not row['description']:
+            problems.append('Description is required')
+
+        event_type_id = lookups['event_types'].get(row['event_type'].lower())
+        if event_type_id is None:
+            problems.append(f'Unknown event type "{row["event_type"]}"' if row['event_type'] else 'Event Type is required')
+
+        category_ids = []
+        for name in row['categories'].replace(';', ',').split(','):
+            name = name.strip()
+            if not name:
+                continue
+            category_id = lookups['categories'].get(name.lower())
+            if category_id is None:
+                problems.append(f'Unknown category "{name}"')
+            elif category_id not in category_ids:
+                category_ids.append(category_id)
+
+        if bad_start.iloc[position]:
+            problems.append('Start Date/Time must be YYYY-MM-DD and HH:MM')
+        if bad_end.iloc[position]:
+            problems.append('End Date/Time must be YYYY-MM-DD and HH:MM')
+        elif end_before_start.iloc[position]:
+            problems.append('End is before start')
+
+        is_online = row['is_online'].lower() in TRUE_VALUES
+        governorate = None
+        if not is_online:
+            governorate = lookups['governorates'].get(governorate_key(row['governorate']))
+            if governorate is None:
+                problems.append(f'Unknown governorate "{row["governorate"]}"' if row['governorate'] else 'Governorate is required for in-person events')
+
+        if problems:
+            errors.append((row_number, '; '.join(problems)))
+            continue
+        valid.append(({
+            'name': row['name'][:200],
+            'description': row['description'],
+            'event_type_id': event_type_id,
+            'is_online': is_online,
+            'start_datetime': starts.iloc[position].to_pydatetime(),
+            'end_datetime': ends.iloc[position].to_pydatetime() if pd.notna(ends.iloc[position]) else None,
+            'governorate': governorate.name if governorate else None,
+            'governorate_id': governorate.id if governorate else None,
+            'user_id': user_id,
+            'status': status,
+        }, category_ids))
+    return valid, errors
+
+def save_batch(job, rows_read, valid, errors):
+    """Insert a validated batch and advance the job, all in one transaction"""
+    if valid:
+        event_ids = db.session.scalars(
+            insert(Event).returning(Event.id, sort_by_parameter_order=True),
+            [values for values, _ in valid]
+        ).all()
+        links = [{'event_id': event_id, 'category_id': category_id}
+                 for event_id, (_, category_ids) in zip(event_ids, valid) for category_id in category_ids]
+        if links:
+            db.session.execute(insert(event_categories), links)
+        created = Event.query.options(selectinload(Event.categories)).filter(Event.id.in_(event_ids)).all()
+        record_event_changes(created, 'create', actor_id=job.user_id)
+        queue_pending_notifications(created, actor_id=job.user_id)
+        bump_stamps(db.session.connection(), ['event'])
+    if errors:
+        db.session.execute(insert(ImportRowError), [
+            {'job_id': job.id, 'row_number': row_number, 'message': message} for row_number, message in errors
+        ])
+    job.next_row += rows_read
+    job.created_count += len(valid)
+    job.error_count += len(errors)
+    job.heartbeat_at = datetime.utcnow()
+    job_id = job.id
+    db.session.commit()
+    # Don't let the identity map grow with every batch
+    db.session.expunge_all()
+    return db.session.get(ImportJob, job_id)
+
+def claim_job(job_id, stale_seconds, include_failed=False):
+    """Mark a job running if it is queued or abandoned; False if another worker has it.
+
+    A running job whose heartbeat is older than ``stale_seconds`` belongs to a
+    worker that died and may be taken over. Failed jobs are only claimed on
+    an explicit resume.
+    """
+    now = datetime.utcnow()
+    claimable = [
+        ImportJob.status == 'queued',
+        and_(ImportJob.status == 'running',
+             or_(ImportJob.heartbeat_at.is_(None), ImportJob.heartbeat_at < now - timedelta(seconds=stale_seconds))),
+    ]
+    if include_failed:
+        claimable.append(ImportJob.status == 'failed')
+    result = db.session.execute(
+        update(ImportJob)
+        .where(ImportJob.id == job_id, or_(*claimable))
+        .values(status='running', heartbeat_at=now, message=None)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return result.rowcount == 1
+
+def process_job(job, batch_size):
+    """Import the remaining rows of a claimed job"""
+    owner = db.session.get(User, job.user_id)
+    status = 'active' if owner and owner.can_approve_events() else 'pending'
+
+    if job.total_rows is None:
+        job.total_rows = max(sum(1 for _ in iter_sheet(job.stored_path)) - 1, 0)
+        job.heartbeat_at = datetime.utcnow()
+        db.session.commit()
+
+    rows = iter_sheet(job.stored_path)
+    try:
+        header = next(rows, None)
+        if header is None:
+            raise ValueError('The file is empty')
+        columns = map_columns(header)
+        lookups = build_lookups()
+
+        # Data starts on spreadsheet row 2; skip rows finished by an earlier run
+        remaining = islice(enumerate(rows, start=2), job.next_row, None)
+        while True:
+            batch = list(islice(remaining, batch_size))
+            if not batch:
+                break
+            valid, errors = validate_batch(batch, columns, lookups, job.user_id, status)
+            job = save_batch(job, len(batch), valid, errors)
+    finally:
+        rows.close()
+
+    job.status = 'completed'
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+    # Completed jobs can't be resumed, so the upload is no longer needed
+    try:
+        os.remove(job.stored_path)
+    except OSError:
+        pass
+
+def run_job(app, job_id):
+    """Thread target: process a job that the caller has already claimed"""
+    with app.app_context():
+        try:
+            job = db.session.get(ImportJob, job_id)
+            process_job(job, app.config.get('IMPORT_BATCH_SIZE', 200))
+            app.logger.info(f'Import job {job_id} completed')
+        except Exception as e:
+            db.session.rollback()
+            app.logger.error(f'Import job {job_id} failed: {str(e)}')
+            db.session.execute(
+                update(ImportJob)
+                .where(ImportJob.id == job_id)
+                .values(status='failed', message=str(e), finished_at=datetime.utcnow())
+                .execution_options(synchronize_session=False)
+            )
+            db.session.commit()
+        finally:
+            db.session.remove()
+
+def start_job(app, job_id):
+    """Run a claimed job on a background thread of this worker"""
+    thread = threading.Thread(target=run_job, args=(app, job_id), name=f'import-job-{job_id}', daemon=True)
+    thread.start()
+    return thread
+
+def is_stalled(job, stale_seconds):
+    return job.status == 'running' and (
+        job.heartbeat_at is None or job.heartbeat_at < datetime.utcnow() - timedelta(seconds=stale_seconds)
+    )
+
+def job_to_dict(job, stale_seconds):
+    return {
+        'id': job.id,
+        'filename': job.filename,
+        'status': job.status,
+        'stalled': is_stalled(job, stale_seconds),
+        'total_rows': job.total_rows,
+        'processed_rows': job.next_row,
+        'created_count': job.created_count,
+        'error_count': job.error_count,
+        'message': job.message,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    }
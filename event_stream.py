@@ -0,0 +1,207 @@
+"""
+Server-Sent Events push for dashboard stats and the approval queue
+
+Each worker runs one ChangeBroker: a background thread that tails the
+EventChange log (see change_tracking.py) and fans new rows out to the SSE
+connections open on that worker. Because every worker reads the same log, a
+change committed by any worker reaches every open dashboard, with one cheap
+indexed query per poll interval per worker instead of per browser.
+"""
+
+import json
+import queue
+import threading
+import time
+from datetime import datetime
+
+from change_tracking import settled_change_id
+from extensions import db
+from models import EventChange
+
+# Longest gap between messages before a keep-alive comment is sent
+KEEPALIVE_SECONDS = 15
+
+class ChangeBroker:
+    """In-process pub/sub fed by polling the EventChange log"""
+
+    def __init__(self, poll_interval=1.0, queue_size=100, settle_seconds=30):
+        self.poll_interval = poll_interval
+        self.settle_seconds = settle_seconds
+        self.queue_size = queue_size
+        self.last_id = None
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._app = None
+
+    def start(self, app):
+        """Start the poller thread (once per process, after fork)"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._app = app
+            self._thread = threading.Thread(target=self._run, name='change-broker', daemon=True)
+            self._thread.start()
+
+    def subscribe(self):
+        subscriber = queue.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def publish(self, change):
+        """Deliver a change to every subscriber; slow subscribers drop messages"""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(change)
+            except queue.Full:
+                pass
+
+    def _poll(self):
+        query = EventChange.query
+        if self.last_id is None:
+            # Only changes committed after the broker started are pushed
+            latest = query.order_by(EventChange.id.desc()).first()
+            self.last_id = latest.id if latest else 0
+            return
+        # Stop before changes still committing, so none is skipped (see settled_change_id)
+        settled, _ = settled_change_id(self.last_id, self.settle_seconds, limit=500)
+        rows = query.filter(EventChange.id > self.last_id, EventChange.id <= settled) \
+            .order_by(EventChange.id.asc()).all()
+        for row in rows:
+            self.publish(change_to_dict(row))
+        self.last_id = settled
+
+    def _run(self):
+        while True:
+            # Keep polling without subscribers so last_id stays current and
+            # new connections only see changes made after they subscribed
+            try:
+                with self._app.app_context():
+                    self._poll()
+                    db.session.remove()
+            except Exception as e:
+                self._app.logger.error(f'Change broker poll failed: {str(e)}')
+            time.sleep(self.poll_interval)
+
+broker = ChangeBroker()
+
+def change_to_dict(change):
+    return {
+        'id': change.id,
+        'event_id': change.event_id,
+        'owner_id': change.owner_id,
+        'operation': change.operation,
+        'changed_at': change.changed_at.isoformat(),
+        'data': change.data or {},
+    }
+
+def _parse_datetime(value):
+    return datetime.fromisoformat(value) if value else None
+
+def stats_delta(change, now=None):
+    """Dashboard stat deltas for a create/status/archive change, or None if stats must be refetched"""
+    data = change['data']
+    now = now or datetime.now()
+    if change['operation'] == 'create':
+        start = _parse_datetime(data.get('start_datetime'))
+        end = _parse_datetime(data.get('end_datetime'))
+        return {
+            'total_events': 1,
+            'online_events': 1 if data.get('is_online') else 0,
+            'offline_events': 0 if data.get('is_online') else 1,
+            'pending_events': 1 if data.get('status') == 'pending' else 0,
+            'upcoming_events': 1 if start and start > now else 0,
+            'completed_events': 1 if end and end < now else 0,
+        }
+    if change['operation'] == 'status':
+        was_pending = data.get('previous_status') == 'pending'
+        is_pending = data.get('status') == 'pending'
+        return {'pending_events': int(is_pending) - int(was_pending)}
+    if change['operation'] == 'archive':
+        # Totals include the archive, which doesn't count pending events
+        return {'pending_events': -1 if data.get('status') == 'pending' else 0}
+    return None
+
+def messages_for(change, user_id, can_approve):
+    """SSE (event, data) pairs a given viewer should receive for a change"""
+    if not can_approve and change['owner_id'] != user_id:
+        return []
+    messages = []
+    delta = stats_delta(change)
+    if delta is None:
+        messages.append(('refresh', {'reason': change['operation']}))
+    else:
+        messages.append(('stats', delta))
+
+    data = change['data']
+    if can_approve:
+        if change['operation'] == 'create' and data.get('status') == 'pending':
+            messages.append(('pending', {
+                'action': 'added',
+                'event_id': change['event_id'],
+                'name': data.get('name'),
+                'start_datetime': data.get('start_datetime'),
+            }))
+        elif change['operation'] == 'status' and data.get('previous_status') == 'pending':
+            messages.append(('pending', {
+                'action': 'resolved',
+                'event_id': change['event_id'],
+                'name': data.get('name'),
+                'status': data.get('status'),
+            }))
+    return messages
+
+def format_sse(event_name, data, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {event_name}')
+    lines.append(f'data: {json.dumps(data)}')
+    return '\n'.join(lines) + '\n\n'
+
+def stream(user_id, can_approve, last_event_id=None, max_seconds=300):
+    """Generator of SSE text for one connection.
+
+    Missed changes after ``last_event_id`` (sent by EventSource on reconnect)
+    are replayed from the log first. The stream ends after ``max_seconds`` so
+    threads are recycled; browsers reconnect on their own.
+    """
+    subscriber = broker.subscribe()
+    delivered = last_event_id or 0
+    deadline = time.monotonic() + max_seconds
+    try:
+        yield 'retry: 3000\n\n'
+        if last_event_id is not None:
+            # Replayed up to the same settled point the broker publishes from,
+            # so a change committing late still arrives through the broker
+            settled, _ = settled_change_id(last_event_id, broker.settle_seconds, limit=500)
+            query = EventChange.query.filter(EventChange.id > last_event_id, EventChange.id <= settled)
+            if not can_approve:
+                query = query.filter(EventChange.owner_id == user_id)
+            for row in query.order_by(EventChange.id.asc()).all():
+                for event_name, data in messages_for(change_to_dict(row), user_id, can_approve):
+                    yield format_sse(event_name, data, row.id)
+            delivered = settled
+        # Don't hold a pooled connection for the lifetime of the stream
+        db.session.remove()
+
+        while time.monotonic() < deadline:
+            try:
+                change = subscriber.get(timeout=max(0.1, min(KEEPALIVE_SECONDS, deadline - time.monotonic())))
+            except queue.Empty:
+                yield ': keep-alive\n\n'
+                continue
+            if change['id'] <= delivered:
+                continue
+            for event_name, data in messages_for(change, user_id, can_approve):
+                yield format_sse(event_name, data, change['id'])
+            delivered = change['id']
+    finally:
+        broker.unsubscribe(subscriber)
@@ -0,0 +1,15 @@
+"""
+Flask extension instances, bound to an app in create_app()
+"""
+
+from flask_sqlalchemy import SQLAlchemy
+from flask_login import LoginManager
+
+from db_routing import RoutingSession
+
+# Reads of GET requests may go to a replica (see db_routing.py)
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+login_manager = LoginManager()
+login_manager.login_message = "Please log in to access this page."
+login_manager.login_message_category = "info"
@@ -0,0 +1,202 @@
+"""
+Governorate reference data, name normalisation and the per-governorate rollup
+
+Governorates live in the governorate table (canonical name and ISO code),
+with other spellings in governorate_alias. Every write path resolves the
+submitted name through reference_data.ReferenceData.resolve_governorate(),
+so events store the canonical name and a governorate_id that grouping and
+the heatmap use instead of free text. seed_governorates() and
+backfill_event_governorates() run from database init; the backfill
+canonicalises rows written before the table existed.
+
+GovernorateRollup keeps per-worker event counts by (governorate, owner,
+month) for hot and archived events, so /api/dashboard/governorates answers
+any scope and month range without querying the event table. Hot counts are
+loaded once and then updated from the event change log, one delta per
+change, rather than reloaded on every event write; archived counts reload
+when event_archive moves.
+"""
+
+import re
+import threading
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import extract, func, update
+from sqlalchemy.orm import selectinload
+
+from change_tracking import bump_stamps, get_stamps, record_event_changes, settled_change_id
+from extensions import db
+from helpers import GOVERNORATES
+from models import ArchivedEvent, Event, EventChange, Governorate, GovernorateAlias
+
+def _counts_key(governorate_id, user_id, start):
+    if governorate_id is None or start is None:
+        return None
+    return (governorate_id, user_id, start.year, start.month)
+
+def governorate_key(name):
+    """Matching form of a governorate name: 'El-Fayoum' and 'fayoum' both give 'fayoum'"""
+    words = re.sub(r'[^a-z0-9 ]', ' ', (name or '').lower()).split()
+    if len(words) > 1 and words[0] in ('al', 'el', 'as', 'ash', 'ad'):
+        words = words[1:]
+    return ''.join(words)
+
+def seed_governorates():
+    """Add missing governorates and aliases from helpers.GOVERNORATES (run from database init)"""
+    existing = {name: governorate_id for governorate_id, name in db.session.query(Governorate.id, Governorate.name)}
+    for name, code, _ in GOVERNORATES:
+        if name not in existing:
+            governorate = Governorate(name=name, code=code)
+            db.session.add(governorate)
+            db.session.flush()
+            existing[name] = governorate.id
+
+    known = {alias_key for (alias_key,) in db.session.query(GovernorateAlias.alias_key)}
+    for name, code, aliases in GOVERNORATES:
+        for alias in (name, code) + tuple(aliases):
+            alias_key = governorate_key(alias)
+            if alias_key and alias_key not in known:
+                db.session.add(GovernorateAlias(alias_key=alias_key, governorate_id=existing[name]))
+                known.add(alias_key)
+    db.session.commit()
+
+def backfill_event_governorates():
+    """Canonicalise the governorate of events written before the reference table; returns rows updated"""
+    from reference_data import get_reference_data
+    reference = get_reference_data()
+    # Hot events go through the change log like any edit, so the conflict
+    # index and the rollup pick them up without reloading
+    events = Event.query.options(selectinload(Event.categories)).filter(
+        Event.governorate.isnot(None), Event.governorate_id.is_(None)).all()
+    changed = []
+    for event in events:
+        governorate = reference.resolve_governorate(event.governorate)
+        if governorate is not None:
+            event.governorate, event.governorate_id = governorate.name, governorate.id
+            changed.append(event)
+    if changed:
+        db.session.flush()
+        record_event_changes(changed, 'update')
+
+    archived = 0
+    names = [name for (name,) in db.session.query(ArchivedEvent.governorate).filter(
+        ArchivedEvent.governorate.isnot(None), ArchivedEvent.governorate_id.is_(None)).distinct()]
+    for name in names:
+        governorate = reference.resolve_governorate(name)
+        if governorate is None:
+            continue
+        archived += db.session.execute(
+            update(ArchivedEvent.__table__)
+            .where(ArchivedEvent.governorate == name, ArchivedEvent.governorate_id.is_(None))
+            .values(governorate=governorate.name, governorate_id=governorate.id)
+        ).rowcount
+    if archived:
+        bump_stamps(db.session.connection(), [ArchivedEvent.__tablename__])
+    db.session.commit()
+    return len(changed) + archived
+
+class GovernorateRollup:
+    """Per-worker event counts by (governorate_id, user_id, year, month)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Archived events: (event_archive stamp version, counts)
+        self._archived = None
+        # Hot events: counts kept current from the change log
+        self._hot = None
+        self._events = {}  # event_id -> (counts key or None, updated_at)
+        self._last_change_id = 0
+
+    def _load_archived(self):
+        year = extract('year', ArchivedEvent.start_datetime)
+        month = extract('month', ArchivedEvent.start_datetime)
+        rows = db.session.query(ArchivedEvent.governorate_id, ArchivedEvent.user_id, year, month, func.count()) \
+            .filter(ArchivedEvent.governorate_id.isnot(None)) \
+            .group_by(ArchivedEvent.governorate_id, ArchivedEvent.user_id, year, month)
+        return {(governorate_id, user_id, int(year), int(month)): count
+                for governorate_id, user_id, year, month, count in rows}
+
+    def _add(self, key, delta):
+        if key is None:
+            return
+        count = self._hot.get(key, 0) + delta
+        if count:
+            self._hot[key] = count
+        else:
+            self._hot.pop(key, None)
+
+    def _set(self, event_id, key, updated_at):
+        previous = self._events.get(event_id)
+        if previous is not None:
+            # A replayed snapshot older than what is counted
+            if updated_at is not None and previous[1] is not None and updated_at < previous[1]:
+                return
+            self._add(previous[0], -1)
+        self._events[event_id] = (key, updated_at)
+        self._add(key, 1)
+
+    def _load_hot(self):
+        # As in conflicts.ConflictIndex: changes made before the settle window
+        # are in the rows read here, later ones are replayed on top
+        cutoff = datetime.utcnow() - timedelta(seconds=current_app.config['CHANGE_LOG_SETTLE_SECONDS'])
+        self._last_change_id = db.session.query(func.max(EventChange.id)) \
+            .filter(EventChange.changed_at <= cutoff).scalar() or 0
+        self._hot = {}
+        self._events = {}
+        rows = db.session.query(Event.id, Event.governorate_id, Event.user_id, Event.start_datetime, Event.updated_at)
+        for event_id, governorate_id, user_id, start, updated_at in rows:
+            self._set(event_id, _counts_key(governorate_id, user_id, start), updated_at)
+        self._apply_changes()
+
+    def _apply_changes(self):
+        settled, _ = settled_change_id(self._last_change_id, current_app.config['CHANGE_LOG_SETTLE_SECONDS'])
+        if settled == self._last_change_id:
+            return
+        rows = db.session.query(EventChange.event_id, EventChange.operation, EventChange.data) \
+            .filter(EventChange.id > self._last_change_id, EventChange.id <= settled).order_by(EventChange.id)
+        for event_id, operation, data in rows:
+            if operation in ('delete', 'archive') or not data:
+                previous = self._events.pop(event_id, None)
+                if previous is not None:
+                    self._add(previous[0], -1)
+                continue
+            governorate_id = data.get('governorate_id')
+            if 'governorate_id' not in data and data.get('governorate'):
+                # Snapshots logged before they carried the id
+                from reference_data import get_reference_data
+                governorate = get_reference_data().resolve_governorate(data['governorate'])
+                governorate_id = governorate.id if governorate else None
+            start = datetime.fromisoformat(data['start_datetime']) if data.get('start_datetime') else None
+            updated_at = datetime.fromisoformat(data['updated_at']) if data.get('updated_at') else None
+            self._set(event_id, _counts_key(governorate_id, data.get('user_id'), start), updated_at)
+        self._last_change_id = settled
+
+    def _parts(self, archive_version):
+        """(hot counts, archived counts), brought up to date"""
+        with self._lock:
+            if self._hot is None:
+                self._load_hot()
+            else:
+                self._apply_changes()
+            if self._archived is None or self._archived[0] != archive_version:
+                self._archived = (archive_version, self._load_archived())
+            return dict(self._hot), self._archived[1]
+
+    def counts(self, start_month=None, end_month=None, user_id=None):
+        """{governorate_id: events} for events starting in months [start_month, end_month).
+
+        Months are (year, month) tuples; None leaves that side open.
+        ``user_id`` limits the counts to one owner's events.
+        """
+        archive_version = get_stamps(ArchivedEvent.__tablename__)[ArchivedEvent.__tablename__][0]
+        totals = {}
+        for part in self._parts(archive_version):
+            for (governorate_id, owner_id, year, month), count in part.items():
+                if user_id is not None and owner_id != user_id:
+                    continue
+                if start_month and (year, month) < start_month or end_month and (year, month) >= end_month:
+                    continue
+                totals[governorate_id] = totals.get(governorate_id, 0) + count
+        return totals
+
+governorate_rollup = GovernorateRollup()
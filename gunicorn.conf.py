@@ -0,0 +1,103 @@
+"""
+Gunicorn configuration for PharmaEvents
+
+Gunicorn picks this file up automatically from the working directory.
+Database initialization runs once in the master before any worker is forked,
+and workers can optionally pre-import pandas/openpyxl right after fork.
+
+Environment variables:
+    PHARMAEVENTS_INIT_DB          Run ``flask init-db`` on master start (default: 1)
+    PHARMAEVENTS_WARMUP           Pre-import pandas/openpyxl in each worker (default: 0)
+    PHARMAEVENTS_BOOT_BUDGET      Seconds a worker may take to boot before we warn (default: 5)
+    GUNICORN_MAX_REQUESTS         Recycle workers after this many requests (default: 0 = never)
+    GUNICORN_MAX_RSS_MB           Recycle workers whose RSS exceeds this many MB (default: 0 = never)
+    GUNICORN_WORKER_CLASS         Worker class (default: gthread, needed for SSE streams)
+    GUNICORN_THREADS              Threads per gthread worker (default: 16)
+"""
+
+import os
+import random
+import subprocess
+import sys
+import time
+
+
+def _env_flag(name, default):
+    return os.environ.get(name, default).lower() in ('1', 'true', 'yes', 'on')
+
+
+# Threaded workers so long-lived /api/events/stream connections don't each
+# tie up a whole process
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.environ.get('GUNICORN_THREADS', '16'))
+
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', '0'))
+# Stagger recycling so workers don't all restart (and re-import) at once
+max_requests_jitter = max_requests // 10 if max_requests else 0
+
+# Memory-based recycling: a worker over the limit finishes its requests and
+# exits, and the master starts a fresh one. Thresholds get +/-5% jitter per
+# worker for the same reason as max_requests_jitter.
+_max_rss_mb = float(os.environ.get('GUNICORN_MAX_RSS_MB', '0'))
+
+_boot_budget = float(os.environ.get('PHARMAEVENTS_BOOT_BUDGET', '5'))
+_master_started = time.perf_counter()
+
+
+def on_starting(server):
+    """Initialize the database once, before forking workers.
+
+    Runs in a subprocess so the master never imports the application (which
+    would break --reload and hand open connections to forked workers).
+    """
+    if not _env_flag('PHARMAEVENTS_INIT_DB', '1'):
+        return
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, '-m', 'flask', '--app', 'app', 'init-db'])
+    if result.returncode != 0:
+        server.log.error(f'Database initialization failed with exit code {result.returncode}')
+    server.log.info(f'Database check finished in {time.perf_counter() - started:.3f}s')
+
+
+def when_ready(server):
+    server.log.info(f'Master ready in {time.perf_counter() - _master_started:.3f}s')
+
+
+def post_fork(server, worker):
+    worker._boot_started = time.perf_counter()
+    worker._max_rss = _max_rss_mb * 1024 * 1024 * random.uniform(0.95, 1.05)
+
+
+def _recycle_if_too_big(worker):
+    from memory import current_rss
+    rss = current_rss()
+    if rss is not None and rss > worker._max_rss and worker.alive:
+        worker.log.warning(f'Worker {worker.pid} uses {rss / 1024 / 1024:.0f} MB, '
+                           f'over {worker._max_rss / 1024 / 1024:.0f} MB; recycling it')
+        # The same graceful exit as max_requests
+        worker.alive = False
+
+
+def post_request(worker, req, environ, resp):
+    if _max_rss_mb:
+        _recycle_if_too_big(worker)
+
+
+def worker_exit(server, worker):
+    """Write the worker's queued audit records before it goes"""
+    audit = sys.modules.get('audit')
+    if audit is not None:
+        audit.audit_writer.shutdown()
+
+
+def post_worker_init(worker):
+    """Optionally warm up the worker, then record how long it took to boot"""
+    if _env_flag('PHARMAEVENTS_WARMUP', '0'):
+        from app import warm_up
+        warm_up()
+
+    boot_time = time.perf_counter() - getattr(worker, '_boot_started', time.perf_counter())
+    if boot_time > _boot_budget:
+        worker.log.warning(f'Worker {worker.pid} booted in {boot_time:.3f}s, over the {_boot_budget:.1f}s budget')
+    else:
+        worker.log.info(f'Worker {worker.pid} booted in {boot_time:.3f}s')
@@ -5,6 +5,42 @@ from functools import wraps
 from flask import flash, redirect, url_for, Response
 from flask_login import current_user
 
+# Egyptian governorates: canonical name, ISO 3166-2 code and other spellings
+# seen in forms and spreadsheets. Seeds the governorate reference tables (see
+# governorates.py); names are matched with governorates.governorate_key().
+GOVERNORATES = [
+    ('Cairo', 'EG-C', ('Al Qahirah', 'El Qahera', 'Kairo')),
+    ('Giza', 'EG-GZ', ('Gizah', 'Al Jizah', 'El Giza')),
+    ('Alexandria', 'EG-ALX', ('Alex', 'Iskandariya', 'Al Iskandariyah')),
+    ('Dakahlia', 'EG-DK', ('Dakahlya', 'Daqahlia', 'Ad Daqahliyah')),
+    ('Red Sea', 'EG-BA', ('Al Bahr al Ahmar',)),
+    ('Beheira', 'EG-BH', ('Behera', 'Buhayrah', 'Al Buhayrah')),
+    ('Fayoum', 'EG-FYM', ('Faiyum', 'Fayum', 'Al Fayyum')),
+    ('Gharbiya', 'EG-GH', ('Gharbia', 'Gharbiyah', 'Al Gharbiyah')),
+    ('Ismailia', 'EG-IS', ('Ismailiya', 'Al Ismailiyah')),
+    ('Menofia', 'EG-MNF', ('Monufia', 'Menoufia', 'Minufiya', 'Al Minufiyah')),
+    ('Minya', 'EG-MN', ('Menia', 'Al Minya')),
+    ('Qaliubiya', 'EG-KB', ('Qalyubia', 'Qalyubiya', 'Kalyubia', 'Al Qalyubiyah')),
+    ('New Valley', 'EG-WAD', ('Al Wadi al Jadid', 'El Wadi El Gedid')),
+    ('Suez', 'EG-SUZ', ('As Suways',)),
+    ('Aswan', 'EG-ASN', ('Assuan',)),
+    ('Assiut', 'EG-AST', ('Asyut', 'Asiut', 'Assyout')),
+    ('Beni Suef', 'EG-BNS', ('Bani Suwayf', 'Beni Sweif', 'Bani Sweif')),
+    ('Port Said', 'EG-PTS', ('Bur Said', 'Port Saeed')),
+    ('Damietta', 'EG-DT', ('Dumyat', 'Domyat')),
+    ('Sharkia', 'EG-SHR', ('Sharqia', 'Sharqiya', 'Sharkiya', 'Ash Sharqiyah')),
+    ('South Sinai', 'EG-JS', ('Janub Sina',)),
+    ('Kafr El Sheikh', 'EG-KFS', ('Kafr el-Sheikh', 'Kafr Elsheikh', 'Kafr ash Shaykh')),
+    ('Matrouh', 'EG-MT', ('Matruh', 'Marsa Matrouh')),
+    ('Luxor', 'EG-LX', ('Al Uqsur', 'Louxor')),
+    ('Qena', 'EG-KN', ('Qina', 'Kena')),
+    ('North Sinai', 'EG-SIN', ('Shamal Sina',)),
+    ('Sohag', 'EG-SHG', ('Suhag', 'Sohaj')),
+]
+
+# Egyptian governorates list
+egyptian_governorates = [name for name, _, _ in GOVERNORATES]
+
 # Allowed file extensions for upload
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg'}
 
@@ -19,7 +55,7 @@ def admin_required(f):
     def decorated_function(*args, **kwargs):
         if not current_user.is_admin():
             flash('This action requires administrator privileges', 'danger')
-            return redirect(url_for('dashboard'))
+            return redirect(url_for('events.dashboard'))
         return f(*args, **kwargs)
     return decorated_function
     
@@ -29,46 +65,48 @@ def not_medical_rep(f):
     def decorated_function(*args, **kwargs):
         if current_user.is_medical_rep():
             flash('Medical representatives do not have access to this feature', 'danger')
-            return redirect(url_for('dashboard'))
+            return redirect(url_for('events.dashboard'))
         return f(*args, **kwargs)
     return decorated_function
 
 def export_events_to_csv(events):
-    """Export events to a CSV file"""
+    """Export events to a CSV file.
+
+    Reads each event's venue, type, categories and creator; load the events
+    with selectinload() on those relationships to avoid a query per row.
+    """
     output = io.StringIO()
     fieldnames = [
-        'id', 'name', 'requester_name', 'is_online', 'start_datetime', 
+        'id', 'name', 'is_online', 'start_datetime', 
         'end_datetime', 'registration_deadline', 'governorate', 'venue', 
-        'service_request', 'employee_code', 'event_type', 'description', 
+        'event_type', 'description', 
         'created_at', 'created_by', 'approval_status', 'categories'
     ]
     
     writer = csv.DictWriter(output, fieldnames=fieldnames)
     writer.writeheader()
     
+    def format_datetime(value):
+        return value.strftime('%Y-%m-%d %H:%M') if value else ''
+    
     for event in events:
-        venue_name = event.venue_details.name if event.venue_details else None
-        service_request_name = event.service_request.name if event.service_request else None
-        employee_code = event.employee.code if event.employee else None
+        venue_name = event.venue.name if event.venue else None
         event_type = event.event_type.name if event.event_type else None
         categories = ", ".join([c.name for c in event.categories]) if event.categories else ""
         
         writer.writerow({
             'id': event.id,
             'name': event.name,
-            'requester_name': event.requester_name,
             'is_online': "Yes" if event.is_online else "No",
-            'start_datetime': event.start_datetime.strftime('%Y-%m-%d %H:%M'),
-            'end_datetime': event.end_datetime.strftime('%Y-%m-%d %H:%M'),
-            'registration_deadline': event.registration_deadline.strftime('%Y-%m-%d %H:%M'),
+            'start_datetime': format_datetime(event.start_datetime),
+            'end_datetime': format_datetime(event.end_datetime),
+            'registration_deadline': format_datetime(event.registration_deadline),
             'governorate': event.governorate,
             'venue': venue_name,
-            'service_request': service_request_name,
-            'employee_code': employee_code,
             'event_type': event_type,
             'description': event.description,
-            'created_at': event.created_at.strftime('%Y-%m-%d %H:%M'),
-            'created_by': event.creator.email,
+            'created_at': format_datetime(event.created_at),
+            'created_by': event.creator.email if event.creator else '',
             'approval_status': event.status,
             'categories': categories
         })
@@ -81,14 +119,7 @@ def export_events_to_csv(events):
 
 def get_governorates():
     """Return list of governorates in Egypt"""
-    return [
-        'Alexandria', 'Aswan', 'Asyut', 'Beheira', 'Beni Suef', 
-        'Cairo', 'Dakahlia', 'Damietta', 'Faiyum', 'Gharbia', 
-        'Giza', 'Ismailia', 'Kafr El Sheikh', 'Luxor', 'Matruh', 
-        'Minya', 'Monufia', 'New Valley', 'North Sinai', 'Port Said', 
-        'Qalyubia', 'Qena', 'Red Sea', 'Sharqia', 'Sohag', 
-        'South Sinai', 'Suez'
-    ]
+    return sorted(egyptian_governorates)
 
 def validate_email(email):
     """Validate email format"""
@@ -0,0 +1,76 @@
+"""
+HTTP conditional GET support (ETag / Last-Modified)
+
+Views decorated with @conditional compute cheap validators from change stamps
+before doing any real work; when the client's If-None-Match/If-Modified-Since
+still match, a 304 is returned without querying or rendering anything else.
+"""
+
+import hashlib
+from datetime import timezone
+from functools import wraps
+from flask import current_app, make_response, request, session
+
+def make_etag(*parts):
+    """Build an ETag value from arbitrary parts"""
+    return hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()
+
+def _as_utc(value):
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.replace(microsecond=0)
+
+# Content-Encodings a body may be served with; each gets its own ETag
+ENCODINGS = ('gzip', 'br')
+
+def _is_fresh(etag, last_modified):
+    if request.if_none_match:
+        return any(request.if_none_match.contains(candidate)
+                   for candidate in (etag,) + tuple(f'{etag}-{encoding}' for encoding in ENCODINGS))
+    if request.if_modified_since and last_modified:
+        return last_modified <= request.if_modified_since
+    return False
+
+def conditional(validators):
+    """Decorator adding ETag/Last-Modified handling to a GET view.
+
+    ``validators(**view_args)`` returns ``(etag_parts, last_modified)`` or None
+    to skip conditional handling for this request.
+    """
+    def decorator(view):
+        @wraps(view)
+        def decorated_function(*args, **kwargs):
+            # Pending flash messages are part of the page, never serve a 304 over them
+            if request.method != 'GET' or session.get('_flashes'):
+                return view(*args, **kwargs)
+            try:
+                result = validators(**kwargs)
+            except Exception as e:
+                current_app.logger.error(f'Error computing validators for {request.path}: {str(e)}')
+                result = None
+            if result is None:
+                return view(*args, **kwargs)
+            
+            etag_parts, last_modified = result
+            etag = make_etag(request.path, request.query_string, *etag_parts)
+            last_modified = _as_utc(last_modified)
+            
+            if _is_fresh(etag, last_modified):
+                response = make_response('', 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            # A compressed body is a different representation, so it needs its own ETag
+            encoding = response.headers.get('Content-Encoding')
+            response.set_etag(f'{etag}-{encoding}' if encoding else etag)
+            if last_modified:
+                response.last_modified = last_modified
+            # Per-user content: browsers may keep it but must revalidate
+            response.headers['Cache-Control'] = 'private, no-cache'
+            response.vary.add('Cookie')
+            return response
+        return decorated_function
+    return decorator
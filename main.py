@@ -3,7 +3,8 @@
 Main entry point for PharmaEvents Application
 """
 
-from app import app
+from app import app, init_db_if_needed
 
 if __name__ == "__main__":
-    app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    init_db_if_needed()
+    app.run(host='0.0.0.0', port=5000, debug=True)
@@ -0,0 +1,177 @@
+"""
+Worker memory instrumentation
+
+Every request records how much the worker's resident set (RSS) grew while it
+ran, per endpoint. A sample of requests (MEMORY_SAMPLE_RATE) also runs with
+tracemalloc on, giving the request's peak Python allocation and the source
+lines whose allocations were still alive when it finished: the usual
+suspects when RSS keeps climbing. Sampling is one request at a time per
+worker; in threaded workers its figures include whatever other threads
+allocated meanwhile.
+
+Each worker publishes its figures to MEMORY_STATS_DIR every
+MEMORY_STATS_INTERVAL seconds, so the admin endpoint (GET /api/memory) can
+show all workers on the host whichever one answers. An empty
+MEMORY_STATS_DIR turns the instrumentation off.
+
+Recycling workers whose RSS crosses a threshold is done by gunicorn.conf.py
+(GUNICORN_MAX_RSS_MB) with current_rss().
+"""
+
+import json
+import os
+import random
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from flask import current_app, g, request
+
+MB = 1024 * 1024
+# Endpoints and allocation sites kept per worker
+TOP_ROUTES = 30
+TOP_SITES = 30
+
+try:
+    _PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = None
+
+def current_rss():
+    """Resident set size of this process in bytes, or None where /proc isn't available"""
+    if _PAGE_SIZE is None:
+        return None
+    try:
+        with open('/proc/self/statm', 'rb') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return None
+
+class MemoryStats:
+    """Per-worker memory figures by endpoint and allocation site"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._trace_lock = threading.Lock()
+        self.routes = {}  # endpoint -> [requests, RSS growth, largest growth, samples, largest peak]
+        self.sites = Counter()  # 'file:line' -> bytes still allocated after sampled requests
+        self.requests = 0
+        self._published_at = 0.0
+
+    def record(self, endpoint, growth, peak=None, sites=()):
+        with self._lock:
+            self.requests += 1
+            figures = self.routes.setdefault(endpoint, [0, 0, 0, 0, 0])
+            figures[0] += 1
+            figures[1] += growth
+            figures[2] = max(figures[2], growth)
+            if peak is not None:
+                figures[3] += 1
+                figures[4] = max(figures[4], peak)
+            for site, size in sites:
+                self.sites[site] += size
+            if len(self.sites) > TOP_SITES * 10:
+                self.sites = Counter(dict(self.sites.most_common(TOP_SITES * 5)))
+
+    def summary(self):
+        with self._lock:
+            routes = sorted(self.routes.items(), key=lambda item: -item[1][1])[:TOP_ROUTES]
+            return {
+                'pid': os.getpid(),
+                'rss_mb': round((current_rss() or 0) / MB, 1),
+                'requests': self.requests,
+                'updated_at': datetime.now().isoformat(timespec='seconds'),
+                'routes': [{
+                    'endpoint': endpoint,
+                    'requests': count,
+                    'rss_growth_mb': round(growth / MB, 2),
+                    'largest_growth_mb': round(largest / MB, 2),
+                    'sampled': samples,
+                    'largest_peak_mb': round(peak / MB, 2),
+                } for endpoint, (count, growth, largest, samples, peak) in routes],
+                'sites': [{'site': site, 'retained_mb': round(size / MB, 3)}
+                          for site, size in self.sites.most_common(TOP_SITES)],
+            }
+
+    def publish(self, directory, interval=0):
+        """Write this worker's summary to ``directory`` if ``interval`` seconds have passed"""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._published_at < interval:
+                return
+            self._published_at = now
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'{os.getpid()}.json')
+        temp_path = f'{path}.{threading.get_ident()}.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(self.summary(), f)
+        os.replace(temp_path, path)
+
+memory_stats = MemoryStats()
+
+def worker_summaries(directory, max_age):
+    """Published summaries of the workers on this host; files older than ``max_age`` seconds are removed"""
+    if not directory or not os.path.isdir(directory):
+        return []
+    summaries = []
+    for name in os.listdir(directory):
+        if not name.endswith('.json'):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            if time.time() - os.path.getmtime(path) > max_age:
+                # A worker that exited (e.g. recycled)
+                os.remove(path)
+                continue
+            with open(path) as f:
+                summaries.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return sorted(summaries, key=lambda summary: -summary['rss_mb'])
+
+def _start_request():
+    g._rss_before = current_rss()
+    rate = current_app.config['MEMORY_SAMPLE_RATE']
+    if rate and random.random() < rate and not tracemalloc.is_tracing() \
+            and memory_stats._trace_lock.acquire(blocking=False):
+        g._memory_traced = True
+        tracemalloc.start(current_app.config['MEMORY_TRACE_FRAMES'])
+
+def _finish_request(exc=None):
+    before = g.pop('_rss_before', None)
+    if before is None:
+        return
+    peak = None
+    sites = ()
+    if g.pop('_memory_traced', False):
+        try:
+            peak = tracemalloc.get_traced_memory()[1]
+            snapshot = tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, __file__),
+            ))
+            sites = [(f'{stat.traceback[0].filename}:{stat.traceback[0].lineno}', stat.size)
+                     for stat in snapshot.statistics('lineno')[:TOP_SITES]]
+        finally:
+            tracemalloc.stop()
+            memory_stats._trace_lock.release()
+    growth = max((current_rss() or before) - before, 0)
+    endpoint = request.endpoint or request.path
+    memory_stats.record(endpoint, growth, peak, sites)
+    if growth >= current_app.config['MEMORY_LOG_GROWTH_MB'] * MB:
+        current_app.logger.warning(f'{request.method} {request.path} grew worker {os.getpid()} by {growth / MB:.1f} MB')
+    try:
+        memory_stats.publish(current_app.config['MEMORY_STATS_DIR'], current_app.config['MEMORY_STATS_INTERVAL'])
+    except OSError as e:
+        current_app.logger.error(f'Error publishing memory stats: {str(e)}')
+
+def init_app(app):
+    """Record per-request memory figures"""
+    if not app.config.get('MEMORY_STATS_DIR'):
+        return
+    if current_rss() is None:
+        app.logger.info('RSS is not available on this platform; memory instrumentation is off')
+        return
+    app.before_request(_start_request)
+    app.teardown_request(_finish_request)
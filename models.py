@@ -0,0 +1,348 @@
+"""
+Database models for PharmaEvents
+"""
+
+from datetime import datetime
+from flask import current_app
+from flask_login import UserMixin
+from werkzeug.security import generate_password_hash, check_password_hash
+
+from extensions import db, login_manager
+
+# User model
+class User(UserMixin, db.Model):
+    __tablename__ = 'users'
+    id = db.Column(db.Integer, primary_key=True)
+    email = db.Column(db.String(120), unique=True, nullable=False)
+    password_hash = db.Column(db.String(256), nullable=False)
+    role = db.Column(db.String(20), default='user')
+    
+    # Role filter + email order/prefix search on the settings user list
+    # (email alone is covered by its unique index)
+    __table_args__ = (
+        db.Index('ix_users_role_email', 'role', 'email'),
+    )
+    
+    def set_password(self, password):
+        self.password_hash = generate_password_hash(password)
+        
+    def check_password(self, password):
+        return check_password_hash(self.password_hash, password)
+    
+    def is_admin(self):
+        return self.role == 'admin'
+    
+    def is_event_manager(self):
+        return self.role == 'event_manager'
+    
+    def is_medical_rep(self):
+        return self.role == 'medical_rep'
+    
+    def can_approve_events(self):
+        return self.role in ['admin', 'event_manager']
+
+# App Settings model for persistent configuration
+class AppSetting(db.Model):
+    __tablename__ = 'app_settings'
+    id = db.Column(db.Integer, primary_key=True)
+    key = db.Column(db.String(100), unique=True, nullable=False)
+    value = db.Column(db.Text, nullable=True)
+    
+    @classmethod
+    def get_setting(cls, key, default=None):
+        try:
+            setting = cls.query.filter_by(key=key).first()
+            return setting.value if setting else default
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f'Error getting setting {key}: {str(e)}')
+            return default
+    
+    @classmethod
+    def set_setting(cls, key, value):
+        try:
+            setting = cls.query.filter_by(key=key).first()
+            previous = setting.value if setting else None
+            if setting:
+                setting.value = value
+            else:
+                setting = cls(key=key, value=value)
+                db.session.add(setting)
+            db.session.commit()
+            if previous != value:
+                # Imported here: audit.py imports this module
+                import audit
+                audit.record('setting.update', 'setting', key, {'old': previous, 'new': value})
+            return setting
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f'Error setting {key}: {str(e)}')
+            return None
+
+# Event Category model
+class EventCategory(db.Model):
+    __tablename__ = 'event_category'
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), unique=True, nullable=False)
+    description = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+# Event Type model
+class EventType(db.Model):
+    __tablename__ = 'event_type'
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), unique=True, nullable=False)
+    description = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+# Governorate reference data (see governorates.py). Events keep the canonical
+# name in Event.governorate for display and reference the row by id for grouping.
+class Governorate(db.Model):
+    __tablename__ = 'governorate'
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), unique=True, nullable=False)
+    code = db.Column(db.String(10), unique=True)  # ISO 3166-2, e.g. EG-C
+
+# Other spellings of a governorate, by governorates.governorate_key()
+class GovernorateAlias(db.Model):
+    __tablename__ = 'governorate_alias'
+    alias_key = db.Column(db.String(100), primary_key=True)
+    governorate_id = db.Column(db.Integer, db.ForeignKey('governorate.id'), nullable=False)
+
+# Venue model. search_name is the lowercased, whitespace-normalised name used
+# for lookups and prefix search (see venues.py); a name is unique per governorate.
+class Venue(db.Model):
+    __tablename__ = 'venue'
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(200), nullable=False)
+    search_name = db.Column(db.String(200), nullable=False)
+    governorate = db.Column(db.String(100))
+    address = db.Column(db.String(300))
+    capacity = db.Column(db.Integer)  # Seats; None if unknown
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('ix_venue_search_name', 'search_name'),
+        db.Index('ix_venue_governorate_search_name', 'governorate', 'search_name', unique=True),
+    )
+
+# Association table for many-to-many relationship between events and categories
+event_categories = db.Table('event_categories',
+    db.Column('event_id', db.Integer, db.ForeignKey('event.id'), primary_key=True),
+    db.Column('category_id', db.Integer, db.ForeignKey('event_category.id'), primary_key=True)
+)
+
+# Event model
+class Event(db.Model):
+    __tablename__ = 'event'
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(200), nullable=False)
+    description = db.Column(db.Text)
+    event_type_id = db.Column(db.Integer, db.ForeignKey('event_type.id'))
+    is_online = db.Column(db.Boolean, default=False)
+    start_datetime = db.Column(db.DateTime, nullable=False)
+    end_datetime = db.Column(db.DateTime)
+    registration_deadline = db.Column(db.DateTime)
+    venue_id = db.Column(db.Integer, db.ForeignKey('venue.id'), nullable=True)
+
+    governorate = db.Column(db.String(100))
+    governorate_id = db.Column(db.Integer, db.ForeignKey('governorate.id'), nullable=True)
+    image_file = db.Column(db.String(200), nullable=True)  # For storing event image filename
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    status = db.Column(db.String(20), default='pending')  # pending, active, declined
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Relationships
+    event_type = db.relationship('EventType', backref='events')
+    creator = db.relationship('User', backref='created_events')
+    categories = db.relationship('EventCategory', secondary=event_categories, backref='events')
+    venue = db.relationship('Venue', backref='events')
+    
+    # Range scans for the calendar API and venue utilisation; reps are always filtered by user_id
+    __table_args__ = (
+        db.Index('ix_event_start_datetime', 'start_datetime'),
+        db.Index('ix_event_end_datetime', 'end_datetime'),
+        db.Index('ix_event_user_id_start_datetime', 'user_id', 'start_datetime'),
+        db.Index('ix_event_venue_id_start_datetime', 'venue_id', 'start_datetime'),
+        db.Index('ix_event_governorate_id_start_datetime', 'governorate_id', 'start_datetime'),
+        # Archived events keep their id, so SQLite must never hand it out again
+        {'sqlite_autoincrement': True},
+    )
+
+# Cold storage for past events, moved out of the hot event table by
+# archival.py. Mirrors Event's columns without foreign keys. On PostgreSQL the
+# table is range-partitioned by start_datetime (one partition per year), which
+# is why start_datetime is part of the primary key.
+archived_event_categories = db.Table('event_archive_categories',
+    db.Column('event_id', db.Integer, primary_key=True),
+    db.Column('category_id', db.Integer, primary_key=True)
+)
+
+class ArchivedEvent(db.Model):
+    __tablename__ = 'event_archive'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    start_datetime = db.Column(db.DateTime, primary_key=True)
+    name = db.Column(db.String(200), nullable=False)
+    description = db.Column(db.Text)
+    event_type_id = db.Column(db.Integer)
+    is_online = db.Column(db.Boolean, default=False)
+    end_datetime = db.Column(db.DateTime)
+    registration_deadline = db.Column(db.DateTime)
+    venue_id = db.Column(db.Integer, nullable=True)
+    governorate = db.Column(db.String(100))
+    governorate_id = db.Column(db.Integer, nullable=True)
+    image_file = db.Column(db.String(200), nullable=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    status = db.Column(db.String(20))
+    created_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Read-only relationships, so templates can render archived events like live ones
+    event_type = db.relationship('EventType', primaryjoin='foreign(ArchivedEvent.event_type_id) == EventType.id', viewonly=True)
+    creator = db.relationship('User', primaryjoin='foreign(ArchivedEvent.user_id) == User.id', viewonly=True)
+    venue = db.relationship('Venue', primaryjoin='foreign(ArchivedEvent.venue_id) == Venue.id', viewonly=True)
+    categories = db.relationship(
+        'EventCategory', secondary=archived_event_categories, viewonly=True,
+        primaryjoin='ArchivedEvent.id == foreign(event_archive_categories.c.event_id)',
+        secondaryjoin='EventCategory.id == foreign(event_archive_categories.c.category_id)'
+    )
+    
+    __table_args__ = (
+        db.Index('ix_event_archive_id', 'id'),
+        db.Index('ix_event_archive_user_id_start_datetime', 'user_id', 'start_datetime'),
+        {'postgresql_partition_by': 'RANGE (start_datetime)'},
+    )
+
+@login_manager.user_loader
+def load_user(user_id):
+    try:
+        return db.session.get(User, int(user_id))
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f'Error loading user {user_id}: {str(e)}')
+        return None
+
+def recover_db_session():
+    """Recover from database transaction errors"""
+    try:
+        db.session.rollback()
+        db.session.close()
+    except Exception:
+        pass
+
+# Per-table change stamp, bumped in the same transaction as every write to a
+# tracked table (see change_tracking.py). Lets requests check "has anything
+# changed?" with one primary-key lookup.
+class TableStamp(db.Model):
+    __tablename__ = 'table_stamps'
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    changed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+# Append-only log of event changes, read incrementally via /api/events/changes.
+# The id doubles as the sync cursor.
+class EventChange(db.Model):
+    __tablename__ = 'event_changes'
+    id = db.Column(db.Integer, primary_key=True)
+    event_id = db.Column(db.Integer, nullable=False)  # No FK: rows outlive deleted events
+    owner_id = db.Column(db.Integer, nullable=True)  # Event creator, for role scoping
+    actor_id = db.Column(db.Integer, nullable=True)  # User who made the change
+    operation = db.Column(db.String(20), nullable=False)  # create, update, status, delete, archive
+    data = db.Column(db.JSON, nullable=True)  # Event snapshot after the change (last state for delete/archive)
+    changed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('ix_event_changes_owner_id_id', 'owner_id', 'id'),
+    )
+
+# Background spreadsheet import (see event_import.py). Rows before next_row are
+# done; each batch commits its events together with the new next_row, so an
+# interrupted job resumes without duplicating events.
+class ImportJob(db.Model):
+    __tablename__ = 'import_jobs'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    filename = db.Column(db.String(255), nullable=False)  # Name of the uploaded file
+    stored_path = db.Column(db.String(500), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, completed, failed
+    total_rows = db.Column(db.Integer, nullable=True)
+    next_row = db.Column(db.Integer, nullable=False, default=0)
+    created_count = db.Column(db.Integer, nullable=False, default=0)
+    error_count = db.Column(db.Integer, nullable=False, default=0)
+    message = db.Column(db.Text, nullable=True)  # Why the job failed
+    heartbeat_at = db.Column(db.DateTime, nullable=True)  # Last progress; stale means the worker died
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    
+    user = db.relationship('User')
+
+# Per-row validation errors of an import job, downloadable as a report
+class ImportRowError(db.Model):
+    __tablename__ = 'import_row_errors'
+    id = db.Column(db.Integer, primary_key=True)
+    job_id = db.Column(db.Integer, db.ForeignKey('import_jobs.id'), nullable=False, index=True)
+    row_number = db.Column(db.Integer, nullable=False)  # Spreadsheet row, header is row 1
+    message = db.Column(db.Text, nullable=False)
+
+# A file being received in chunks (see uploads.py)
+class ChunkedUpload(db.Model):
+    __tablename__ = 'chunked_uploads'
+    id = db.Column(db.String(32), primary_key=True)  # Random hex, used in URLs
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    purpose = db.Column(db.String(20), nullable=False)  # attendees, users, events
+    filename = db.Column(db.String(255), nullable=False)
+    length = db.Column(db.BigInteger, nullable=False)  # Declared size in bytes
+    received = db.Column(db.BigInteger, nullable=False, default=0)  # Bytes stored so far (the upload offset)
+    checksum = db.Column(db.String(64), nullable=True)  # Expected SHA-256 of the whole file, hex
+    status = db.Column(db.String(20), nullable=False, default='uploading')  # uploading, complete
+    stored_path = db.Column(db.String(500), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+# Email waiting to be sent (see notifications.py). Rows are written in the
+# transaction that changes the event, so a notification exists exactly when
+# the change was committed.
+class OutboxMessage(db.Model):
+    __tablename__ = 'notification_outbox'
+    id = db.Column(db.Integer, primary_key=True)
+    recipient = db.Column(db.String(120), nullable=False)  # Email address
+    kind = db.Column(db.String(30), nullable=False)  # event_pending, event_approved, event_declined
+    event_id = db.Column(db.Integer, nullable=False)  # No FK: the event may be deleted or archived
+    data = db.Column(db.JSON, nullable=True)  # Event name, start and who made the change
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, sent, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    claim = db.Column(db.String(32), nullable=True)  # Dispatcher run holding the row
+    locked_until = db.Column(db.DateTime, nullable=True)  # Claim expiry, in case that dispatcher dies
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime, nullable=True)
+    
+    __table_args__ = (
+        db.Index('ix_notification_outbox_status_next_attempt_at', 'status', 'next_attempt_at'),
+    )
+
+# Audit trail of admin actions (see audit.py). Written in batches by a
+# background thread, so created_at (when the action happened) rather than
+# id gives the order. Actor and target are plain values: users and events
+# are deleted while their audit records must stay.
+class AuditLog(db.Model):
+    __tablename__ = 'audit_log'
+    id = db.Column(db.Integer, primary_key=True)
+    created_at = db.Column(db.DateTime, nullable=False)
+    actor_id = db.Column(db.Integer, nullable=True)  # None for system changes (CLI, startup)
+    actor_email = db.Column(db.String(120), nullable=True)
+    action = db.Column(db.String(50), nullable=False)  # e.g. user.create, user.delete, event.delete, setting.update
+    target_type = db.Column(db.String(30), nullable=True)  # user, event, setting
+    target_id = db.Column(db.String(100), nullable=True)  # Id, or the key for settings
+    details = db.Column(db.JSON, nullable=True)
+    ip_address = db.Column(db.String(45), nullable=True)
+    
+    # Queries by actor, by target and by time range, each newest first
+    __table_args__ = (
+        db.Index('ix_audit_log_created_at', 'created_at'),
+        db.Index('ix_audit_log_actor_id_created_at', 'actor_id', 'created_at'),
+        db.Index('ix_audit_log_target_created_at', 'target_type', 'target_id', 'created_at'),
+    )
@@ -0,0 +1,276 @@
+"""
+Event lifecycle emails through a transactional outbox
+
+The routes that change events queue messages in notification_outbox in the
+same transaction as the change:
+
+- an event waiting for approval -> every admin and event manager
+- an event approved or declined -> its requester
+
+Nobody is told about their own action. A dispatcher thread in each worker
+(started by its first request) polls the outbox every
+NOTIFY_INTERVAL seconds. It claims due messages with a lease, so workers
+never send the same row twice, and sends one email per recipient per run
+listing all of their updates. A failed send is retried with exponential
+backoff up to NOTIFY_MAX_ATTEMPTS. Requests never wait for SMTP.
+
+Mail goes to MAIL_SERVER; without one nothing is queued. For local testing
+run a debugging SMTP server, e.g. ``python -m aiosmtpd -n -l localhost:1025``
+with MAIL_SERVER=localhost and MAIL_PORT=1025. ``flask send-notifications``
+runs one dispatch pass from the command line.
+"""
+
+import smtplib
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import and_, insert, or_, select, update
+
+from extensions import db
+from models import AppSetting, OutboxMessage, User
+
+APPROVER_ROLES = ('admin', 'event_manager')
+STATUS_KINDS = {'active': 'event_approved', 'declined': 'event_declined'}
+# Updates listed in one email (a big import can queue thousands)
+EMAIL_MAX_ITEMS = 50
+KIND_LABELS = {
+    'event_pending': 'awaiting your approval',
+    'event_approved': 'approved',
+    'event_declined': 'declined',
+}
+
+def enabled(app=None):
+    return bool((app or current_app).config.get('MAIL_SERVER'))
+
+def _message_data(event, actor_email):
+    return {
+        'name': event.name,
+        'start': event.start_datetime.isoformat() if event.start_datetime else None,
+        'actor': actor_email,
+    }
+
+def _queue(rows):
+    if not rows:
+        return
+    db.session.execute(insert(OutboxMessage), rows)
+
+def _actor_email(actor_id):
+    return db.session.query(User.email).filter(User.id == actor_id).scalar() if actor_id else None
+
+def queue_pending_notifications(events, actor_id=None):
+    """Tell approvers about ``events`` that are waiting for approval"""
+    pending = [event for event in events if event.status == 'pending']
+    if not pending or not enabled():
+        return
+    approvers = db.session.query(User.id, User.email).filter(User.role.in_(APPROVER_ROLES)).all()
+    actor_email = _actor_email(actor_id)
+    _queue([{
+        'recipient': email,
+        'kind': 'event_pending',
+        'event_id': event.id,
+        'data': _message_data(event, actor_email),
+    } for event in pending for user_id, email in approvers if user_id != actor_id])
+
+def queue_status_notifications(events, actor_id=None):
+    """Tell requesters that their ``events`` were approved or declined"""
+    changed = [event for event in events if event.status in STATUS_KINDS and event.user_id != actor_id]
+    if not changed or not enabled():
+        return
+    owners = dict(db.session.query(User.id, User.email).filter(User.id.in_({event.user_id for event in changed})))
+    actor_email = _actor_email(actor_id)
+    _queue([{
+        'recipient': owners[event.user_id],
+        'kind': STATUS_KINDS[event.status],
+        'event_id': event.id,
+        'data': _message_data(event, actor_email),
+    } for event in changed if event.user_id in owners])
+
+def _claimable(now):
+    return and_(OutboxMessage.status == 'pending', OutboxMessage.next_attempt_at <= now,
+                or_(OutboxMessage.locked_until.is_(None), OutboxMessage.locked_until < now))
+
+def claim_batch(batch_size, lease_seconds):
+    """Claim up to ``batch_size`` due messages for this run; returns them"""
+    now = datetime.utcnow()
+    claim = uuid.uuid4().hex
+    due = select(OutboxMessage.id).where(_claimable(now)).order_by(OutboxMessage.id).limit(batch_size)
+    # The claimable condition is checked again by the UPDATE, so a row another
+    # worker claimed meanwhile is left alone
+    db.session.execute(
+        update(OutboxMessage)
+        .where(OutboxMessage.id.in_(due.scalar_subquery()), _claimable(now))
+        .values(claim=claim, locked_until=now + timedelta(seconds=lease_seconds))
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return OutboxMessage.query.filter(OutboxMessage.claim == claim).order_by(OutboxMessage.id).all()
+
+def coalesce(messages):
+    """{recipient: [message]}, keeping only the latest message per event and
+    kind; an approval and a decline of the same event count as one kind"""
+    by_recipient = {}
+    for message in messages:
+        latest = by_recipient.setdefault(message.recipient, {})
+        kind = 'status' if message.kind in STATUS_KINDS.values() else message.kind
+        latest[(message.event_id, kind)] = message
+    return {recipient: sorted(latest.values(), key=lambda message: message.id)
+            for recipient, latest in by_recipient.items()}
+
+def build_email(recipient, messages, app_name, sender, base_url=''):
+    """One plain-text email covering all of ``messages`` for ``recipient``"""
+    email = EmailMessage()
+    email['From'] = sender
+    email['To'] = recipient
+    if len(messages) == 1:
+        message = messages[0]
+        email['Subject'] = f'{app_name}: "{message.data.get("name")}" {KIND_LABELS[message.kind]}'
+    else:
+        email['Subject'] = f'{app_name}: {len(messages)} event updates'
+    lines = []
+    for message in messages[:EMAIL_MAX_ITEMS]:
+        data = message.data or {}
+        line = f'- "{data.get("name")}" is {KIND_LABELS[message.kind]}'
+        if data.get('start'):
+            line += f' (starts {data["start"].replace("T", " ")[:16]})'
+        if data.get('actor'):
+            line += f', by {data["actor"]}'
+        lines.append(line)
+        if base_url:
+            lines.append(f'  {base_url.rstrip("/")}/event_details/{message.event_id}')
+    if len(messages) > EMAIL_MAX_ITEMS:
+        lines.append(f'... and {len(messages) - EMAIL_MAX_ITEMS} more')
+    email.set_content('\n'.join(lines) + '\n')
+    return email
+
+def _backoff(app, attempts):
+    return timedelta(seconds=min(app.config['NOTIFY_RETRY_BASE_SECONDS'] * 2 ** (attempts - 1), 3600))
+
+def _smtp_connection(app):
+    config = app.config
+    connection = smtplib.SMTP(config['MAIL_SERVER'], config['MAIL_PORT'], timeout=config['MAIL_TIMEOUT'])
+    if config['MAIL_USE_TLS']:
+        connection.starttls()
+    if config.get('MAIL_USERNAME'):
+        connection.login(config['MAIL_USERNAME'], config['MAIL_PASSWORD'])
+    return connection
+
+def dispatch(app):
+    """Send everything that is due; returns (emails sent, messages sent, messages failed)"""
+    config = app.config
+    messages = claim_batch(config['NOTIFY_BATCH_SIZE'], config['NOTIFY_LEASE_SECONDS'])
+    if not messages:
+        return 0, 0, 0
+    app_name = AppSetting.get_setting('app_name', 'PharmaEvents')
+    emails = sent = failed = 0
+    connection = None
+    try:
+        for recipient, latest in coalesce(messages).items():
+            batch = [message for message in messages if message.recipient == recipient]
+            now = datetime.utcnow()
+            try:
+                if connection is None:
+                    connection = _smtp_connection(app)
+                connection.send_message(build_email(recipient, latest, app_name, config['MAIL_SENDER'],
+                                                    config.get('APP_BASE_URL', '')))
+            except (smtplib.SMTPException, OSError) as e:
+                app.logger.error(f'Error sending notifications to {recipient}: {str(e)}')
+                # A broken connection is reopened for the next recipient
+                if isinstance(e, (smtplib.SMTPServerDisconnected, OSError)):
+                    connection = None
+                for message in batch:
+                    message.attempts += 1
+                    message.last_error = str(e)[:1000]
+                    message.claim = None
+                    message.locked_until = None
+                    if message.attempts >= config['NOTIFY_MAX_ATTEMPTS']:
+                        message.status = 'failed'
+                        failed += 1
+                    else:
+                        message.next_attempt_at = now + _backoff(app, message.attempts)
+                db.session.commit()
+                continue
+            for message in batch:
+                message.status = 'sent'
+                message.sent_at = now
+                message.claim = None
+                message.locked_until = None
+            # Committed per recipient so a crash can't resend finished emails
+            db.session.commit()
+            emails += 1
+            sent += len(batch)
+    finally:
+        if connection is not None:
+            try:
+                connection.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+    return emails, sent, failed
+
+def purge_sent(days):
+    """Delete messages sent more than ``days`` ago"""
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    deleted = OutboxMessage.query.filter(OutboxMessage.status == 'sent', OutboxMessage.sent_at < cutoff) \
+        .delete(synchronize_session=False)
+    db.session.commit()
+    return deleted
+
+class Dispatcher:
+    """Per-worker background thread draining the outbox"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def ensure_started(self, app):
+        """Start this worker's dispatcher thread if it isn't running"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        if not enabled(app) or not app.config['NOTIFY_BACKGROUND']:
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, args=(app,), name='notification-dispatcher', daemon=True)
+            self._thread.start()
+
+    def _run(self, app):
+        purged_at = 0.0
+        while True:
+            time.sleep(app.config['NOTIFY_INTERVAL'])
+            with app.app_context():
+                try:
+                    emails, sent, failed = dispatch(app)
+                    if emails or failed:
+                        app.logger.info(f'Sent {emails} notification emails ({sent} messages, {failed} given up)')
+                    if time.monotonic() - purged_at > 3600:
+                        purge_sent(app.config['NOTIFY_KEEP_SENT_DAYS'])
+                        purged_at = time.monotonic()
+                except Exception as e:
+                    db.session.rollback()
+                    app.logger.error(f'Error dispatching notifications: {str(e)}')
+                finally:
+                    db.session.remove()
+
+dispatcher = Dispatcher()
+
+def init_app(app):
+    """Run the dispatcher in each worker that serves requests"""
+    if not enabled(app) or not app.config['NOTIFY_BACKGROUND']:
+        return
+    # Started lazily, so it runs in the forked worker rather than a preloading master
+    app.before_request(lambda: dispatcher.ensure_started(app))
+
+@click.command('send-notifications')
+@with_appcontext
+def send_notifications_command():
+    """Send the notification emails that are due (one pass)"""
+    if not enabled():
+        click.echo('MAIL_SERVER is not set; notifications are off')
+        return
+    emails, sent, failed = dispatch(current_app._get_current_object())
+    click.echo(f'Sent {emails} emails covering {sent} messages; {failed} messages failed for good')
@@ -0,0 +1,217 @@
+"""
+On-demand profiling of single requests in production
+
+An admin asks for a token (POST /api/profiles/token) and sends it with the
+request to profile, as the X-Profile-Token header or the _profile query
+parameter. That one request runs under a profiler: pyinstrument's sampling
+profiler when it is installed (PROFILER=auto), cProfile otherwise. Its SQL
+statements and their timings are captured as well. The report is written to
+PROFILE_DIR, where the admin API lists it and serves it for download; with
+several hosts, PROFILE_DIR must be shared like IMPORT_UPLOAD_DIR.
+
+Tokens are signed with SECRET_KEY and expire after PROFILE_TOKEN_MAX_AGE.
+Requests without one only pay for a header lookup: the middleware doesn't
+touch them, and the SQL listeners are only attached while a profiled request
+is running. An empty PROFILE_DIR turns the feature off entirely.
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import re
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime
+from urllib.parse import parse_qs, parse_qsl, urlencode
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+try:
+    from pyinstrument import Profiler as SamplingProfiler
+except ImportError:
+    SamplingProfiler = None
+
+TOKEN_HEADER = 'X-Profile-Token'
+TOKEN_PARAM = '_profile'
+TOKEN_SALT = 'request-profile'
+REPORT_NAME = re.compile(r'^profile_\d{8}_\d{6}_[0-9a-f]{8}\.(txt|prof)$')
+
+# Statements captured for the profiled request running in this context
+_statements = ContextVar('profiled_statements', default=None)
+_listeners_lock = threading.Lock()
+_listening = 0
+
+def _serializer(app):
+    return URLSafeTimedSerializer(app.secret_key, salt=TOKEN_SALT)
+
+def make_token(app, user):
+    """Signed token that profiles any request it is sent with until it expires"""
+    return _serializer(app).dumps({'user_id': user.id})
+
+def _verify_token(app, token):
+    try:
+        return _serializer(app).loads(token, max_age=app.config['PROFILE_TOKEN_MAX_AGE'])
+    except BadSignature:
+        return None
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _statements.get() is not None:
+        conn.info.setdefault('_profile_started', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    statements = _statements.get()
+    started = conn.info.get('_profile_started')
+    if statements is not None and started:
+        statements.append((statement, parameters, time.perf_counter() - started.pop()))
+
+def _attach_listeners():
+    global _listening
+    with _listeners_lock:
+        if _listening == 0:
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        _listening += 1
+
+def _detach_listeners():
+    global _listening
+    with _listeners_lock:
+        _listening -= 1
+        if _listening == 0:
+            event.remove(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.remove(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+def _use_sampling(app):
+    choice = app.config['PROFILER']
+    if choice == 'sampling' and SamplingProfiler is None:
+        app.logger.warning('PROFILER=sampling but pyinstrument is not installed; using cProfile')
+    return SamplingProfiler is not None and choice in ('auto', 'sampling')
+
+def _sql_section(statements):
+    total = sum(seconds for _, _, seconds in statements)
+    lines = [f'SQL: {len(statements)} statements, {total * 1000:.1f} ms', '']
+    for number, (statement, parameters, seconds) in enumerate(statements, start=1):
+        parameters = repr(parameters)
+        if len(parameters) > 500:
+            parameters = parameters[:500] + '...'
+        lines.append(f'[{number}] {seconds * 1000:.2f} ms')
+        lines.append(' '.join(statement.split()))
+        lines.append(f'    parameters: {parameters}')
+    return '\n'.join(lines)
+
+def prune_reports(directory, keep):
+    """Delete all but the ``keep`` newest reports"""
+    reports = sorted((name for name in os.listdir(directory) if REPORT_NAME.match(name)), reverse=True)
+    report_ids = list(dict.fromkeys(name.rsplit('.', 1)[0] for name in reports))
+    for report_id in report_ids[keep:]:
+        for suffix in ('.txt', '.prof'):
+            try:
+                os.remove(os.path.join(directory, report_id + suffix))
+            except FileNotFoundError:
+                pass
+
+def list_reports(directory):
+    """[{'name', 'size', 'created_at'}] of stored reports, newest first"""
+    if not directory or not os.path.isdir(directory):
+        return []
+    reports = []
+    for name in sorted(os.listdir(directory), reverse=True):
+        if REPORT_NAME.match(name):
+            stat = os.stat(os.path.join(directory, name))
+            reports.append({'name': name, 'size': stat.st_size,
+                            'created_at': datetime.fromtimestamp(stat.st_mtime).isoformat()})
+    return reports
+
+class ProfilingMiddleware:
+    """WSGI middleware running requests that carry a valid token under a profiler"""
+
+    def __init__(self, app, wsgi_app):
+        self.app = app
+        self.wsgi_app = wsgi_app
+
+    def __call__(self, environ, start_response):
+        token = environ.get('HTTP_X_PROFILE_TOKEN')
+        if token is None and TOKEN_PARAM in environ.get('QUERY_STRING', ''):
+            token = parse_qs(environ['QUERY_STRING']).get(TOKEN_PARAM, [None])[0]
+        if token is None:
+            return self.wsgi_app(environ, start_response)
+        claims = _verify_token(self.app, token)
+        if claims is None:
+            self.app.logger.warning(f'Ignoring invalid or expired profiling token for {environ.get("PATH_INFO")}')
+            return self.wsgi_app(environ, start_response)
+        return self._profile(environ, start_response, claims)
+
+    def _profile(self, environ, start_response, claims):
+        status = []
+
+        def recording_start_response(response_status, headers, exc_info=None):
+            status.append(response_status)
+            return start_response(response_status, headers, exc_info)
+
+        sampling = _use_sampling(self.app)
+        profiler = SamplingProfiler() if sampling else cProfile.Profile()
+        statements = []
+        reset = _statements.set(statements)
+        _attach_listeners()
+        started = time.perf_counter()
+        try:
+            if sampling:
+                profiler.start()
+            else:
+                profiler.enable()
+            try:
+                # Flask builds the whole body here, except for streamed responses
+                body = self.wsgi_app(environ, recording_start_response)
+            finally:
+                if sampling:
+                    profiler.stop()
+                else:
+                    profiler.disable()
+        finally:
+            elapsed = time.perf_counter() - started
+            _detach_listeners()
+            _statements.reset(reset)
+        try:
+            self._save(environ, status[0] if status else '-', elapsed, claims, profiler, sampling, statements)
+        except Exception as e:
+            self.app.logger.error(f'Error saving profile report: {str(e)}')
+        return body
+
+    def _save(self, environ, status, elapsed, claims, profiler, sampling, statements):
+        directory = self.app.config['PROFILE_DIR']
+        os.makedirs(directory, exist_ok=True)
+        report_id = f'profile_{datetime.now().strftime("%Y%m%d_%H%M%S")}_{uuid.uuid4().hex[:8]}'
+        # The token stays out of the report
+        query = urlencode([(key, value) for key, value in parse_qsl(environ.get('QUERY_STRING', ''), keep_blank_values=True)
+                           if key != TOKEN_PARAM])
+        path = environ.get('PATH_INFO', '') + (f'?{query}' if query else '')
+        header = '\n'.join([
+            f'{environ.get("REQUEST_METHOD")} {path}',
+            f'Status: {status}',
+            f'Wall time: {elapsed * 1000:.1f} ms',
+            f'Profiler: {"pyinstrument (sampling)" if sampling else "cProfile"}',
+            f'Requested by user {claims.get("user_id")} at {datetime.now().isoformat(timespec="seconds")}',
+        ])
+
+        if sampling:
+            profile_text = profiler.output_text(unicode=False, color=False)
+        else:
+            stream = io.StringIO()
+            pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(60)
+            profile_text = stream.getvalue()
+            # Raw stats for snakeviz / pstats
+            profiler.dump_stats(os.path.join(directory, f'{report_id}.prof'))
+
+        with open(os.path.join(directory, f'{report_id}.txt'), 'w', encoding='utf-8') as f:
+            f.write('\n\n'.join([header, _sql_section(statements), profile_text]))
+        prune_reports(directory, self.app.config['PROFILE_MAX_REPORTS'])
+        self.app.logger.info(f'Saved profile report {report_id} for {path}')
+
+def init_app(app):
+    """Wrap the WSGI app so requests carrying a profiling token are profiled"""
+    if not app.config.get('PROFILE_DIR'):
+        return
+    app.wsgi_app = ProfilingMiddleware(app, app.wsgi_app)
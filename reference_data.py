@@ -0,0 +1,90 @@
+"""
+Per-worker cache of reference data: event categories, event types and
+governorates (with their aliases, see governorates.py)
+
+Pages and exports read id -> name maps and name-sorted option lists from
+memory instead of querying both tables on every request. The cache is keyed
+by the tables' change stamps (see change_tracking.py), checked once per
+request, so a category or type added through any worker is picked up by
+every worker on its next request.
+"""
+
+import threading
+from collections import namedtuple
+from flask import g
+
+from change_tracking import get_stamps
+from extensions import db
+from governorates import governorate_key
+from models import EventCategory, EventType, Governorate, GovernorateAlias
+
+REFERENCE_TABLES = ('event_category', 'event_type', 'governorate', 'governorate_alias')
+
+# Drop-in for the model in templates, which only use .id and .name
+Option = namedtuple('Option', 'id name')
+GovernorateOption = namedtuple('GovernorateOption', 'id name code')
+
+class ReferenceData:
+    """Immutable snapshot of categories, event types and governorates"""
+
+    def __init__(self, categories, event_types, governorates=(), governorate_aliases=()):
+        self.categories = categories
+        self.event_types = event_types
+        self.governorates = governorates
+        self.category_names = {option.id: option.name for option in categories}
+        self.event_type_names = {option.id: option.name for option in event_types}
+        self.category_ids = {option.name.lower(): option.id for option in categories}
+        self.event_type_ids = {option.name.lower(): option.id for option in event_types}
+        self.governorates_by_id = {option.id: option for option in governorates}
+        self.governorate_names = [option.name for option in governorates]
+        # governorate_key() of every known spelling -> governorate id
+        self.governorate_ids = dict(governorate_aliases)
+        for option in governorates:
+            self.governorate_ids.setdefault(governorate_key(option.name), option.id)
+
+    def resolve_governorate(self, name):
+        """The GovernorateOption for any known spelling of ``name``, or None"""
+        governorate_id = self.governorate_ids.get(governorate_key(name))
+        return self.governorates_by_id.get(governorate_id)
+
+class ReferenceCache:
+    def __init__(self):
+        self._data = None
+        self._versions = None
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    def get(self):
+        """Current reference data, reloaded if any of its tables changed"""
+        versions = g.get('_reference_versions')
+        if versions is None:
+            stamps = get_stamps(*REFERENCE_TABLES)
+            versions = tuple(stamps[name][0] for name in REFERENCE_TABLES)
+            g._reference_versions = versions
+        with self._lock:
+            if self._data is not None and self._versions == versions:
+                return self._data
+        data = ReferenceData(
+            [Option(*row) for row in db.session.query(EventCategory.id, EventCategory.name).order_by(EventCategory.name)],
+            [Option(*row) for row in db.session.query(EventType.id, EventType.name).order_by(EventType.name)],
+            [GovernorateOption(*row) for row in
+             db.session.query(Governorate.id, Governorate.name, Governorate.code).order_by(Governorate.name)],
+            db.session.query(GovernorateAlias.alias_key, GovernorateAlias.governorate_id).all(),
+        )
+        with self._lock:
+            self._data = data
+            self._versions = versions
+            self.loads += 1
+        return data
+
+    def invalidate(self):
+        """Drop this worker's copy (other workers notice the stamp change)"""
+        with self._lock:
+            self._data = None
+            self._versions = None
+        g.pop('_reference_versions', None)
+
+reference_cache = ReferenceCache()
+
+def get_reference_data():
+    return reference_cache.get()
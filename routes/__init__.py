@@ -0,0 +1,3 @@
+"""
+Blueprints for PharmaEvents, mounted per deployment role by create_app()
+"""
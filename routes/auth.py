@@ -0,0 +1,73 @@
+"""
+Authentication routes: login, logout and password help
+"""
+
+from flask import Blueprint, current_app, render_template, request, redirect, url_for, flash
+from flask_login import login_user, logout_user, login_required, current_user
+
+from models import User, AppSetting
+
+bp = Blueprint('auth', __name__)
+
+def _dashboard_url():
+    """Dashboard URL, even when the events blueprint is served by another process"""
+    if 'events.dashboard' in current_app.view_functions:
+        return url_for('events.dashboard')
+    return '/dashboard'
+
+@bp.route('/')
+def index():
+    return redirect(url_for('auth.login'))
+
+@bp.route('/login', methods=['GET', 'POST'])
+def login():
+    if current_user.is_authenticated:
+        return redirect(_dashboard_url())
+        
+    if request.method == 'POST':
+        email = request.form.get('email')
+        password = request.form.get('password')
+        
+        if not email or not password:
+            flash('Please enter both email and password', 'danger')
+            app_name = AppSetting.get_setting('app_name', 'PharmaEvents')
+            theme_color = AppSetting.get_setting('theme_color', '#0f6e84')
+            return render_template('login.html', app_name=app_name, theme_color=theme_color)
+        
+        user = User.query.filter_by(email=email).first()
+        if user and user.check_password(password):
+            login_user(user)
+            flash('Login successful!', 'success')
+            return redirect(_dashboard_url())
+        else:
+            flash('Invalid email or password', 'danger')
+    
+    app_name = AppSetting.get_setting('app_name', 'PharmaEvents')
+    theme_color = AppSetting.get_setting('theme_color', '#0f6e84')
+    main_tagline = AppSetting.get_setting('main_tagline')
+    main_header = AppSetting.get_setting('main_header')
+    app_description = AppSetting.get_setting('app_description')
+    feature1_title = AppSetting.get_setting('feature1_title')
+    feature1_description = AppSetting.get_setting('feature1_description')
+    feature2_title = AppSetting.get_setting('feature2_title')
+    feature2_description = AppSetting.get_setting('feature2_description')
+    return render_template('login.html', 
+                         app_name=app_name, 
+                         theme_color=theme_color,
+                         main_tagline=main_tagline,
+                         main_header=main_header,
+                         app_description=app_description,
+                         feature1_title=feature1_title,
+                         feature1_description=feature1_description,
+                         feature2_title=feature2_title,
+                         feature2_description=feature2_description)
+
+@bp.route('/logout')
+@login_required
+def logout():
+    logout_user()
+    return redirect(url_for('auth.login'))
+
+@bp.route('/forgot_password')
+def forgot_password():
+    return '<p>Password reset functionality coming soon. Please contact administrator.</p><p><a href="/login">Back to Login</a></p>'
@@ -0,0 +1,224 @@
+"""
+Dashboard JSON API consumed by static/js/dashboard.js
+
+Responses go through serialization.json_response (orjson + compression);
+role scoping comes from scoping.py.
+"""
+
+from datetime import datetime
+from flask import Blueprint, current_app, request
+from flask_login import login_required, current_user
+
+from change_tracking import stamp_validators
+from extensions import db
+from governorates import governorate_rollup
+from http_cache import conditional
+from models import User, Event, EventCategory, EventType, event_categories
+from reference_data import get_reference_data
+from scoping import count_events_by, event_totals, scoped, sees_all_events
+from serialization import json_response
+from venues import get_venue_directory, venue_utilisation
+
+bp = Blueprint('dashboard', __name__)
+
+def _stats_validators():
+    # Upcoming/completed counts move with the clock, so the ETag does too
+    etag_parts, _ = stamp_validators('event', extra=(datetime.now().strftime('%Y-%m-%d %H:%M'),))
+    return etag_parts, None
+
+@bp.route('/api/dashboard/stats')
+@login_required
+@conditional(_stats_validators)
+def api_dashboard_stats():
+    from datetime import datetime
+    
+    try:
+        # Counts of the viewer's events, in one scoped query
+        return json_response(event_totals(datetime.now()))
+    except Exception as e:
+        current_app.logger.error(f'Error getting dashboard stats: {str(e)}')
+        return json_response({
+            'total_events': 0,
+            'upcoming_events': 0,
+            'online_events': 0,
+            'offline_events': 0,
+            'pending_events': 0,
+            'completed_events': 0
+        })
+
+@bp.route('/api/dashboard/categories')
+@login_required
+@conditional(lambda: stamp_validators('event', 'event_category'))
+def api_category_data():
+    try:
+        # Count the viewer's events per category in one grouped query
+        rows = count_events_by(
+            EventCategory.id, EventCategory.name,
+            joins=[
+                (event_categories, event_categories.c.event_id == Event.id),
+                (EventCategory, EventCategory.id == event_categories.c.category_id),
+            ]
+        )
+        return json_response([{'name': name, 'count': count} for _, name, count in rows])
+    except Exception as e:
+        current_app.logger.error(f'Error getting category data: {str(e)}')
+        return json_response([])
+
+@bp.route('/api/dashboard/monthly')
+@login_required  
+@conditional(lambda: stamp_validators('event', extra=(datetime.now().year,)))
+def api_monthly_data():
+    from datetime import datetime
+    import calendar
+    
+    try:
+        # Get current year for monthly breakdown
+        current_year = datetime.now().year
+        
+        # Initialize monthly data
+        monthly_counts = [0] * 12
+        
+        # Start times of the viewer's events this year
+        start_times = scoped(db.session.query(Event.start_datetime)).filter(
+            Event.start_datetime >= datetime(current_year, 1, 1),
+            Event.start_datetime < datetime(current_year + 1, 1, 1)
+        ).all()
+        
+        # Count events by month
+        for (start_datetime,) in start_times:
+            if start_datetime:
+                month_index = start_datetime.month - 1  # 0-based index
+                monthly_counts[month_index] += 1
+        
+        return json_response({
+            'labels': ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'],
+            'data': monthly_counts
+        })
+    except Exception as e:
+        current_app.logger.error(f'Error getting monthly data: {str(e)}')
+        return json_response({
+            'labels': ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'],
+            'data': [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0]
+        })
+
+@bp.route('/api/dashboard/event-types')
+@login_required
+@conditional(lambda: stamp_validators('event', 'event_type'))
+def api_event_types_data():
+    try:
+        # Get event type distribution from the viewer's events
+        rows = count_events_by(
+            EventType.id, EventType.name,
+            joins=[(EventType, EventType.id == Event.event_type_id)]
+        )
+        event_types_data = [{'name': name, 'count': count} for _, name, count in rows]
+        
+        # If no events have a type, show online vs offline distribution
+        if not event_types_data:
+            counts = {is_online: count for is_online, _, count in count_events_by(Event.is_online, Event.is_online)}
+            online_count = counts.get(True, 0)
+            offline_count = counts.get(False, 0)
+            if online_count > 0 or offline_count > 0:
+                event_types_data = [
+                    {'name': 'Online Events', 'count': online_count},
+                    {'name': 'Offline Events', 'count': offline_count}
+                ]
+        
+        return json_response(event_types_data)
+    except Exception as e:
+        current_app.logger.error(f'Error getting event types data: {str(e)}')
+        return json_response([])
+
+@bp.route('/api/dashboard/requesters')
+@login_required
+@conditional(lambda: stamp_validators('event', 'users'))
+def api_requester_data():
+    try:
+        # Get events by requester (user who created them); reps only see themselves
+        rows = count_events_by(
+            User.id, User.email,
+            joins=[(User, User.id == Event.user_id)]
+        )
+        return json_response([{'name': email, 'count': count} for _, email, count in rows])
+    except Exception as e:
+        current_app.logger.error(f'Error getting requester data: {str(e)}')
+        return json_response([])
+
+@bp.route('/api/dashboard/venues')
+@login_required
+@conditional(lambda: stamp_validators('event', 'venue'))
+def api_venue_utilisation():
+    """Per-venue events and booked hours for events starting in [from, to).
+
+    ``from``/``to`` are ISO dates (default: the current year). ``utilisation``
+    is the share of the range's hours the venue is booked. Reps only see
+    their own events.
+    """
+    from flask import jsonify
+    
+    try:
+        current_year = datetime.now().year
+        range_start = datetime.fromisoformat(request.args['from']) if request.args.get('from') else datetime(current_year, 1, 1)
+        range_end = datetime.fromisoformat(request.args['to']) if request.args.get('to') else datetime(current_year + 1, 1, 1)
+        if range_end <= range_start:
+            raise ValueError
+    except ValueError:
+        return jsonify({'error': 'from and to must be ISO 8601 dates, with to after from'}), 400
+    
+    try:
+        venues = get_venue_directory().venues
+        range_hours = (range_end - range_start).total_seconds() / 3600
+        return json_response([{
+            'venue_id': venue_id,
+            'name': venues[venue_id].name if venue_id in venues else None,
+            'governorate': venues[venue_id].governorate if venue_id in venues else None,
+            'capacity': venues[venue_id].capacity if venue_id in venues else None,
+            'events': count,
+            'booked_hours': hours,
+            'utilisation': round(hours / range_hours, 4),
+        } for venue_id, count, hours in venue_utilisation(range_start, range_end)])
+    except Exception as e:
+        current_app.logger.error(f'Error getting venue utilisation: {str(e)}')
+        return json_response([])
+
+@bp.route('/api/dashboard/governorates')
+@login_required
+@conditional(lambda: stamp_validators('event', 'event_archive', 'governorate'))
+def api_governorate_counts():
+    """Events per governorate, hot and archived, for the regional heatmap.
+
+    ``from``/``to`` are months (YYYY-MM) bounding the event start as
+    [from, to); either may be left out. Every governorate is listed, with 0
+    where it has no events. Reps only see their own events.
+    """
+    from flask import jsonify
+    
+    try:
+        start_month = datetime.strptime(request.args['from'], '%Y-%m') if request.args.get('from') else None
+        end_month = datetime.strptime(request.args['to'], '%Y-%m') if request.args.get('to') else None
+        if start_month and end_month and end_month <= start_month:
+            raise ValueError
+    except ValueError:
+        return jsonify({'error': 'from and to must be months (YYYY-MM), with to after from'}), 400
+    
+    try:
+        counts = governorate_rollup.counts(
+            (start_month.year, start_month.month) if start_month else None,
+            (end_month.year, end_month.month) if end_month else None,
+            user_id=None if sees_all_events() else current_user.id,
+        )
+        return json_response([{
+            'governorate_id': governorate.id,
+            'name': governorate.name,
+            'code': governorate.code,
+            'count': counts.get(governorate.id, 0),
+        } for governorate in get_reference_data().governorates])
+    except Exception as e:
+        current_app.logger.error(f'Error getting governorate counts: {str(e)}')
+        return json_response([])
+
+@bp.route('/api/auth/test')
+@login_required
+def api_auth_test():
+    from flask import jsonify
+    return jsonify({'authenticated': True, 'user': current_user.email, 'role': current_user.role})
@@ -0,0 +1,795 @@
+"""
+Event routes: dashboard page, event listing, creation, editing and approval
+"""
+
+import os
+from datetime import datetime
+from flask import Blueprint, abort, current_app, render_template, request, redirect, url_for, flash
+from flask_login import login_required, current_user
+from sqlalchemy.orm import selectinload
+
+import audit
+from archival import get_archived_event, scoped_archive
+from caching import invalidate_event_card
+from change_tracking import record_event_change, stamp_validators
+from conflicts import blocking_conflicts, describe_conflicts, find_conflicts
+from extensions import db
+from helpers import egyptian_governorates
+from http_cache import conditional
+from notifications import queue_pending_notifications, queue_status_notifications
+from models import AppSetting, ArchivedEvent, Event, EventCategory, EventType, archived_event_categories, event_categories
+from reference_data import get_reference_data
+from scoping import count_events_by, event_totals, scoped, scoped_events
+from uploads import consume_upload, get_finished_upload
+from venues import find_or_create_venue, get_venue_directory
+
+bp = Blueprint('events', __name__)
+
+def _events_validators():
+    return stamp_validators('event', 'event_category', 'event_type', 'venue', 'app_settings')
+
+def _event_details_validators(event_id):
+    row = db.session.query(Event.updated_at, Event.created_at).filter(Event.id == event_id).first()
+    if row is None:
+        # Archived events no longer change once moved
+        row = db.session.query(ArchivedEvent.archived_at, ArchivedEvent.archived_at) \
+            .filter(ArchivedEvent.id == event_id).first()
+        if row is None:
+            return None
+    event_modified = row[0] or row[1]
+    etag_parts, last_modified = stamp_validators('event_category', 'event_type', 'venue', 'app_settings', extra=(event_modified,))
+    if event_modified and (last_modified is None or event_modified > last_modified):
+        last_modified = event_modified
+    return etag_parts, last_modified
+
+@bp.route('/dashboard')
+@login_required
+def dashboard():
+    # Get app settings
+    app_name = AppSetting.get_setting('app_name', 'PharmaEvents')
+    theme_color = AppSetting.get_setting('theme_color', '#0f6e84')
+    
+    # Dashboard statistics for the viewer's events (reps only see their own)
+    try:
+        now = datetime.now()
+        totals = event_totals(now)
+        total_events = totals['total_events']
+        upcoming_events = totals['upcoming_events']
+        online_events = totals['online_events']
+        offline_events = totals['offline_events']
+        pending_events_count = totals['pending_events']
+        current_app.logger.info(f'Dashboard: Total events = {total_events}')
+        
+        # Get recent events (last 5)
+        recent_events = scoped_events().order_by(Event.created_at.desc()).limit(5).all()
+        
+        # Get upcoming events list for dashboard display
+        upcoming_events_list = scoped_events().filter(Event.start_datetime > now).order_by(Event.start_datetime.asc()).limit(5).all()
+        
+        # Category and event type data for the charts, grouped in the database
+        category_data = [{'name': name, 'count': count} for _, name, count in count_events_by(
+            EventCategory.id, EventCategory.name,
+            joins=[
+                (event_categories, event_categories.c.event_id == Event.id),
+                (EventCategory, EventCategory.id == event_categories.c.category_id),
+            ]
+        )]
+        event_type_data = [{'name': name, 'count': count} for _, name, count in count_events_by(
+            EventType.id, EventType.name,
+            joins=[(EventType, EventType.id == Event.event_type_id)]
+        )]
+        
+    except Exception as e:
+        current_app.logger.error(f'Error calculating dashboard stats: {str(e)}')
+        total_events = upcoming_events = online_events = offline_events = pending_events_count = 0
+        recent_events = []
+        upcoming_events_list = []
+        category_data = []
+        event_type_data = []
+    
+    return render_template('dashboard.html', 
+                         app_name=app_name,
+                         app_logo=None,
+                         theme_color=theme_color,
+                         total_events=total_events,
+                         upcoming_events=upcoming_events,  
+                         online_events=online_events,
+                         offline_events=offline_events,
+                         pending_events_count=pending_events_count,
+                         recent_events=recent_events,
+                         upcoming_events_list=upcoming_events_list,
+                         category_data=category_data,
+                         event_type_data=event_type_data)
+
+@bp.route('/events')
+@login_required
+@conditional(_events_validators)
+def events():
+    app_name = AppSetting.get_setting('app_name', 'PharmaEvents')
+    theme_color = AppSetting.get_setting('theme_color', '#0f6e84')
+    
+    # Categories and event types from the reference-data cache
+    try:
+        reference = get_reference_data()
+        categories, event_types = reference.categories, reference.event_types
+    except Exception as e:
+        current_app.logger.error(f'Error fetching categories and event types: {str(e)}')
+        categories, event_types = [], []
+    
+    # Get the viewer's events (reps only see their own)
+    try:
+        events = scoped_events().options(selectinload(Event.venue)).order_by(Event.start_datetime.desc()).all()
+    except Exception as e:
+        current_app.logger.error(f'Error fetching events: {str(e)}')
+        events = []
+    
+    app_logo = AppSetting.get_setting('app_logo')
+    return render_template('events.html', 
+                         app_name=app_name,
+                         app_logo=app_logo,
+                         theme_color=theme_color,
+                         events=events, 
+                         categories=categories,
+                         event_types=event_types)
+
+@bp.route('/event_details/<int:event_id>')
+@login_required
+@conditional(_event_details_validators)
+def event_details(event_id):
+    """Display detailed information about a specific event"""
+    try:
+        event = db.session.get(Event, event_id)
+        archived = event is None
+        if archived:
+            event = get_archived_event(event_id)
+            if event is None:
+                abort(404)
+        app_name = AppSetting.get_setting('app_name', 'PharmaEvents')
+        theme_color = AppSetting.get_setting('theme_color', '#0f6e84')
+        app_logo = AppSetting.get_setting('app_logo')
+        
+        return render_template('event_details.html',
+                             app_name=app_name,
+                             app_logo=app_logo, 
+                             theme_color=theme_color,
+                             event=event,
+                             archived=archived)
+    except Exception as e:
+        current_app.logger.error(f'Error loading event details: {str(e)}')
+        flash('Event not found or error loading details.', 'danger')
+        return redirect(url_for('events.events'))
+
+@bp.route('/create_event', methods=['GET', 'POST'])
+@login_required
+def create_event():
+    app_name = AppSetting.get_setting('app_name', 'PharmaEvents')
+    theme_color = AppSetting.get_setting('theme_color', '#0f6e84')
+    
+    # Categories and event types from the reference-data cache
+    try:
+        reference = get_reference_data()
+        categories, event_types = reference.categories, reference.event_types
+    except Exception as e:
+        current_app.logger.error(f'Error fetching categories and event types: {str(e)}')
+        categories, event_types = [], []
+    
+    if request.method == 'POST':
+        # Handle event creation
+        try:
+            # Get form data
+            title = request.form.get('title', '').strip()
+            description = request.form.get('description', '').strip()
+            event_type_id = request.form.get('event_type')
+            category_id = request.form.get('categories')
+            start_date = request.form.get('start_date')
+            end_date = request.form.get('end_date')
+            start_time = request.form.get('start_time')
+            end_time = request.form.get('end_time')
+            is_online = request.form.get('is_online') == 'on'
+            venue = request.form.get('venue', '').strip() if not is_online else None
+            governorate = request.form.get('governorate', '').strip() if not is_online else None
+            max_attendees = request.form.get('max_attendees')
+            
+            # Handle attendees file upload (now required)
+            attendees_file = request.files.get('attendees_file')
+            attendees_filename = None
+            attendees_count = 0
+            
+            # Handle attendees file upload if provided
+            if 'attendees_file' in request.files:
+                attendees_file = request.files['attendees_file']
+                if attendees_file and attendees_file.filename:
+                    # Basic file processing - just count for now
+                    if attendees_file.filename.endswith(('.csv', '.xlsx', '.xls')):
+                        attendees_count = 1  # Placeholder - actual processing would count rows
+                        current_app.logger.info(f'Attendees file uploaded: {attendees_file.filename}')
+            
+            # Large files arrive beforehand through the chunked upload API (see uploads.py)
+            attendees_upload_id = request.form.get('attendees_upload_id')
+            attendees_upload = get_finished_upload(attendees_upload_id, current_user.id, 'attendees') if attendees_upload_id else None
+            
+            # Check if attendees file is provided (required)
+            if not attendees_upload and (not attendees_file or not attendees_file.filename):
+                flash('Attendees list file is required. Please upload a CSV or Excel file with attendee details.', 'danger')
+                app_logo = AppSetting.get_setting('app_logo')
+                return render_template('create_event.html', 
+                                     app_name=app_name, app_logo=app_logo, theme_color=theme_color,
+                                     categories=categories, event_types=event_types, 
+                                     governorates=egyptian_governorates, edit_mode=False)
+            
+            if attendees_upload or (attendees_file and attendees_file.filename):
+                original_filename = attendees_upload.filename if attendees_upload else attendees_file.filename
+                # Validate file type (CSV, Excel)
+                allowed_extensions = {'csv', 'xlsx', 'xls'}
+                file_ext = original_filename.rsplit('.', 1)[1].lower() if '.' in original_filename else ''
+                if file_ext not in allowed_extensions:
+                    flash('Attendees file must be CSV or Excel format', 'danger')
+                    app_logo = AppSetting.get_setting('app_logo')
+                    return render_template('create_event.html', 
+                                         app_name=app_name, app_logo=app_logo, theme_color=theme_color,
+                                         categories=categories, event_types=event_types, 
+                                         governorates=egyptian_governorates, edit_mode=False)
+                
+                # Save the file
+                upload_folder = os.path.join(current_app.static_folder or 'static', 'uploads', 'attendees')
+                os.makedirs(upload_folder, exist_ok=True)
+                attendees_filename = f"attendees_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{original_filename}"
+                file_path = os.path.join(upload_folder, attendees_filename)
+                # A chunked upload is read where it is staged and only moved
+                # once the event is saved, so the form can be resubmitted with it
+                if attendees_upload:
+                    read_path = attendees_upload.stored_path
+                else:
+                    attendees_file.save(file_path)
+                    read_path = file_path
+                
+                # Process and validate the attendees file
+                try:
+                    import pandas as pd
+                    
+                    if file_ext == 'csv':
+                        df = pd.read_csv(read_path)
+                    else:  # xlsx or xls
+                        df = pd.read_excel(read_path)
+                    
+                    # Flexible validation - just check if file has data
+                    if df.empty:
+                        flash('Attendees file appears to be empty', 'danger')
+                        if not attendees_upload:
+                            os.remove(file_path)  # Clean up the uploaded file
+                        app_logo = AppSetting.get_setting('app_logo')
+                        return render_template('create_event.html', 
+                                             app_name=app_name, app_logo=app_logo, theme_color=theme_color,
+                                             categories=categories, event_types=event_types, 
+                                             governorates=egyptian_governorates, edit_mode=False)
+                    
+                    # Count valid attendees (rows with non-null values in key columns)
+                    # Look for columns that might contain names or emails
+                    name_cols = [col for col in df.columns if any(keyword in col.lower() for keyword in ['name', 'participant', 'attendee'])]
+                    email_cols = [col for col in df.columns if 'email' in col.lower() or 'mail' in col.lower()]
+                    
+                    if name_cols:
+                        attendees_count = len(df.dropna(subset=name_cols[:1]))  # Use first name column
+                    else:
+                        attendees_count = len(df.dropna())  # Count all non-empty rows
+                    
+                    current_app.logger.info(f'Processed attendees file with {attendees_count} attendees from {len(df)} total rows')
+                    current_app.logger.info(f'File columns: {list(df.columns)}')
+                    
+                except Exception as e:
+                    current_app.logger.error(f'Error processing attendees file: {str(e)}')
+                    flash('Error processing attendees file. Please check the format and try again.', 'danger')
+                    if not attendees_upload and os.path.exists(file_path):
+                        os.remove(file_path)  # Clean up the uploaded file
+                    app_logo = AppSetting.get_setting('app_logo')
+                    return render_template('create_event.html', 
+                                         app_name=app_name, app_logo=app_logo, theme_color=theme_color,
+                                         categories=categories, event_types=event_types, 
+                                         governorates=egyptian_governorates, edit_mode=False)
+            
+            # Basic validation
+            current_app.logger.info(f'Form data received - Title: "{title}", Description: "{description}", Start Date: "{start_date}"')
+            
+            if not title:
+                flash('Event title is required', 'danger')
+                app_logo = AppSetting.get_setting('app_logo')
+                return render_template('create_event.html', 
+                                     app_name=app_name, app_logo=app_logo, theme_color=theme_color,
+                                     categories=categories, event_types=event_types, 
+                                     governorates=egyptian_governorates, edit_mode=False)
+            
+            if not description:
+                flash('Event description is required', 'danger')
+                app_logo = AppSetting.get_setting('app_logo')
+                return render_template('create_event.html', 
+                                     app_name=app_name, app_logo=app_logo, theme_color=theme_color,
+                                     categories=categories, event_types=event_types, 
+                                     governorates=egyptian_governorates, edit_mode=False)
+            
+            if not start_date:
+                flash('Start date is required', 'danger')
+                app_logo = AppSetting.get_setting('app_logo')
+                return render_template('create_event.html', 
+                                     app_name=app_name, app_logo=app_logo, theme_color=theme_color,
+                                     categories=categories, event_types=event_types, 
+                                     governorates=egyptian_governorates, edit_mode=False)
+            
+            # Store the canonical governorate; any known spelling is accepted (see governorates.py)
+            governorate_record = get_reference_data().resolve_governorate(governorate) if governorate else None
+            if governorate and governorate_record is None:
+                flash(f'Unknown governorate "{governorate}"', 'danger')
+                app_logo = AppSetting.get_setting('app_logo')
+                return render_template('create_event.html', 
+                                     app_name=app_name, app_logo=app_logo, theme_color=theme_color,
+                                     categories=categories, event_types=event_types, 
+                                     governorates=egyptian_governorates, edit_mode=False)
+            governorate = governorate_record.name if governorate_record else None
+            
+            # Now using SQLAlchemy ORM for event creation
+            
+            # Combine date and time for datetime fields
+            start_datetime = None
+            end_datetime = None
+            
+            if start_date:
+                if start_time:
+                    start_datetime = datetime.strptime(f"{start_date} {start_time}", "%Y-%m-%d %H:%M")
+                else:
+                    start_datetime = datetime.strptime(start_date, "%Y-%m-%d")
+            
+            if end_date:
+                if end_time:
+                    end_datetime = datetime.strptime(f"{end_date} {end_time}", "%Y-%m-%d %H:%M")
+                else:
+                    end_datetime = datetime.strptime(end_date, "%Y-%m-%d")
+            
+            # Venues are picked by name within the governorate (see venues.py)
+            venue_record = find_or_create_venue(venue, governorate) if venue else None
+            
+            # Refuse double bookings of the rep or venue (see conflicts.py)
+            conflicts = find_conflicts(start_datetime, end_datetime, current_user.id,
+                                       governorate=governorate, venue_id=venue_record.id if venue_record else None,
+                                       is_online=is_online)
+            blocking = blocking_conflicts(conflicts)
+            if blocking:
+                flash(f'This event overlaps {describe_conflicts(blocking)}. Please choose another time.', 'danger')
+                app_logo = AppSetting.get_setting('app_logo')
+                return render_template('create_event.html', 
+                                     app_name=app_name, app_logo=app_logo, theme_color=theme_color,
+                                     categories=categories, event_types=event_types, 
+                                     governorates=egyptian_governorates, edit_mode=False)
+            
+            # Handle optional image upload
+            image_filename = None
+            event_image = request.files.get('event_image')
+            
+            if event_image and event_image.filename:
+                # Validate image file
+                allowed_extensions = {'png', 'jpg', 'jpeg', 'gif'}
+                if '.' in event_image.filename:
+                    file_ext = event_image.filename.rsplit('.', 1)[1].lower()
+                    if file_ext in allowed_extensions:
+                        # Create uploads directory if it doesn't exist
+                        upload_folder = os.path.join(current_app.static_folder, 'uploads')
+                        os.makedirs(upload_folder, exist_ok=True)
+                        
+                        # Generate unique filename
+                        image_filename = f"event_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{file_ext}"
+                        image_path = os.path.join(upload_folder, image_filename)
+                        event_image.save(image_path)
+                        
+                        current_app.logger.info(f'Event image saved: {image_filename}')
+                    else:
+                        flash('Invalid image format. Please upload PNG, JPG, JPEG, or GIF files.', 'warning')
+
+            # Create new event using SQLAlchemy ORM instead of raw SQL
+            # Set initial status based on user role
+            initial_status = 'active' if current_user.can_approve_events() else 'pending'
+            
+            new_event = Event(
+                name=title,
+                description=description,
+                event_type_id=int(event_type_id) if event_type_id else None,
+                is_online=is_online,
+                start_datetime=start_datetime,
+                end_datetime=end_datetime,
+                venue_id=venue_record.id if venue_record else None,
+                image_file=image_filename,  # Add image filename to event
+                governorate=governorate,
+                governorate_id=governorate_record.id if governorate_record else None,
+                user_id=current_user.id,
+                status=initial_status
+            )
+            
+            db.session.add(new_event)
+            db.session.flush()  # Flush to get the ID
+            event_id = new_event.id
+            
+            # Handle category association if selected using SQLAlchemy ORM
+            if category_id:
+                try:
+                    category = EventCategory.query.get(int(category_id))
+                    if category:
+                        new_event.categories.append(category)
+                except Exception as e:
+                    current_app.logger.error(f'Error associating category: {str(e)}')
+            
+            db.session.flush()
+            record_event_change(new_event, 'create', actor_id=current_user.id)
+            queue_pending_notifications([new_event], actor_id=current_user.id)
+            db.session.commit()
+            if attendees_upload:
+                try:
+                    consume_upload(attendees_upload, file_path)
+                except Exception as e:
+                    # The event is saved; only the staged file is left behind
+                    current_app.logger.error(f'Error moving attendees upload {attendees_upload_id}: {str(e)}')
+            
+            if current_user.can_approve_events():
+                success_message = f'Event "{title}" created successfully and is now active!'
+            else:
+                success_message = f'Event "{title}" created successfully and is pending approval from an admin or event manager.'
+            
+            if attendees_count > 0:
+                success_message += f' Attendees file uploaded with {attendees_count} participants.'
+            if conflicts:
+                flash(f'Note: this event overlaps {describe_conflicts(conflicts)}.', 'warning')
+            
+            current_app.logger.info(f'Event "{title}" created successfully with ID {event_id} by user {current_user.email}')
+            flash(success_message, 'success')
+            return redirect(url_for('events.events'))
+            
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f'Error creating event: {str(e)}')
+            flash('Error creating event. Please try again.', 'danger')
+    
+    # Use the global egyptian_governorates list
+    
+    app_logo = AppSetting.get_setting('app_logo')
+    return render_template('create_event.html', 
+                         app_name=app_name,
+                         app_logo=app_logo,
+                         theme_color=theme_color,
+                         categories=categories,
+                         event_types=event_types,
+                         governorates=egyptian_governorates,
+                         edit_mode=False)
+
+@bp.route('/edit_event/<int:event_id>', methods=['GET', 'POST'])
+@login_required
+def edit_event(event_id):
+    """Edit an existing event"""
+    event = Event.query.get_or_404(event_id)
+    
+    # Check if user has permission to edit this event
+    if not current_user.is_admin() and event.user_id != current_user.id:
+        flash('You do not have permission to edit this event.', 'danger')
+        return redirect(url_for('events.events'))
+    
+    if request.method == 'POST':
+        # Handle form submission for event updates
+        try:
+            # Get form data
+            title = request.form.get('title', '').strip()
+            description = request.form.get('description', '').strip()
+            event_type_id = request.form.get('event_type')
+            category_id = request.form.get('categories')
+            is_online = 'is_online' in request.form
+            start_date = request.form.get('start_date')
+            start_time = request.form.get('start_time')
+            end_date = request.form.get('end_date')
+            end_time = request.form.get('end_time')
+            governorate = request.form.get('governorate')
+            venue = request.form.get('venue', '').strip()
+            
+            governorate_record = get_reference_data().resolve_governorate(governorate) if governorate else None
+            if governorate and governorate_record is None:
+                flash(f'Unknown governorate "{governorate}"', 'danger')
+                return redirect(url_for('events.edit_event', event_id=event_id))
+            governorate = governorate_record.name if governorate_record else None
+            
+            # Resolve the venue first: adding one flushes the session
+            venue_governorate = governorate or event.governorate
+            venue_record = find_or_create_venue(venue, venue_governorate) if venue and not is_online else None
+            
+            # Update event fields
+            if title:
+                event.name = title
+            if description:
+                event.description = description
+            if event_type_id:
+                event.event_type_id = int(event_type_id)
+            event.is_online = is_online
+            if governorate:
+                event.governorate = governorate
+                event.governorate_id = governorate_record.id
+            event.venue_id = venue_record.id if venue_record else None
+            
+            # Update datetime fields
+            if start_date:
+                if start_time:
+                    event.start_datetime = datetime.strptime(f"{start_date} {start_time}", "%Y-%m-%d %H:%M")
+                else:
+                    event.start_datetime = datetime.strptime(start_date, "%Y-%m-%d")
+            
+            if end_date:
+                if end_time:
+                    event.end_datetime = datetime.strptime(f"{end_date} {end_time}", "%Y-%m-%d %H:%M")
+                else:
+                    event.end_datetime = datetime.strptime(end_date, "%Y-%m-%d")
+            
+            # Refuse double bookings of the rep or venue (see conflicts.py)
+            conflicts = find_conflicts(event.start_datetime, event.end_datetime, event.user_id,
+                                       governorate=event.governorate, venue_id=event.venue_id,
+                                       is_online=event.is_online, exclude_id=event.id)
+            blocking = blocking_conflicts(conflicts)
+            if blocking:
+                db.session.rollback()
+                flash(f'This event would overlap {describe_conflicts(blocking)}. Please choose another time.', 'danger')
+                return redirect(url_for('events.edit_event', event_id=event_id))
+            
+            # Handle image upload
+            event_image = request.files.get('event_image')
+            if event_image and event_image.filename:
+                allowed_extensions = {'png', 'jpg', 'jpeg', 'gif'}
+                if '.' in event_image.filename:
+                    file_ext = event_image.filename.rsplit('.', 1)[1].lower()
+                    if file_ext in allowed_extensions:
+                        upload_folder = os.path.join(current_app.static_folder, 'uploads')
+                        os.makedirs(upload_folder, exist_ok=True)
+                        
+                        image_filename = f"event_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{file_ext}"
+                        image_path = os.path.join(upload_folder, image_filename)
+                        event_image.save(image_path)
+                        
+                        event.image_file = image_filename
+                        current_app.logger.info(f'Event image updated: {image_filename}')
+            
+            # Update category association
+            if category_id:
+                # Clear existing categories
+                event.categories.clear()
+                # Add new category
+                category = EventCategory.query.get(int(category_id))
+                if category:
+                    event.categories.append(category)
+            
+            db.session.flush()
+            record_event_change(event, 'update', actor_id=current_user.id)
+            db.session.commit()
+            invalidate_event_card(event.id)
+            flash(f'Event "{event.name}" updated successfully!', 'success')
+            if conflicts:
+                flash(f'Note: this event overlaps {describe_conflicts(conflicts)}.', 'warning')
+            return redirect(url_for('events.events'))
+            
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f'Error updating event: {str(e)}')
+            flash('Error updating event. Please try again.', 'danger')
+    
+    # Get app settings
+    app_name = AppSetting.get_setting('app_name', 'PharmaEvents')
+    theme_color = AppSetting.get_setting('theme_color', '#0f6e84')
+    
+    # Categories and event types from the reference-data cache
+    try:
+        reference = get_reference_data()
+        categories, event_types = reference.categories, reference.event_types
+    except Exception as e:
+        current_app.logger.error(f'Error fetching categories and event types: {str(e)}')
+        categories, event_types = [], []
+    
+    return render_template('create_event.html', 
+                         app_name=app_name,
+                         app_logo=None,
+                         theme_color=theme_color,
+                         categories=categories,
+                         event_types=event_types,
+                         governorates=egyptian_governorates,
+                         edit_mode=True,
+                         event=event)
+
+@bp.route('/approve_event/<int:event_id>', methods=['POST'])
+@login_required
+def approve_event(event_id):
+    """Approve an event (admin and event manager only)"""
+    if not current_user.can_approve_events():
+        flash('Access denied. Admin or Event Manager privileges required.', 'danger')
+        return redirect(url_for('events.events'))
+    
+    try:
+        event = Event.query.get_or_404(event_id)
+        previous_status = event.status
+        event.status = 'active'
+        db.session.flush()
+        record_event_change(event, 'status', actor_id=current_user.id, previous_status=previous_status)
+        if previous_status != event.status:
+            queue_status_notifications([event], actor_id=current_user.id)
+        db.session.commit()
+        invalidate_event_card(event.id)
+        flash(f'Event "{event.name}" has been approved.', 'success')
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f'Error approving event {event_id}: {str(e)}')
+        flash('Error approving event. Please try again.', 'danger')
+    
+    return redirect(url_for('events.events'))
+
+@bp.route('/reject_event/<int:event_id>', methods=['POST'])
+@login_required
+def reject_event(event_id):
+    """Reject an event (admin and event manager only)"""
+    if not current_user.can_approve_events():
+        flash('Access denied. Admin or Event Manager privileges required.', 'danger')
+        return redirect(url_for('events.events'))
+    
+    try:
+        event = Event.query.get_or_404(event_id)
+        previous_status = event.status
+        event.status = 'declined'
+        db.session.flush()
+        record_event_change(event, 'status', actor_id=current_user.id, previous_status=previous_status)
+        if previous_status != event.status:
+            queue_status_notifications([event], actor_id=current_user.id)
+        db.session.commit()
+        invalidate_event_card(event.id)
+        flash(f'Event "{event.name}" has been declined.', 'warning')
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f'Error declining event {event_id}: {str(e)}')
+        flash('Error declining event. Please try again.', 'danger')
+    
+    return redirect(url_for('events.events'))
+
+@bp.route('/delete_event/<int:event_id>', methods=['POST'])
+@login_required
+def delete_event(event_id):
+    """Delete an event (admin only)"""
+    if not current_user.is_admin():
+        flash('Access denied. Admin privileges required.', 'danger')
+        return redirect(url_for('events.events'))
+    
+    try:
+        event = Event.query.get_or_404(event_id)
+        event_name = event.name
+        record_event_change(event, 'delete', actor_id=current_user.id)
+        db.session.delete(event)
+        db.session.commit()
+        audit.record('event.delete', 'event', event_id, {'name': event_name})
+        invalidate_event_card(event_id)
+        flash(f'Event "{event_name}" has been deleted successfully.', 'success')
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f'Error deleting event: {str(e)}')
+        flash('Error deleting event. Please try again.', 'danger')
+    
+    return redirect(url_for('events.events'))
+    
+    event = Event.query.get_or_404(event_id)
+    event_name = event.name
+    
+    # Delete event-category associations first
+    db.session.execute(db.text("DELETE FROM event_categories WHERE event_id = :event_id"), {'event_id': event_id})
+    
+    # Delete the event
+    db.session.delete(event)
+    db.session.commit()
+    
+    flash(f'Event "{event_name}" has been deleted.', 'success')
+    return redirect(url_for('events.events'))
+
+@bp.route('/export_events')
+@login_required
+def export_events():
+    """Export events to CSV file"""
+    from flask import make_response
+    import io
+    import csv
+    
+    try:
+        # Get the viewer's events (reps only see their own), then their archived ones
+        events = scoped_events().order_by(Event.created_at.desc()).all()
+        events += scoped_archive(ArchivedEvent.query).order_by(ArchivedEvent.created_at.desc()).all()
+        
+        # Create CSV content
+        output = io.StringIO()
+        fieldnames = [
+            'ID', 'Event Name', 'Description', 'Event Type', 'Is Online', 
+            'Start Date', 'End Date', 'Governorate', 'Venue', 'Categories', 
+            'Created By', 'Created At', 'Status'
+        ]
+        
+        writer = csv.DictWriter(output, fieldnames=fieldnames)
+        writer.writeheader()
+        
+        # Resolve type, category and venue names from the per-worker caches
+        # instead of loading each event's relationships
+        reference = get_reference_data()
+        venues = get_venue_directory().venues
+        links = scoped(db.select(event_categories.c.event_id, event_categories.c.category_id)
+                       .where(event_categories.c.event_id.in_(db.select(Event.id))))
+        category_ids = {}
+        archived_links = scoped_archive(
+            db.select(archived_event_categories.c.event_id, archived_event_categories.c.category_id)
+            .join(ArchivedEvent, ArchivedEvent.id == archived_event_categories.c.event_id)
+        )
+        for query in (links, archived_links):
+            for event_id, category_id in db.session.execute(query):
+                category_ids.setdefault(event_id, []).append(category_id)
+        
+        for event in events:
+            # Format event type
+            event_type = reference.event_type_names.get(event.event_type_id, 'Not specified')
+            
+            # Format categories
+            category_names = [reference.category_names[category_id]
+                              for category_id in category_ids.get(event.id, []) if category_id in reference.category_names]
+            categories = ', '.join(category_names) if category_names else 'None'
+            
+            # Format dates
+            start_date = event.start_datetime.strftime('%Y-%m-%d %H:%M') if event.start_datetime else ''
+            end_date = event.end_datetime.strftime('%Y-%m-%d %H:%M') if event.end_datetime else ''
+            created_at = event.created_at.strftime('%Y-%m-%d %H:%M') if event.created_at else ''
+            
+            writer.writerow({
+                'ID': event.id,
+                'Event Name': event.name,
+                'Description': event.description or '',
+                'Event Type': event_type,
+                'Is Online': 'Yes' if event.is_online else 'No',
+                'Start Date': start_date,
+                'End Date': end_date,
+                'Governorate': event.governorate or '',
+                'Venue': venues[event.venue_id].name if event.venue_id in venues else '',
+                'Categories': categories,
+                'Created By': event.creator.email if event.creator else '',
+                'Created At': created_at,
+                'Status': event.status or 'Active'
+            })
+        
+        # Create response
+        response = make_response(output.getvalue())
+        response.headers['Content-Type'] = 'text/csv'
+        response.headers['Content-Disposition'] = f'attachment; filename=events_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
+        
+        current_app.logger.info(f'Events exported by user {current_user.email}: {len(events)} events')
+        return response
+        
+    except Exception as e:
+        current_app.logger.error(f'Error exporting events: {str(e)}')
+        flash('Error exporting events. Please try again.', 'danger')
+        return redirect(url_for('events.events'))
+
+@bp.route('/api/download/attendees-template')
+@login_required
+def download_attendees_template():
+    """Download CSV template for attendees upload"""
+    from flask import make_response
+    import io
+    import csv
+    
+    # Create CSV template content
+    csv_content = io.StringIO()
+    csv_writer = csv.writer(csv_content)
+    
+    # Write header row
+    csv_writer.writerow(['Name', 'Email', 'Phone', 'Title', 'Company', 'Department', 'Special_Requirements'])
+    
+    # Write sample rows
+    csv_writer.writerow(['Dr. Ahmed Hassan', 'ahmed.hassan@example.com', '+20 123 456 7890', 'Cardiologist', 'Cairo Medical Center', 'Cardiology', 'Vegetarian meal'])
+    csv_writer.writerow(['Dr. Sarah Mohamed', 'sarah.mohamed@example.com', '+20 987 654 3210', 'Neurologist', 'Alexandria Hospital', 'Neurology', ''])
+    
+    # Create response
+    response = make_response(csv_content.getvalue())
+    response.headers['Content-Type'] = 'text/csv'
+    response.headers['Content-Disposition'] = 'attachment; filename=attendees_template.csv'
+    
+    return response
+
+@bp.route('/static/uploads/<filename>')
+def uploaded_file(filename):
+    # Simple file serving route for uploaded files
+    from flask import send_from_directory
+    return send_from_directory('static/uploads', filename)
@@ -0,0 +1,585 @@
+"""
+Events JSON API for external tools, incremental client sync and bulk moderation
+"""
+
+import heapq
+from datetime import datetime, timedelta
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
+from flask_login import login_required, current_user
+from sqlalchemy import delete, func, or_, update
+from sqlalchemy.orm import selectinload
+
+import audit
+import event_stream
+from archival import archive_summary
+from caching import invalidate_event_card
+from change_tracking import bump_stamps, record_event_changes, settled_change_id, stamp_validators
+from conflicts import DIMENSIONS, check_programme
+from extensions import db
+from http_cache import conditional
+from models import ArchivedEvent, Event, EventChange, event_categories
+from notifications import queue_status_notifications
+from reference_data import get_reference_data
+from scoping import owner_filter, sees_all_events
+from serialization import ARCHIVED_EVENT, EVENT, json_response
+from venues import get_venue_directory
+
+bp = Blueprint('events_api', __name__)
+
+# Page size bounds for /api/events/changes
+DEFAULT_CHANGES_LIMIT = 100
+MAX_CHANGES_LIMIT = 1000
+# Change ids scanned per page of a rep's (filtered) feed
+CHANGES_SCAN_LIMIT = 5000
+
+# Most events one bulk request may touch (keeps IN lists under SQLite's bind limit)
+MAX_BULK_EVENTS = 500
+
+# Statuses the bulk endpoint may set: approve and reject
+BULK_STATUSES = ('active', 'declined')
+
+CALENDAR_GRANULARITIES = ('day', 'week', 'month')
+# Upper bounds for one /api/events/calendar response
+MAX_CALENDAR_BUCKETS = 3700
+MAX_CALENDAR_EVENTS = 2000
+
+# Most planned slots one /api/events/conflicts request may check
+MAX_CONFLICT_SLOTS = 500
+
+# Suggestions per /api/venues request
+DEFAULT_VENUE_SUGGESTIONS = 10
+MAX_VENUE_SUGGESTIONS = 50
+
+def _parse_datetime_arg(value, field):
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'filter.{field} must be an ISO 8601 datetime')
+
+def _bulk_conditions(payload):
+    """WHERE conditions and requested ids for a bulk request body.
+
+    The body names its events either with ``ids`` (a list of event ids) or a
+    ``filter`` object with any of: status, event_type_id, user_id,
+    start_after, start_before. Raises ValueError for invalid input.
+    """
+    ids = payload.get('ids')
+    event_filter = payload.get('filter')
+    if (ids is None) == (event_filter is None):
+        raise ValueError('Provide either ids or filter')
+    
+    if ids is not None:
+        if not isinstance(ids, list) or not ids:
+            raise ValueError('ids must be a non-empty list')
+        if not all(isinstance(event_id, int) and not isinstance(event_id, bool) for event_id in ids):
+            raise ValueError('ids must be integers')
+        ids = list(dict.fromkeys(ids))
+        if len(ids) > MAX_BULK_EVENTS:
+            raise ValueError(f'At most {MAX_BULK_EVENTS} events per request')
+        return [Event.id.in_(ids)], ids
+    
+    if not isinstance(event_filter, dict) or not event_filter:
+        raise ValueError('filter must be a non-empty object')
+    conditions = []
+    for field, value in event_filter.items():
+        if field == 'status':
+            conditions.append(Event.status == value)
+        elif field in ('event_type_id', 'user_id'):
+            if not isinstance(value, int):
+                raise ValueError(f'filter.{field} must be an integer')
+            conditions.append(getattr(Event, field) == value)
+        elif field == 'start_after':
+            conditions.append(Event.start_datetime >= _parse_datetime_arg(value, field))
+        elif field == 'start_before':
+            conditions.append(Event.start_datetime < _parse_datetime_arg(value, field))
+        else:
+            raise ValueError(f'Unknown filter field "{field}"')
+    return conditions, None
+
+def _load_bulk_targets(conditions):
+    """Matching events with their categories, locked for the rest of the transaction"""
+    events = Event.query.options(selectinload(Event.categories)) \
+        .filter(*conditions).order_by(Event.id).with_for_update().limit(MAX_BULK_EVENTS + 1).all()
+    if len(events) > MAX_BULK_EVENTS:
+        raise ValueError(f'Filter matches more than {MAX_BULK_EVENTS} events; narrow it down')
+    return events
+
+def _bulk_response(results, requested_ids):
+    if requested_ids is not None:
+        results.update({event_id: 'not_found' for event_id in requested_ids if event_id not in results})
+        order = requested_ids
+    else:
+        order = sorted(results)
+    counts = {}
+    for result in results.values():
+        counts[result] = counts.get(result, 0) + 1
+    return json_response({
+        'results': [{'id': event_id, 'result': results[event_id]} for event_id in order],
+        'counts': counts
+    })
+
+@bp.route('/api/events/changes')
+@login_required
+def api_event_changes():
+    """Event changes after ``since`` (a cursor from a previous page), oldest first.
+
+    Start with no ``since`` (or ``since=0``) for the full log, then pass back
+    ``next_cursor`` until ``has_more`` is false. Medical reps only see changes
+    to their own events. A change whose transaction is still committing holds
+    back the ones after it, so a client never moves past it.
+    """
+    try:
+        since = int(request.args.get('since') or 0)
+        limit = int(request.args.get('limit') or DEFAULT_CHANGES_LIMIT)
+    except ValueError:
+        return jsonify({'error': 'since and limit must be integers'}), 400
+    if since < 0 or limit < 1:
+        return jsonify({'error': 'since must be >= 0 and limit >= 1'}), 400
+    limit = min(limit, MAX_CHANGES_LIMIT)
+    
+    try:
+        owner_scope = owner_filter(EventChange.owner_id)
+        # Only committed-in-order changes are served, so the cursor never
+        # skips a change that commits late (see settled_change_id). Reps only
+        # see some of the scanned changes, so more are scanned for them.
+        settled, more = settled_change_id(since, current_app.config['CHANGE_LOG_SETTLE_SECONDS'],
+                                          limit=limit if owner_scope is None else CHANGES_SCAN_LIMIT)
+        query = EventChange.query.filter(EventChange.id > since, EventChange.id <= settled)
+        if owner_scope is not None:
+            query = query.filter(owner_scope)
+        
+        # Fetch one extra row to know whether another page follows
+        rows = query.order_by(EventChange.id.asc()).limit(limit + 1).all()
+        has_more = len(rows) > limit or more
+        full_page = len(rows) >= limit
+        rows = rows[:limit]
+        
+        changes = [{
+            'cursor': str(change.id),
+            'event_id': change.event_id,
+            'operation': change.operation,
+            'changed_at': change.changed_at.isoformat(),
+            'actor_id': change.actor_id,
+            'event': change.data
+        } for change in rows]
+        
+        return json_response({
+            'changes': changes,
+            # Past changes the viewer can't see, up to the settled point
+            'next_cursor': changes[-1]['cursor'] if full_page else str(settled),
+            'has_more': has_more
+        })
+    except Exception as e:
+        current_app.logger.error(f'Error listing event changes: {str(e)}')
+        return jsonify({'error': f'Failed to load changes: {str(e)}'}), 500
+
+@bp.route('/api/events/stream')
+@login_required
+def api_event_stream():
+    """Server-Sent Events: dashboard stat deltas and approval-queue notifications"""
+    broker = event_stream.broker
+    broker.poll_interval = current_app.config.get('SSE_POLL_INTERVAL', 1.0)
+    broker.settle_seconds = current_app.config['CHANGE_LOG_SETTLE_SECONDS']
+    broker.start(current_app._get_current_object())
+    
+    try:
+        last_event_id = int(request.headers.get('Last-Event-ID') or request.args.get('last_event_id') or 0) or None
+    except ValueError:
+        last_event_id = None
+    
+    stream = event_stream.stream(
+        user_id=current_user.id,
+        can_approve=current_user.can_approve_events(),
+        last_event_id=last_event_id,
+        max_seconds=current_app.config.get('SSE_MAX_STREAM_SECONDS', 300)
+    )
+    response = Response(stream_with_context(stream), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # Stop nginx-style proxies from buffering the stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@bp.route('/api/events/bulk-status', methods=['POST'])
+@login_required
+def api_bulk_status():
+    """Approve or reject many events in one transaction (admin and event manager only).
+
+    Body: ``{"status": "active"|"declined", "ids": [...]}`` or
+    ``{"status": ..., "filter": {...}}``. Each event is reported as updated,
+    unchanged (already in that status) or not_found.
+    """
+    if not current_user.can_approve_events():
+        return jsonify({'error': 'Admin or Event Manager privileges required'}), 403
+    
+    payload = request.get_json(silent=True) or {}
+    status = payload.get('status')
+    if status not in BULK_STATUSES:
+        return jsonify({'error': f'status must be one of: {", ".join(BULK_STATUSES)}'}), 400
+    
+    try:
+        conditions, requested_ids = _bulk_conditions(payload)
+        events = _load_bulk_targets(conditions)
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        results = {event.id: 'unchanged' for event in events}
+        changed = [event for event in events if event.status != status]
+        previous_statuses = {event.id: event.status for event in changed}
+        
+        if changed:
+            # One UPDATE for the whole batch; 'evaluate' keeps the loaded
+            # events in step so the change log gets the new state
+            db.session.execute(
+                update(Event)
+                .where(Event.id.in_(previous_statuses))
+                .values(status=status, updated_at=datetime.utcnow())
+                .execution_options(synchronize_session='evaluate')
+            )
+            bump_stamps(db.session.connection(), ['event'])
+            record_event_changes(changed, 'status', actor_id=current_user.id, previous_statuses=previous_statuses)
+            queue_status_notifications(changed, actor_id=current_user.id)
+        db.session.commit()
+        
+        for event_id, previous_status in previous_statuses.items():
+            results[event_id] = 'updated'
+            invalidate_event_card(event_id)
+            audit.record('event.status', 'event', event_id, {'old': previous_status, 'new': status, 'bulk': True})
+        return _bulk_response(results, requested_ids)
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f'Error in bulk status update: {str(e)}')
+        return jsonify({'error': f'Failed to update events: {str(e)}'}), 500
+
+@bp.route('/api/events/bulk-delete', methods=['POST'])
+@login_required
+def api_bulk_delete():
+    """Delete many events and their category links in one transaction (admin only).
+
+    Body: ``{"ids": [...]}`` or ``{"filter": {...}}``. Each event is reported
+    as deleted or not_found.
+    """
+    if not current_user.is_admin():
+        return jsonify({'error': 'Admin privileges required'}), 403
+    
+    payload = request.get_json(silent=True) or {}
+    try:
+        conditions, requested_ids = _bulk_conditions(payload)
+        events = _load_bulk_targets(conditions)
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        event_ids = [event.id for event in events]
+        # Read before the rows are deleted
+        names = {event.id: event.name for event in events}
+        if event_ids:
+            # Log the last state before the rows go away
+            record_event_changes(events, 'delete', actor_id=current_user.id)
+            db.session.execute(delete(event_categories).where(event_categories.c.event_id.in_(event_ids)))
+            db.session.execute(
+                delete(Event)
+                .where(Event.id.in_(event_ids))
+                .execution_options(synchronize_session=False)
+            )
+            bump_stamps(db.session.connection(), ['event'])
+        db.session.commit()
+        
+        for event_id in event_ids:
+            invalidate_event_card(event_id)
+            audit.record('event.delete', 'event', event_id, {'name': names[event_id], 'bulk': True})
+        return _bulk_response({event_id: 'deleted' for event_id in event_ids}, requested_ids)
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f'Error in bulk delete: {str(e)}')
+        return jsonify({'error': f'Failed to delete events: {str(e)}'}), 500
+
+def _parse_calendar_bound(value, name):
+    """ISO date or datetime query argument; a bare date means midnight"""
+    if not value:
+        raise ValueError(f'{name} is required')
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f'{name} must be an ISO 8601 date or datetime')
+
+def _bucket_start(moment, granularity):
+    day = datetime(moment.year, moment.month, moment.day)
+    if granularity == 'day':
+        return day
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+def _next_bucket(start, granularity):
+    if granularity == 'day':
+        return start + timedelta(days=1)
+    if granularity == 'week':
+        return start + timedelta(days=7)
+    return start.replace(year=start.year + start.month // 12, month=start.month % 12 + 1)
+
+def _bucket_label(start, granularity):
+    return start.strftime('%Y-%m' if granularity == 'month' else '%Y-%m-%d')
+
+def _bucket_sql(column, granularity):
+    """SQL expression giving the same label as _bucket_label for a datetime column (weeks start on Monday)"""
+    if db.engine.dialect.name == 'postgresql':
+        return func.to_char(func.date_trunc(granularity, column), 'YYYY-MM' if granularity == 'month' else 'YYYY-MM-DD')
+    if granularity == 'week':
+        return func.date(column, '-6 days', 'weekday 1')
+    return func.strftime('%Y-%m' if granularity == 'month' else '%Y-%m-%d', column)
+
+def _calendar_scope(model):
+    """Filters for the viewer's events of ``model`` (Event or ArchivedEvent) and the optional status"""
+    scope = []
+    owner_scope = owner_filter(model.user_id)
+    if owner_scope is not None:
+        scope.append(owner_scope)
+    if request.args.get('status'):
+        scope.append(model.status == request.args['status'])
+    return scope
+
+def _calendar_sources(range_start):
+    """(projection, model) pairs to read; the archive only when the range reaches back into it"""
+    sources = [(EVENT, Event)]
+    horizon = archive_summary.horizon()
+    if horizon is not None and range_start <= horizon:
+        sources.append((ARCHIVED_EVENT, ArchivedEvent))
+    return sources
+
+def _calendar_counts(model, scope, range_start, range_end, granularity, counts=None):
+    """Per-bucket counts of events overlapping each bucket, plus the number of distinct events.
+
+    Events starting inside the range are counted per start bucket with a
+    GROUP BY over the start_datetime index. Only events that span several
+    buckets (or began before the range) are fetched, to add them to the
+    later buckets they overlap. Pass ``counts`` to add to another model's counts.
+    """
+    counts = {} if counts is None else counts
+    start_bucket = _bucket_sql(model.start_datetime, granularity)
+    total = 0
+    for label, count in db.session.query(start_bucket, func.count(model.id)) \
+            .filter(*scope, model.start_datetime >= range_start, model.start_datetime < range_end) \
+            .group_by(start_bucket):
+        counts[label] = counts.get(label, 0) + count
+        total += count
+    
+    spanning = db.session.query(model.start_datetime, model.end_datetime).filter(
+        *scope,
+        model.end_datetime >= range_start,
+        model.start_datetime < range_end,
+        or_(_bucket_sql(model.end_datetime, granularity) > start_bucket, model.start_datetime < range_start)
+    )
+    for event_start, event_end in spanning:
+        if event_start < range_start:
+            total += 1
+            bucket = _bucket_start(range_start, granularity)
+        else:
+            # The start bucket was already counted by the GROUP BY
+            bucket = _next_bucket(_bucket_start(event_start, granularity), granularity)
+        while bucket <= event_end and bucket < range_end:
+            label = _bucket_label(bucket, granularity)
+            counts[label] = counts.get(label, 0) + 1
+            bucket = _next_bucket(bucket, granularity)
+    return counts, total
+
+@bp.route('/api/events/calendar')
+@login_required
+@conditional(lambda: stamp_validators('event', 'event_archive'))
+def api_event_calendar():
+    """Events overlapping [from, to) for calendar views.
+
+    ``from``/``to`` are ISO dates or datetimes; a date-only ``to`` includes
+    that whole day. An event overlaps the range if it starts before ``to``
+    and ends (or, without an end, starts) on or after ``from``.
+
+    ``view=counts`` (default) returns the number of events overlapping each
+    day/week/month bucket (``granularity``; weeks start on Monday).
+    ``view=events`` returns compact event summaries ordered by start
+    (columns selectable with ``fields``, see serialization.EVENT).
+    Optional ``status`` filters by event status. Medical reps only see their
+    own events. Ranges reaching back to archived events include them.
+    """
+    granularity = request.args.get('granularity', 'day')
+    view = request.args.get('view', 'counts')
+    try:
+        range_start = _parse_calendar_bound(request.args.get('from'), 'from')
+        range_end = _parse_calendar_bound(request.args.get('to'), 'to')
+        if len(request.args['to']) == 10:
+            range_end += timedelta(days=1)
+        if range_end <= range_start:
+            raise ValueError('to must be after from')
+        if granularity not in CALENDAR_GRANULARITIES:
+            raise ValueError(f'granularity must be one of: {", ".join(CALENDAR_GRANULARITIES)}')
+        if view not in ('counts', 'events'):
+            raise ValueError('view must be counts or events')
+        fields = EVENT.parse_fields()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    result = {
+        'from': range_start.isoformat(),
+        'to': range_end.isoformat(),
+        'granularity': granularity,
+    }
+    try:
+        sources = _calendar_sources(range_start)
+        if view == 'events':
+            # Sort keys follow the selected fields; serialize() ignores them
+            per_source = [projection.query(fields).add_columns(model.start_datetime, model.id).filter(
+                *_calendar_scope(model),
+                model.start_datetime < range_end,
+                or_(model.start_datetime >= range_start, model.end_datetime >= range_start)
+            ).order_by(model.start_datetime, model.id).limit(MAX_CALENDAR_EVENTS + 1).all()
+                for projection, model in sources]
+            rows = list(heapq.merge(*per_source, key=lambda row: tuple(row)[-2:]))[:MAX_CALENDAR_EVENTS + 1]
+            
+            result['events'] = EVENT.serialize(rows[:MAX_CALENDAR_EVENTS], fields)
+            result['truncated'] = len(rows) > MAX_CALENDAR_EVENTS
+            return json_response(result)
+        
+        buckets = []
+        bucket = _bucket_start(range_start, granularity)
+        while bucket < range_end:
+            buckets.append(bucket)
+            if len(buckets) > MAX_CALENDAR_BUCKETS:
+                return jsonify({'error': f'Range has more than {MAX_CALENDAR_BUCKETS} buckets; use a coarser granularity'}), 400
+            bucket = _next_bucket(bucket, granularity)
+        
+        counts, total = {}, 0
+        for _, model in sources:
+            counts, model_total = _calendar_counts(model, _calendar_scope(model), range_start, range_end, granularity, counts)
+            total += model_total
+        result['buckets'] = [{
+            'start': _bucket_label(bucket, granularity),
+            'count': counts.get(_bucket_label(bucket, granularity), 0)
+        } for bucket in buckets]
+        result['total'] = total
+        return json_response(result)
+    except Exception as e:
+        current_app.logger.error(f'Error building event calendar: {str(e)}')
+        return jsonify({'error': f'Failed to load calendar: {str(e)}'}), 500
+
+def _conflict_slot(item, position):
+    """Planned slot for conflicts.check_programme from one request item; raises ValueError"""
+    if not isinstance(item, dict):
+        raise ValueError(f'events[{position}] must be an object')
+    try:
+        start = datetime.fromisoformat(item.get('start_datetime'))
+    except (TypeError, ValueError):
+        raise ValueError(f'events[{position}].start_datetime must be an ISO 8601 datetime')
+    end = None
+    if item.get('end_datetime'):
+        try:
+            end = datetime.fromisoformat(item['end_datetime'])
+        except (TypeError, ValueError):
+            raise ValueError(f'events[{position}].end_datetime must be an ISO 8601 datetime')
+        if end < start:
+            raise ValueError(f'events[{position}] ends before it starts')
+    user_id = item.get('user_id', current_user.id)
+    for field, value in (('user_id', user_id), ('venue_id', item.get('venue_id')), ('id', item.get('id'))):
+        if value is not None and (not isinstance(value, int) or isinstance(value, bool)):
+            raise ValueError(f'events[{position}].{field} must be an integer')
+    if user_id != current_user.id and not sees_all_events():
+        raise PermissionError('Medical reps can only check their own events')
+    # Any known spelling of a governorate books the same slot
+    governorate = None
+    if item.get('governorate'):
+        if not isinstance(item['governorate'], str):
+            raise ValueError(f'events[{position}].governorate must be a string')
+        governorate = get_reference_data().resolve_governorate(item['governorate'])
+        if governorate is None:
+            raise ValueError(f'events[{position}]: unknown governorate "{item["governorate"]}"')
+    return {
+        'start': start,
+        'end': end,
+        'user_id': user_id,
+        'governorate': governorate.name if governorate else None,
+        'governorate_id': governorate.id if governorate else None,
+        'venue_id': item.get('venue_id'),
+        'is_online': bool(item.get('is_online')),
+        'id': item.get('id'),
+    }
+
+@bp.route('/api/events/conflicts', methods=['POST'])
+@login_required
+def api_event_conflicts():
+    """Check a whole planned programme for double bookings in one request.
+
+    Body: ``{"events": [{"start_datetime", "end_datetime", "user_id",
+    "governorate", "venue_id", "is_online", "id"}, ...], "dimensions": [...]}``.
+    Only start_datetime is required; user_id defaults to the caller and ``id``
+    marks an existing event being moved. ``dimensions`` limits the checks to
+    some of creator, venue and governorate. Each planned event gets the
+    existing events it overlaps and the indexes of the other planned events
+    it clashes with. Names of other users' events are only shown to admins
+    and event managers.
+    """
+    payload = request.get_json(silent=True) or {}
+    items = payload.get('events')
+    dimensions = payload.get('dimensions') or list(DIMENSIONS)
+    try:
+        if not isinstance(items, list) or not items:
+            raise ValueError('events must be a non-empty list')
+        if len(items) > MAX_CONFLICT_SLOTS:
+            raise ValueError(f'At most {MAX_CONFLICT_SLOTS} events per request')
+        if not isinstance(dimensions, list) or any(name not in DIMENSIONS for name in dimensions):
+            raise ValueError(f'dimensions must be a list of: {", ".join(DIMENSIONS)}')
+        slots = [_conflict_slot(item, position) for position, item in enumerate(items)]
+    except PermissionError as e:
+        return jsonify({'error': str(e)}), 403
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        results = check_programme(slots, dimensions=tuple(dimensions))
+        event_ids = {conflict[1] for existing, _ in results for conflict in existing}
+        owners = {}
+        if event_ids:
+            owners = {event_id: (name, user_id) for event_id, name, user_id in
+                      db.session.query(Event.id, Event.name, Event.user_id).filter(Event.id.in_(event_ids))}
+        show_all = sees_all_events()
+        
+        response = []
+        for index, (existing, planned) in enumerate(results):
+            conflicts = []
+            for dimension, event_id, start, end in existing:
+                conflict = {'dimension': dimension, 'event_id': event_id,
+                            'start_datetime': start, 'end_datetime': end}
+                name, owner_id = owners.get(event_id, (None, None))
+                if show_all or owner_id == current_user.id:
+                    conflict['name'] = name
+                conflicts.append(conflict)
+            response.append({
+                'index': index,
+                'conflicts': conflicts,
+                'planned_conflicts': [{'dimension': dimension, 'index': other} for dimension, other in planned],
+            })
+        return json_response({
+            'results': response,
+            'conflicting': sum(1 for item in response if item['conflicts'] or item['planned_conflicts']),
+        })
+    except Exception as e:
+        current_app.logger.error(f'Error checking event conflicts: {str(e)}')
+        return jsonify({'error': f'Failed to check conflicts: {str(e)}'}), 500
+
+@bp.route('/api/venues')
+@login_required
+@conditional(lambda: stamp_validators('venue'))
+def api_venues():
+    """Venue typeahead: venues with a name word starting with each word of ``q``.
+
+    Optional ``governorate`` narrows the suggestions; ``limit`` defaults to 10.
+    Answered from the per-worker venue directory (see venues.py).
+    """
+    try:
+        limit = min(int(request.args.get('limit', DEFAULT_VENUE_SUGGESTIONS)), MAX_VENUE_SUGGESTIONS)
+        if limit < 1:
+            raise ValueError
+    except ValueError:
+        return jsonify({'error': f'limit must be between 1 and {MAX_VENUE_SUGGESTIONS}'}), 400
+    
+    venues = get_venue_directory().search(request.args.get('q', ''), request.args.get('governorate') or None, limit)
+    return json_response({'venues': [venue._asdict() for venue in venues]})
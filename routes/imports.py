@@ -0,0 +1,485 @@
+"""
+Spreadsheet imports: bulk user upload, background bulk event import, their
+templates and the chunked upload API that large files arrive through
+"""
+
+import os
+import uuid
+from flask import Blueprint, abort, current_app, render_template, request, flash, jsonify, redirect, url_for, stream_with_context
+from flask_login import login_required, current_user
+
+import audit
+import event_import
+import uploads
+from extensions import db
+from models import User, AppSetting, ImportJob, ImportRowError
+
+bp = Blueprint('imports', __name__)
+
+@bp.route('/api/download/users-template')
+@login_required
+def download_users_template():
+    """Download Excel template for bulk user creation"""
+    from flask import make_response
+    import io
+    import pandas as pd
+    
+    # Create sample data for the template - Required columns first
+    sample_data = {
+        'Email': ['ahmed.hassan@example.com', 'sarah.mohamed@example.com', 'mohamed.ali@example.com'],
+        'Role': ['medical_rep', 'event_manager', 'admin'],
+        'Password': ['SecurePass123!', 'MyPassword456#', 'AdminPass789$'],
+        'Full Name': ['Dr. Ahmed Hassan', 'Dr. Sarah Mohamed', 'Dr. Mohamed Ali'],  # Optional field
+        'Department': ['Cardiology', 'Neurology', 'Administration'],
+        'Phone': ['+20 123 456 7890', '+20 987 654 3210', '+20 555 123 4567'],
+        'Employee ID': ['EMP001', 'EMP002', 'EMP003']
+    }
+    
+    df = pd.DataFrame(sample_data)
+    
+    # Create Excel file in memory
+    output = io.BytesIO()
+    with pd.ExcelWriter(output, engine='openpyxl') as writer:
+        df.to_excel(writer, index=False, sheet_name='Users')
+    output.seek(0)
+    
+    # Create response
+    response = make_response(output.getvalue())
+    response.headers['Content-Type'] = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    response.headers['Content-Disposition'] = 'attachment; filename=users_template.xlsx'
+    
+    return response
+
+@bp.route('/bulk-user-upload', methods=['GET', 'POST'])
+@login_required
+def bulk_user_upload():
+    """Handle bulk user creation from Excel file"""
+    app_name = AppSetting.get_setting('app_name', 'PharmaEvents')
+    theme_color = AppSetting.get_setting('theme_color', '#0f6e84')
+    
+    if request.method == 'POST':
+        users_file = request.files.get('users_file')
+        # Large files arrive beforehand through the chunked upload API
+        users_upload = uploads.get_finished_upload(request.form.get('users_upload_id'), current_user.id, 'users') \
+            if request.form.get('users_upload_id') else None
+        filename = users_upload.filename if users_upload else (users_file.filename if users_file else '')
+        
+        if not filename:
+            flash('Please select a file to upload', 'danger')
+            return render_template('bulk_user_upload.html', 
+                                 app_name=app_name, theme_color=theme_color)
+        
+        # Validate file extension
+        allowed_extensions = {'xlsx', 'xls'}
+        file_ext = filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
+        
+        if file_ext not in allowed_extensions:
+            flash('Please upload an Excel file (.xlsx or .xls)', 'danger')
+            return render_template('bulk_user_upload.html', 
+                                 app_name=app_name, theme_color=theme_color)
+        
+        try:
+            # Read Excel file
+            import pandas as pd
+            if users_upload:
+                stored_path = os.path.join(current_app.config['IMPORT_UPLOAD_DIR'], f'{uuid.uuid4().hex}.{file_ext}')
+                uploads.consume_upload(users_upload, stored_path)
+                try:
+                    df = pd.read_excel(stored_path)
+                finally:
+                    os.remove(stored_path)
+            else:
+                df = pd.read_excel(users_file)
+            
+            # Flexible column matching based on actual Excel file structure
+            df_columns = df.columns.tolist()
+            current_app.logger.info(f'Excel columns found: {df_columns}')
+            
+            # Map the actual columns from the Excel file
+            email_col = None
+            password_col = None  
+            role_col = None
+            
+            for col in df_columns:
+                col_lower = col.lower().strip()
+                if 'email' in col_lower:
+                    email_col = col
+                elif 'password' in col_lower:
+                    password_col = col
+                elif 'role' in col_lower:
+                    role_col = col
+            
+            # Check if we have the required columns
+            missing_columns = []
+            if not email_col:
+                missing_columns.append('Email')
+            if not password_col:
+                missing_columns.append('Password')
+            if not role_col:
+                missing_columns.append('Role')
+            
+            if missing_columns:
+                flash(f'Missing required columns: {", ".join(missing_columns)}. Please download the template and use the correct format.', 'danger')
+                return render_template('bulk_user_upload.html', 
+                                     app_name=app_name, theme_color=theme_color)
+            
+            # Process users in batches for better performance
+            success_count = 0
+            error_count = 0
+            errors = []
+            batch_size = 50  # Process in batches of 50 users
+            
+            # Pre-validate all data first
+            users_to_create = []
+            existing_emails = set()
+            
+            # Get all existing emails in one query for efficiency
+            existing_users = db.session.query(User.email).all()
+            existing_emails = {email[0].lower() for email in existing_users}
+            
+            # Validate all rows first
+            for index, row in df.iterrows():
+                try:
+                    row_num = int(index) if isinstance(index, (int, float)) else 0
+                    email = str(row[email_col]).strip().lower() if email_col and pd.notna(row.get(email_col, '')) else ''
+                    role = str(row[role_col]).strip().lower() if role_col and pd.notna(row.get(role_col, '')) else ''
+                    user_password = str(row[password_col]).strip() if password_col and pd.notna(row.get(password_col, '')) else None
+                    
+                    # Validate required fields
+                    if not email or not role or not user_password:
+                        errors.append(f'Row {row_num + 2}: Missing required fields (Email, Password, or Role)')
+                        error_count += 1
+                        continue
+                    
+                    # Normalize role names
+                    role_mapping = {
+                        'medical rep': 'medical_rep',
+                        'medical_rep': 'medical_rep', 
+                        'event manager': 'event_manager',
+                        'event_manager': 'event_manager',
+                        'admin': 'admin'
+                    }
+                    
+                    normalized_role = role_mapping.get(role, role)
+                    valid_roles = ['admin', 'event_manager', 'medical_rep']
+                    
+                    if normalized_role not in valid_roles:
+                        errors.append(f'Row {row_num + 2}: Invalid role "{role}". Must be one of: admin, event_manager, medical_rep')
+                        error_count += 1
+                        continue
+                    
+                    # Check if user already exists
+                    if email in existing_emails:
+                        errors.append(f'Row {row_num + 2}: User with email "{email}" already exists')
+                        error_count += 1
+                        continue
+                    
+                    # Add to existing emails to catch duplicates within the file
+                    if email in [u['email'] for u in users_to_create]:
+                        errors.append(f'Row {row_num + 2}: Duplicate email "{email}" in file')
+                        error_count += 1
+                        continue
+                    
+                    users_to_create.append({
+                        'email': email,
+                        'role': normalized_role,
+                        'password': user_password
+                    })
+                    
+                except Exception as e:
+                    row_num = int(index) if isinstance(index, (int, float)) else 0
+                    errors.append(f'Row {row_num + 2}: {str(e)}')
+                    error_count += 1
+            
+            # Create users in batches
+            try:
+                for i in range(0, len(users_to_create), batch_size):
+                    batch = users_to_create[i:i + batch_size]
+                    
+                    new_users = []
+                    for user_data in batch:
+                        new_user = User()
+                        new_user.email = user_data['email']
+                        new_user.role = user_data['role']
+                        new_user.set_password(user_data['password'])
+                        db.session.add(new_user)
+                        new_users.append(new_user)
+                        success_count += 1
+                    
+                    # Ids are known after the flush; reading them after the commit would reload each user
+                    db.session.flush()
+                    created = [(new_user.id, new_user.email, new_user.role) for new_user in new_users]
+                    # Commit each batch
+                    db.session.commit()
+                    for user_id, email, role in created:
+                        audit.record('user.create', 'user', user_id, {'email': email, 'role': role, 'source': filename})
+                    current_app.logger.info(f'Processed batch {i//batch_size + 1}, created {len(batch)} users')
+                
+                # Flash success/error messages
+                if success_count > 0:
+                    flash(f'Successfully created {success_count} users!', 'success')
+                
+                if error_count > 0:
+                    flash(f'Failed to create {error_count} users. See details below.', 'warning')
+                    for error in errors[:10]:  # Show first 10 errors
+                        flash(error, 'danger')
+                    if len(errors) > 10:
+                        flash(f'... and {len(errors) - 10} more errors', 'danger')
+                        
+            except Exception as e:
+                db.session.rollback()
+                current_app.logger.error(f'Error committing bulk user creation: {str(e)}')
+                flash(f'Database error: {str(e)}', 'danger')
+            
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f'Error processing bulk user upload: {str(e)}')
+            flash(f'Error processing file: {str(e)}', 'danger')
+    
+    return render_template('bulk_user_upload.html', 
+                         app_name=app_name, theme_color=theme_color)
+
+
+@bp.route('/api/download/events-template')
+@login_required
+def download_events_template():
+    """Download Excel template for bulk event import"""
+    from flask import make_response
+    import io
+    import pandas as pd
+    
+    sample_data = {
+        'Name': ['Cardiology Update 2025', 'Diabetes Care Webinar'],
+        'Description': ['Quarterly update on heart failure management', 'New guidelines in type 2 diabetes'],
+        'Event Type': ['Conference', 'Webinar'],
+        'Categories': ['Cardiology, Medical Education', 'Endocrinology'],
+        'Start Date': ['2025-03-10', '2025-03-18'],
+        'Start Time': ['09:00', '18:00'],
+        'End Date': ['2025-03-10', '2025-03-18'],
+        'End Time': ['17:00', '19:30'],
+        'Online': ['No', 'Yes'],
+        'Governorate': ['Cairo', '']
+    }
+    
+    df = pd.DataFrame(sample_data, columns=event_import.TEMPLATE_COLUMNS)
+    
+    output = io.BytesIO()
+    with pd.ExcelWriter(output, engine='openpyxl') as writer:
+        df.to_excel(writer, index=False, sheet_name='Events')
+    output.seek(0)
+    
+    response = make_response(output.getvalue())
+    response.headers['Content-Type'] = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    response.headers['Content-Disposition'] = 'attachment; filename=events_template.xlsx'
+    
+    return response
+
+def _get_job_or_404(job_id):
+    """Import job visible to the current user (their own, or any for admins)"""
+    job = ImportJob.query.get_or_404(job_id)
+    if job.user_id != current_user.id and not current_user.is_admin():
+        abort(404)
+    return job
+
+@bp.route('/bulk-event-upload', methods=['GET', 'POST'])
+@login_required
+def bulk_event_upload():
+    """Upload a spreadsheet of events; rows are imported by a background job"""
+    app_name = AppSetting.get_setting('app_name', 'PharmaEvents')
+    theme_color = AppSetting.get_setting('theme_color', '#0f6e84')
+    
+    if request.method == 'POST':
+        events_file = request.files.get('events_file')
+        # Large files arrive beforehand through the chunked upload API
+        events_upload = uploads.get_finished_upload(request.form.get('events_upload_id'), current_user.id, 'events') \
+            if request.form.get('events_upload_id') else None
+        filename = events_upload.filename if events_upload else (events_file.filename if events_file else '')
+        if not filename:
+            flash('Please select a file to upload', 'danger')
+            return redirect(url_for('imports.bulk_event_upload'))
+        
+        file_ext = filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
+        if file_ext not in event_import.ALLOWED_EXTENSIONS:
+            flash('Please upload an Excel (.xlsx) or CSV file', 'danger')
+            return redirect(url_for('imports.bulk_event_upload'))
+        
+        try:
+            upload_dir = current_app.config['IMPORT_UPLOAD_DIR']
+            os.makedirs(upload_dir, exist_ok=True)
+            stored_path = os.path.join(upload_dir, f'{uuid.uuid4().hex}.{file_ext}')
+            if events_upload:
+                uploads.consume_upload(events_upload, stored_path)
+            else:
+                events_file.save(stored_path)
+            
+            # Reject files without the required columns before queueing a job
+            rows = event_import.iter_sheet(stored_path)
+            header = next(rows, None)
+            rows.close()
+            try:
+                event_import.map_columns(header or [])
+            except ValueError as e:
+                os.remove(stored_path)
+                flash(f'{str(e)}. Please download the template and use the correct format.', 'danger')
+                return redirect(url_for('imports.bulk_event_upload'))
+            
+            job = ImportJob(user_id=current_user.id, filename=filename[:255], stored_path=stored_path)
+            db.session.add(job)
+            db.session.commit()
+            
+            if event_import.claim_job(job.id, current_app.config['IMPORT_STALE_SECONDS']):
+                event_import.start_job(current_app._get_current_object(), job.id)
+            flash(f'Import of "{job.filename}" started. Progress is shown below.', 'success')
+            return redirect(url_for('imports.bulk_event_upload', job=job.id))
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f'Error starting event import: {str(e)}')
+            flash(f'Error processing file: {str(e)}', 'danger')
+            return redirect(url_for('imports.bulk_event_upload'))
+    
+    stale_seconds = current_app.config['IMPORT_STALE_SECONDS']
+    jobs = ImportJob.query.filter_by(user_id=current_user.id) \
+        .order_by(ImportJob.created_at.desc()).limit(10).all()
+    return render_template('bulk_event_upload.html',
+                         app_name=app_name, theme_color=theme_color,
+                         jobs=[event_import.job_to_dict(job, stale_seconds) for job in jobs],
+                         active_job_id=request.args.get('job', type=int))
+
+@bp.route('/api/imports/<int:job_id>')
+@login_required
+def api_import_status(job_id):
+    """Progress of an import job"""
+    job = _get_job_or_404(job_id)
+    return jsonify(event_import.job_to_dict(job, current_app.config['IMPORT_STALE_SECONDS']))
+
+@bp.route('/api/imports/<int:job_id>/resume', methods=['POST'])
+@login_required
+def api_import_resume(job_id):
+    """Continue a failed or abandoned import job from its last committed batch"""
+    job = _get_job_or_404(job_id)
+    if job.status == 'completed':
+        return jsonify({'error': 'Import already completed'}), 400
+    if not os.path.exists(job.stored_path):
+        return jsonify({'error': 'The uploaded file is no longer available; please upload it again'}), 410
+    
+    stale_seconds = current_app.config['IMPORT_STALE_SECONDS']
+    if not event_import.claim_job(job.id, stale_seconds, include_failed=True):
+        return jsonify({'error': 'Import is already running'}), 409
+    event_import.start_job(current_app._get_current_object(), job.id)
+    db.session.refresh(job)
+    return jsonify(event_import.job_to_dict(job, stale_seconds))
+
+@bp.route('/api/imports/<int:job_id>/errors')
+@login_required
+def api_import_errors(job_id):
+    """Per-row error report of an import job as CSV"""
+    from flask import Response
+    import csv
+    import io
+    
+    job = _get_job_or_404(job_id)
+    
+    def generate():
+        output = io.StringIO()
+        writer = csv.writer(output)
+        writer.writerow(['Row', 'Error'])
+        rows = ImportRowError.query.filter_by(job_id=job.id) \
+            .order_by(ImportRowError.row_number).yield_per(500)
+        for error in rows:
+            writer.writerow([error.row_number, error.message])
+            if output.tell() > 8192:
+                yield output.getvalue()
+                output.seek(0)
+                output.truncate()
+        yield output.getvalue()
+    
+    response = Response(stream_with_context(generate()), mimetype='text/csv')
+    response.headers['Content-Disposition'] = f'attachment; filename=import_{job.id}_errors.csv'
+    return response
+
+def _upload_response(upload, status=200):
+    """Upload state as JSON, with the tus-style Upload-Offset/Upload-Length headers"""
+    response = jsonify(uploads.upload_to_dict(upload))
+    response.status_code = status
+    response.headers['Upload-Offset'] = str(upload.received)
+    response.headers['Upload-Length'] = str(upload.length)
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+def _get_upload_or_404(upload_id):
+    upload = uploads.get_upload(upload_id, current_user.id)
+    if upload is None:
+        abort(404)
+    return upload
+
+@bp.route('/api/uploads', methods=['POST'])
+@login_required
+def api_create_upload():
+    """Start a chunked upload (see uploads.py)"""
+    data = request.get_json(silent=True) or request.form
+    try:
+        length = int(data.get('length', 0))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Length must be a positive number of bytes'}), 400
+    try:
+        uploads.expire_uploads()
+        upload = uploads.create_upload(current_user.id, data.get('filename'), length,
+                                       data.get('purpose'), data.get('checksum') or None)
+    except uploads.UploadError as e:
+        return jsonify({'error': str(e)}), e.status
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f'Error creating upload: {str(e)}')
+        return jsonify({'error': 'Failed to start upload'}), 500
+    response = _upload_response(upload, 201)
+    response.headers['Location'] = url_for('imports.api_upload_status', upload_id=upload.id)
+    return response
+
+@bp.route('/api/uploads/<upload_id>', methods=['GET'])
+@login_required
+def api_upload_status(upload_id):
+    """Offset to resume from (also answers HEAD)"""
+    return _upload_response(_get_upload_or_404(upload_id))
+
+@bp.route('/api/uploads/<upload_id>', methods=['PATCH'])
+@login_required
+def api_upload_chunk(upload_id):
+    """Append the request body at Upload-Offset"""
+    upload = _get_upload_or_404(upload_id)
+    offset = request.headers.get('Upload-Offset', type=int)
+    if offset is None:
+        return jsonify({'error': 'Upload-Offset header is required'}), 400
+    try:
+        # request.stream reads the body as it arrives instead of buffering it
+        uploads.append_chunk(upload, offset, request.stream, request.content_length,
+                             request.headers.get('Upload-Checksum'))
+    except uploads.UploadError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), e.status
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f'Error receiving chunk of upload {upload_id}: {str(e)}')
+        return jsonify({'error': 'Failed to store chunk'}), 500
+    return _upload_response(_get_upload_or_404(upload_id))
+
+@bp.route('/api/uploads/<upload_id>/finalize', methods=['POST'])
+@login_required
+def api_finalize_upload(upload_id):
+    """Verify a fully received upload so a form can use it"""
+    upload = _get_upload_or_404(upload_id)
+    try:
+        uploads.finalize_upload(upload)
+    except uploads.UploadError as e:
+        return jsonify({'error': str(e)}), e.status
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f'Error finalizing upload {upload_id}: {str(e)}')
+        return jsonify({'error': 'Failed to finalize upload'}), 500
+    return _upload_response(upload)
+
+@bp.route('/api/uploads/<upload_id>', methods=['DELETE'])
+@login_required
+def api_delete_upload(upload_id):
+    """Abandon an upload"""
+    uploads.delete_upload(_get_upload_or_404(upload_id))
+    return jsonify({'success': True})
@@ -0,0 +1,657 @@
+"""
+Admin settings: branding, reference data, user management, request profiles,
+worker memory figures and the audit trail
+"""
+
+import os
+from datetime import datetime
+from sqlalchemy import and_, func
+from flask import Blueprint, current_app, render_template, flash
+from flask_login import login_required, current_user
+
+import audit
+import memory
+import profiling
+from extensions import db
+from models import User, AppSetting, ArchivedEvent, Event, EventCategory, EventType, Venue, archived_event_categories, event_categories
+from reference_data import get_reference_data, reference_cache
+from serialization import EVENT_CATEGORY, EVENT_TYPE, USER, json_response
+from venues import normalize_name, venue_cache
+
+bp = Blueprint('settings', __name__)
+
+USER_ROLES = ('admin', 'event_manager', 'medical_rep')
+
+# ?sort= keys of the user list (prefix with - for descending). Email is
+# unique, so it breaks ties and keeps pages stable.
+USER_SORTS = {
+    'email': (User.email,),
+    'role': (User.role, User.email),
+    'id': (User.id,),
+}
+USERS_PER_PAGE = 50
+MAX_USERS_PER_PAGE = 200
+AUDIT_PER_PAGE = 50
+MAX_AUDIT_PER_PAGE = 500
+
+def _email_prefix_filter(prefix):
+    """Range condition matching emails that start with ``prefix``.
+
+    Emails are stored lowercased; a range (unlike LIKE, which is
+    case-insensitive in SQLite) can be answered from the email indexes.
+    """
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return and_(User.email >= prefix, User.email < upper)
+
+@bp.route('/settings')
+@login_required
+def settings():
+    # Get app settings from database
+    app_name = AppSetting.get_setting('app_name', 'PharmaEvents')
+    theme_color = AppSetting.get_setting('theme_color', '#0f6e84')
+    
+    # Categories and event types from the reference-data cache
+    try:
+        reference = get_reference_data()
+        categories, event_types = reference.categories, reference.event_types
+    except Exception as e:
+        current_app.logger.error(f'Error fetching categories and event types: {str(e)}')
+        categories, event_types = [], []
+    
+    # Users are not rendered here; settings.js pages through /api/users/list
+    
+    app_logo = AppSetting.get_setting('app_logo')
+    main_tagline = AppSetting.get_setting('main_tagline')
+    main_header = AppSetting.get_setting('main_header')
+    app_description = AppSetting.get_setting('app_description')
+    feature1_title = AppSetting.get_setting('feature1_title')
+    feature1_description = AppSetting.get_setting('feature1_description')
+    feature2_title = AppSetting.get_setting('feature2_title')
+    feature2_description = AppSetting.get_setting('feature2_description')
+    return render_template('settings.html',
+                         app_name=app_name,
+                         app_logo=app_logo,
+                         theme_color=theme_color,
+                         main_tagline=main_tagline,
+                         main_header=main_header,
+                         app_description=app_description,
+                         feature1_title=feature1_title,
+                         feature1_description=feature1_description,
+                         feature2_title=feature2_title,
+                         feature2_description=feature2_description,
+                         categories=categories,
+                         event_types=event_types,
+                         user_roles=USER_ROLES)
+
+@bp.route('/api/settings/theme', methods=['POST'])
+def api_update_theme():
+    from flask import jsonify, request
+    try:
+        current_app.logger.info(f'Theme update request: authenticated={current_user.is_authenticated}')
+        
+        # Check if user is authenticated
+        if not current_user.is_authenticated:
+            current_app.logger.warning('Unauthenticated theme update attempt')
+            return jsonify({'error': 'Not authenticated', 'debug': 'User not logged in'}), 401
+            
+        data = request.get_json()
+        current_app.logger.info(f'Theme update data: {data}')
+        
+        if not data or 'theme_color' not in data:
+            return jsonify({'error': 'Theme color is required'}), 400
+        
+        theme_color = data['theme_color']
+        # Save to database
+        AppSetting.set_setting('theme_color', theme_color)
+        current_app.logger.info(f'Theme color saved: {theme_color}')
+        # Don't flash message for API calls - JavaScript handles notifications
+        return jsonify({'success': True, 'theme_color': theme_color})
+    except Exception as e:
+        current_app.logger.error(f'Error in api_update_theme: {str(e)}')
+        return jsonify({'error': str(e), 'debug': 'Server error occurred'}), 500
+
+@bp.route('/api/settings/app', methods=['POST'])
+def api_update_app_settings():
+    from flask import jsonify, request
+    try:
+        # Check if user is authenticated
+        if not current_user.is_authenticated:
+            return jsonify({'error': 'Not authenticated'}), 401
+            
+        data = request.get_json()
+        if not data:
+            return jsonify({'error': 'No data provided'}), 400
+        
+        # Save to database
+        if 'name' in data:
+            AppSetting.set_setting('app_name', data['name'])
+            # Don't flash message for API calls - JavaScript handles notifications
+        return jsonify({'success': True})
+    except Exception as e:
+        current_app.logger.error(f'Error in api_update_app_settings: {str(e)}')
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/api/settings/login-content', methods=['POST'])
+@login_required
+def api_update_login_content():
+    from flask import jsonify, request
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({'error': 'No data provided'}), 400
+        
+        # Save each field to database
+        if 'main_tagline' in data:
+            AppSetting.set_setting('main_tagline', data['main_tagline'])
+        if 'main_header' in data:
+            AppSetting.set_setting('main_header', data['main_header'])
+        if 'app_description' in data:
+            AppSetting.set_setting('app_description', data['app_description'])
+        if 'feature1_title' in data:
+            AppSetting.set_setting('feature1_title', data['feature1_title'])
+        if 'feature1_description' in data:
+            AppSetting.set_setting('feature1_description', data['feature1_description'])
+        if 'feature2_title' in data:
+            AppSetting.set_setting('feature2_title', data['feature2_title'])
+        if 'feature2_description' in data:
+            AppSetting.set_setting('feature2_description', data['feature2_description'])
+        
+        return jsonify({'success': True})
+    except Exception as e:
+        current_app.logger.error(f'Error updating login content: {str(e)}')
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/api/settings/logo', methods=['POST'])
+@login_required
+def api_upload_logo():
+    from flask import jsonify, request, make_response
+    try:
+        if 'logo' not in request.files:
+            return jsonify({'error': 'No logo file provided'}), 400
+        
+        logo_file = request.files['logo']
+        if logo_file.filename == '':
+            return jsonify({'error': 'No file selected'}), 400
+        
+        # Validate file type
+        allowed_extensions = {'png', 'jpg', 'jpeg', 'svg'}
+        if logo_file.filename and '.' in logo_file.filename:
+            file_ext = logo_file.filename.rsplit('.', 1)[1].lower()
+        else:
+            file_ext = ''
+        
+        if file_ext not in allowed_extensions:
+            return jsonify({'error': 'Invalid file type. Please upload PNG, JPG, JPEG, or SVG files only.'}), 400
+        
+        # Create uploads directory if it doesn't exist
+        upload_folder = os.path.join(current_app.static_folder or 'static', 'uploads')
+        os.makedirs(upload_folder, exist_ok=True)
+        
+        # Generate unique filename
+        logo_filename = f"logo_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{file_ext}"
+        logo_path = os.path.join(upload_folder, logo_filename)
+        
+        # Save the file
+        logo_file.save(logo_path)
+        
+        # Store logo path in settings
+        logo_url = f"/static/uploads/{logo_filename}"
+        AppSetting.set_setting('app_logo', logo_url)
+        
+        current_app.logger.info(f'Logo uploaded successfully: {logo_url}')
+        return jsonify({'success': True, 'logo_url': logo_url, 'message': 'Logo uploaded successfully!'})
+        
+    except Exception as e:
+        current_app.logger.error(f'Error uploading logo: {str(e)}')
+        return jsonify({'error': f'Failed to upload logo: {str(e)}'}), 500
+
+@bp.route('/api/categories', methods=['POST'])
+@login_required
+def api_add_category():
+    from flask import jsonify, request
+    if not current_user.is_admin():
+        return jsonify({'error': 'Admin privileges required'}), 403
+    category_name = request.form.get('category_name', '').strip()
+    if not category_name:
+        return jsonify({'error': 'Category name is required'}), 400
+    
+    try:
+        if EventCategory.query.filter(db.func.lower(EventCategory.name) == category_name.lower()).first():
+            return jsonify({'error': f'Category "{category_name}" already exists'}), 400
+        
+        category = EventCategory(name=category_name)
+        db.session.add(category)
+        db.session.commit()
+        reference_cache.invalidate()
+        audit.record('category.create', 'category', category.id, {'name': category_name})
+        
+        flash(f'Category "{category_name}" added successfully', 'success')
+        return jsonify({'success': True, 'id': category.id, 'name': category.name})
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f'Error adding category: {str(e)}')
+        return jsonify({'error': f'Failed to add category: {str(e)}'}), 500
+
+@bp.route('/api/categories/<int:category_id>', methods=['DELETE'])
+@login_required
+def api_delete_category(category_id):
+    from flask import jsonify
+    if not current_user.is_admin():
+        return jsonify({'error': 'Admin privileges required'}), 403
+    
+    try:
+        category = EventCategory.query.get_or_404(category_id)
+        # Archived events still show their categories
+        event_count = db.session.query(event_categories).filter(event_categories.c.category_id == category_id).count() \
+            + db.session.query(archived_event_categories).filter(archived_event_categories.c.category_id == category_id).count()
+        if event_count > 0:
+            return jsonify({'error': f'Cannot delete category {category.name} - it is used by {event_count} events'}), 400
+        
+        category_name = category.name
+        db.session.delete(category)
+        db.session.commit()
+        reference_cache.invalidate()
+        audit.record('category.delete', 'category', category_id, {'name': category_name})
+        
+        flash('Category deleted successfully', 'success')
+        return jsonify({'success': True})
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f'Error deleting category: {str(e)}')
+        return jsonify({'error': f'Failed to delete category: {str(e)}'}), 500
+
+def _venue_capacity(value):
+    """Capacity form value as a positive int or None; raises ValueError"""
+    if value is None or not value.strip():
+        return None
+    capacity = int(value)
+    if capacity <= 0:
+        raise ValueError
+    return capacity
+
+@bp.route('/api/venues', methods=['POST'])
+@login_required
+def api_add_venue():
+    from flask import jsonify, request
+    if not current_user.is_admin():
+        return jsonify({'error': 'Admin privileges required'}), 403
+    venue_name = ' '.join(request.form.get('venue_name', '').split())
+    governorate = request.form.get('governorate', '').strip() or None
+    if not venue_name:
+        return jsonify({'error': 'Venue name is required'}), 400
+    if governorate:
+        governorate_record = get_reference_data().resolve_governorate(governorate)
+        if governorate_record is None:
+            return jsonify({'error': f'Unknown governorate "{governorate}"'}), 400
+        governorate = governorate_record.name
+    try:
+        capacity = _venue_capacity(request.form.get('capacity'))
+    except ValueError:
+        return jsonify({'error': 'Capacity must be a positive whole number'}), 400
+    
+    try:
+        same_governorate = Venue.governorate.is_(None) if governorate is None else Venue.governorate == governorate
+        if Venue.query.filter(Venue.search_name == normalize_name(venue_name), same_governorate).first():
+            return jsonify({'error': f'Venue "{venue_name}" already exists'}), 400
+        
+        venue = Venue(name=venue_name, search_name=normalize_name(venue_name), governorate=governorate,
+                      address=request.form.get('address', '').strip() or None, capacity=capacity)
+        db.session.add(venue)
+        db.session.commit()
+        venue_cache.invalidate()
+        audit.record('venue.create', 'venue', venue.id, {'name': venue.name, 'governorate': venue.governorate,
+                                                         'capacity': venue.capacity, 'address': venue.address})
+        return jsonify({'success': True, 'id': venue.id, 'name': venue.name})
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f'Error adding venue: {str(e)}')
+        return jsonify({'error': f'Failed to add venue: {str(e)}'}), 500
+
+@bp.route('/api/venues/<int:venue_id>', methods=['PATCH'])
+@login_required
+def api_update_venue(venue_id):
+    """Set a venue's capacity and/or address (venues added from event forms have neither)"""
+    from flask import jsonify, request
+    if not current_user.is_admin():
+        return jsonify({'error': 'Admin privileges required'}), 403
+    
+    venue = db.session.get(Venue, venue_id)
+    if venue is None:
+        return jsonify({'error': 'Venue not found'}), 404
+    previous = {'capacity': venue.capacity, 'address': venue.address}
+    try:
+        if 'capacity' in request.form:
+            venue.capacity = _venue_capacity(request.form['capacity'])
+    except ValueError:
+        return jsonify({'error': 'Capacity must be a positive whole number'}), 400
+    
+    try:
+        if 'address' in request.form:
+            venue.address = request.form['address'].strip() or None
+        db.session.commit()
+        venue_cache.invalidate()
+        audit.record('venue.update', 'venue', venue_id, {'name': venue.name, 'old': previous,
+                                                         'new': {'capacity': venue.capacity, 'address': venue.address}})
+        return jsonify({'success': True, 'id': venue.id, 'capacity': venue.capacity, 'address': venue.address})
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f'Error updating venue: {str(e)}')
+        return jsonify({'error': f'Failed to update venue: {str(e)}'}), 500
+
+@bp.route('/api/venues/<int:venue_id>', methods=['DELETE'])
+@login_required
+def api_delete_venue(venue_id):
+    from flask import jsonify
+    if not current_user.is_admin():
+        return jsonify({'error': 'Admin privileges required'}), 403
+    
+    try:
+        venue = Venue.query.get_or_404(venue_id)
+        event_count = Event.query.filter_by(venue_id=venue_id).count() \
+            + ArchivedEvent.query.filter_by(venue_id=venue_id).count()
+        if event_count > 0:
+            return jsonify({'error': f'Cannot delete venue {venue.name} - it is used by {event_count} events'}), 400
+        
+        venue_name = venue.name
+        db.session.delete(venue)
+        db.session.commit()
+        venue_cache.invalidate()
+        audit.record('venue.delete', 'venue', venue_id, {'name': venue_name})
+        return jsonify({'success': True})
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f'Error deleting venue: {str(e)}')
+        return jsonify({'error': f'Failed to delete venue: {str(e)}'}), 500
+
+@bp.route('/api/event-types', methods=['POST'])
+@login_required
+def api_add_event_type():
+    from flask import jsonify, request
+    if not current_user.is_admin():
+        return jsonify({'error': 'Admin privileges required'}), 403
+    type_name = request.form.get('type_name', '').strip()
+    if not type_name:
+        return jsonify({'error': 'Event type name is required'}), 400
+    
+    try:
+        if EventType.query.filter(db.func.lower(EventType.name) == type_name.lower()).first():
+            return jsonify({'error': f'Event type "{type_name}" already exists'}), 400
+        
+        event_type = EventType(name=type_name)
+        db.session.add(event_type)
+        db.session.commit()
+        reference_cache.invalidate()
+        audit.record('event_type.create', 'event_type', event_type.id, {'name': type_name})
+        
+        flash(f'Event type "{type_name}" added successfully', 'success')
+        return jsonify({'success': True, 'id': event_type.id, 'name': event_type.name})
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f'Error adding event type: {str(e)}')
+        return jsonify({'error': f'Failed to add event type: {str(e)}'}), 500
+
+@bp.route('/api/event-types/<int:type_id>', methods=['DELETE'])
+@login_required
+def api_delete_event_type(type_id):
+    from flask import jsonify
+    if not current_user.is_admin():
+        return jsonify({'error': 'Admin privileges required'}), 403
+    
+    try:
+        event_type = EventType.query.get_or_404(type_id)
+        event_count = Event.query.filter_by(event_type_id=type_id).count() \
+            + ArchivedEvent.query.filter_by(event_type_id=type_id).count()
+        if event_count > 0:
+            return jsonify({'error': f'Cannot delete event type {event_type.name} - it is used by {event_count} events'}), 400
+        
+        type_name = event_type.name
+        db.session.delete(event_type)
+        db.session.commit()
+        reference_cache.invalidate()
+        audit.record('event_type.delete', 'event_type', type_id, {'name': type_name})
+        
+        flash('Event type deleted successfully', 'success')
+        return jsonify({'success': True})
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f'Error deleting event type: {str(e)}')
+        return jsonify({'error': f'Failed to delete event type: {str(e)}'}), 500
+
+@bp.route('/api/users', methods=['POST'])
+@login_required
+def api_add_user():
+    from flask import jsonify, request
+    try:
+        email = request.form.get('email', '').strip().lower()
+        password = request.form.get('password', '').strip()
+        role = request.form.get('role', '').strip()
+        
+        if not email or not password or not role:
+            return jsonify({'error': 'Email, password, and role are required'}), 400
+        
+        # Validate role
+        if role not in USER_ROLES:
+            return jsonify({'error': 'Invalid role specified'}), 400
+        
+        # Check if user already exists
+        existing_user = User.query.filter_by(email=email).first()
+        if existing_user:
+            return jsonify({'error': 'User with this email already exists'}), 400
+        
+        # Create new user
+        new_user = User()
+        new_user.email = email
+        new_user.role = role
+        new_user.set_password(password)
+        
+        db.session.add(new_user)
+        db.session.commit()
+        audit.record('user.create', 'user', new_user.id, {'email': email, 'role': role})
+        
+        current_app.logger.info(f'User {email} added successfully with role {role}')
+        return jsonify({
+            'success': True, 
+            'id': new_user.id, 
+            'email': new_user.email, 
+            'role': new_user.role
+        })
+        
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f'Error adding user: {str(e)}')
+        return jsonify({'error': f'Failed to add user: {str(e)}'}), 500
+
+@bp.route('/api/users/<int:user_id>', methods=['DELETE'])
+@login_required
+def api_delete_user(user_id):
+    from flask import jsonify
+    try:
+        # Prevent users from deleting themselves
+        if user_id == current_user.id:
+            return jsonify({'error': 'You cannot delete your own account'}), 400
+        
+        user = User.query.get_or_404(user_id)
+        user_email = user.email
+        
+        # Check if user has created events
+        event_count = Event.query.filter_by(user_id=user_id).count() \
+            + ArchivedEvent.query.filter_by(user_id=user_id).count()
+        if event_count > 0:
+            return jsonify({'error': f'Cannot delete user {user_email} - they have {event_count} associated events'}), 400
+        
+        user_role = user.role
+        db.session.delete(user)
+        db.session.commit()
+        audit.record('user.delete', 'user', user_id, {'email': user_email, 'role': user_role})
+        
+        current_app.logger.info(f'User {user_email} deleted successfully')
+        return jsonify({'success': True})
+        
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f'Error deleting user: {str(e)}')
+        return jsonify({'error': f'Failed to delete user: {str(e)}'}), 500
+
+@bp.route('/api/users/list', methods=['GET'])
+@login_required
+def api_list_users():
+    """One page of users.
+
+    Query parameters: page, per_page, sort (email, role or id; prefix with -
+    for descending), role, q (email prefix) and fields.
+    """
+    from flask import jsonify, request
+    try:
+        fields = USER.parse_fields()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', USERS_PER_PAGE, type=int), 1), MAX_USERS_PER_PAGE)
+    sort = request.args.get('sort', 'email').strip()
+    descending = sort.startswith('-')
+    sort_columns = USER_SORTS.get(sort.lstrip('-'))
+    if sort_columns is None:
+        return jsonify({'error': f'Invalid sort. Use one of: {", ".join(USER_SORTS)}'}), 400
+    role = request.args.get('role', '').strip()
+    if role and role not in USER_ROLES:
+        return jsonify({'error': 'Invalid role specified'}), 400
+    prefix = request.args.get('q', '').strip().lower()
+    
+    try:
+        filters = []
+        if role:
+            filters.append(User.role == role)
+        if prefix:
+            filters.append(_email_prefix_filter(prefix))
+        
+        total = db.session.query(func.count(User.id)).filter(*filters).scalar()
+        order = [column.desc() if descending else column.asc() for column in sort_columns]
+        rows = USER.query(fields).filter(*filters).order_by(*order) \
+            .offset((page - 1) * per_page).limit(per_page).all()
+        return json_response({
+            'success': True,
+            'users': USER.serialize(rows, fields),
+            'page': page,
+            'per_page': per_page,
+            'total': total,
+            'has_more': page * per_page < total,
+        })
+        
+    except Exception as e:
+        current_app.logger.error(f'Error listing users: {str(e)}')
+        return jsonify({'error': f'Failed to load users: {str(e)}'}), 500
+
+@bp.route('/api/categories', methods=['GET'])
+@login_required
+def api_list_categories():
+    from flask import jsonify
+    try:
+        fields = EVENT_CATEGORY.parse_fields()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    rows = EVENT_CATEGORY.query(fields).order_by(EventCategory.name).all()
+    return json_response({'categories': EVENT_CATEGORY.serialize(rows, fields)})
+
+@bp.route('/api/event-types', methods=['GET'])
+@login_required
+def api_list_event_types():
+    from flask import jsonify
+    try:
+        fields = EVENT_TYPE.parse_fields()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    rows = EVENT_TYPE.query(fields).order_by(EventType.name).all()
+    return json_response({'event_types': EVENT_TYPE.serialize(rows, fields)})
+
+@bp.route('/api/profiles/token', methods=['POST'])
+@login_required
+def api_profile_token():
+    """Token that profiles the requests it is sent with (see profiling.py)"""
+    from flask import jsonify
+    if not current_user.is_admin():
+        return jsonify({'error': 'Admin privileges required'}), 403
+    if not current_app.config.get('PROFILE_DIR'):
+        return jsonify({'error': 'Request profiling is disabled (PROFILE_DIR is empty)'}), 400
+    return jsonify({
+        'token': profiling.make_token(current_app, current_user),
+        'header': profiling.TOKEN_HEADER,
+        'param': profiling.TOKEN_PARAM,
+        'expires_in': current_app.config['PROFILE_TOKEN_MAX_AGE'],
+    })
+
+@bp.route('/api/profiles', methods=['GET'])
+@login_required
+def api_list_profiles():
+    from flask import jsonify
+    if not current_user.is_admin():
+        return jsonify({'error': 'Admin privileges required'}), 403
+    return json_response({'profiles': profiling.list_reports(current_app.config.get('PROFILE_DIR'))})
+
+@bp.route('/api/profiles/<name>', methods=['GET'])
+@login_required
+def api_download_profile(name):
+    from flask import jsonify, send_from_directory
+    if not current_user.is_admin():
+        return jsonify({'error': 'Admin privileges required'}), 403
+    directory = current_app.config.get('PROFILE_DIR')
+    if not directory or not profiling.REPORT_NAME.match(name) or not os.path.exists(os.path.join(directory, name)):
+        return jsonify({'error': 'Profile not found'}), 404
+    return send_from_directory(directory, name, as_attachment=True)
+
+@bp.route('/api/memory', methods=['GET'])
+@login_required
+def api_memory_stats():
+    """RSS growth by route and retained allocation sites for each worker on this host (see memory.py)"""
+    from flask import jsonify
+    if not current_user.is_admin():
+        return jsonify({'error': 'Admin privileges required'}), 403
+    directory = current_app.config.get('MEMORY_STATS_DIR')
+    if not directory:
+        return jsonify({'error': 'Memory instrumentation is disabled (MEMORY_STATS_DIR is empty)'}), 400
+    try:
+        # Make this worker's own figures current
+        memory.memory_stats.publish(directory)
+    except OSError as e:
+        current_app.logger.error(f'Error publishing memory stats: {str(e)}')
+    max_age = current_app.config['MEMORY_STATS_INTERVAL'] * 10
+    return json_response({'workers': memory.worker_summaries(directory, max_age)})
+
+@bp.route('/api/audit', methods=['GET'])
+@login_required
+def api_audit_log():
+    """Audit trail of admin actions, newest first (see audit.py).
+
+    Filters: ``actor_id``, ``target_type`` with optional ``target_id``,
+    ``action``, and ``from``/``to`` ISO datetimes (``to`` exclusive). Pass
+    ``next_cursor`` back as ``before`` for the next page.
+    """
+    from flask import jsonify, request
+    if not current_user.is_admin():
+        return jsonify({'error': 'Admin privileges required'}), 403
+    try:
+        actor_id = int(request.args['actor_id']) if request.args.get('actor_id') else None
+        limit = min(max(int(request.args.get('limit') or AUDIT_PER_PAGE), 1), MAX_AUDIT_PER_PAGE)
+        start = datetime.fromisoformat(request.args['from']) if request.args.get('from') else None
+        end = datetime.fromisoformat(request.args['to']) if request.args.get('to') else None
+        before = audit.parse_cursor(request.args['before']) if request.args.get('before') else None
+    except ValueError:
+        return jsonify({'error': 'actor_id and limit must be integers, from and to ISO datetimes, before a cursor'}), 400
+    if request.args.get('target_id') and not request.args.get('target_type'):
+        return jsonify({'error': 'target_id needs target_type'}), 400
+    
+    try:
+        # This worker's own recent records (e.g. the admin's last action) are written first
+        audit.audit_writer.flush(timeout=2.0)
+        records, next_cursor = audit.query(actor_id=actor_id,
+                                           target_type=request.args.get('target_type'),
+                                           target_id=request.args.get('target_id'),
+                                           action=request.args.get('action'),
+                                           start=start, end=end, before=before, limit=limit)
+        return json_response({
+            'records': [audit.record_to_dict(entry) for entry in records],
+            'next_cursor': next_cursor,
+        })
+    except Exception as e:
+        current_app.logger.error(f'Error querying audit log: {str(e)}')
+        return jsonify({'error': f'Failed to load audit log: {str(e)}'}), 500
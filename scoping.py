@@ -0,0 +1,85 @@
+"""
+Role-based scoping of event reads
+
+Admins and event managers see every event; medical reps only see their own.
+Read paths apply that rule through this module instead of branching on the
+role and repeating the query:
+
+- scoped() adds the viewer's scope to any ORM query or select() with
+  with_loader_criteria, so it also covers joins and subqueries on Event.
+- owner_filter() is the plain WHERE clause for tables that store an owner
+  column instead of joining Event (e.g. the EventChange feed).
+- count_events_by() and event_totals() are the scoped aggregates used by the
+  dashboard page and its JSON API. event_totals() adds the archived events
+  (see archival.py); the per-group counts cover the hot table only.
+
+Results only depend on whether the viewer sees all events and, if not, on
+their id; every HTTP cache key built by change_tracking.stamp_validators
+already contains both.
+"""
+
+from flask_login import current_user
+from sqlalchemy import case, func
+from sqlalchemy.orm import with_loader_criteria
+
+from extensions import db
+from models import Event
+
+def sees_all_events(user=None):
+    user = user or current_user
+    return user.can_approve_events()
+
+def owner_filter(owner_column, user=None):
+    """WHERE clause limiting rows owned via ``owner_column`` to the viewer, or None if unrestricted"""
+    user = user or current_user
+    if sees_all_events(user):
+        return None
+    return owner_column == user.id
+
+def scoped(query, user=None):
+    """Apply the viewer's event scope to an ORM query or select()"""
+    criteria = owner_filter(Event.user_id, user)
+    if criteria is None:
+        return query
+    return query.options(with_loader_criteria(Event, criteria, include_aliases=True))
+
+def scoped_events(user=None):
+    """Event query limited to the viewer's events"""
+    return scoped(Event.query, user)
+
+def count_events_by(key, label, joins=(), user=None):
+    """Count the viewer's events per group, in the database.
+
+    Joins ``joins`` ((target, onclause) pairs) onto Event and groups by
+    ``key`` and ``label``. Returns [(key, label, count)] ordered by count
+    descending, then key; groups without events are left out.
+    """
+    count = func.count(Event.id)
+    query = db.session.query(key, label, count).select_from(Event)
+    for target, onclause in joins:
+        query = query.join(target, onclause)
+    return scoped(query, user).group_by(key, label).order_by(count.desc(), key).all()
+
+def event_totals(now, user=None):
+    """Dashboard counters for the viewer's events, archived ones included"""
+    # archival builds on this module
+    from archival import archive_summary
+    
+    def count_if(condition):
+        return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+    row = scoped(db.session.query(
+        func.count(Event.id),
+        count_if(Event.start_datetime > now),
+        count_if(Event.is_online == True),
+        count_if(Event.is_online == False),
+        count_if(Event.status == 'pending'),
+        count_if(Event.end_datetime < now),
+    ), user).one()
+    totals = dict(zip(
+        ('total_events', 'upcoming_events', 'online_events', 'offline_events', 'pending_events', 'completed_events'),
+        (int(value) for value in row)
+    ))
+    for name, value in archive_summary.totals(user).items():
+        totals[name] += value
+    return totals
@@ -0,0 +1,129 @@
+"""
+JSON serialization for API responses
+
+- Projections: serializers select only the requested columns with a SQL
+  projection instead of loading full ORM objects.
+- Field selection: clients pass ``?fields=id,name`` to shrink payloads.
+- Encoding uses orjson when it is installed (stdlib json otherwise), and
+  large bodies are gzip/brotli-compressed for clients that accept it.
+"""
+
+import gzip
+import json
+from flask import Response, request
+
+from extensions import db
+from models import ArchivedEvent, Event, EventCategory, EventType, User
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are not worth compressing
+COMPRESS_MIN_SIZE = 1024
+
+class Projection:
+    """Named columns of a model that API clients may select with ?fields="""
+
+    def __init__(self, columns, default=None):
+        self.columns = columns
+        self.default = tuple(default or columns)
+
+    def parse_fields(self, value=None):
+        """Field names from a ?fields= value, or the default set; raises ValueError for unknown names"""
+        if value is None:
+            value = request.args.get('fields')
+        if not value:
+            return self.default
+        fields = tuple(dict.fromkeys(name.strip() for name in value.split(',') if name.strip()))
+        unknown = [name for name in fields if name not in self.columns]
+        if unknown:
+            raise ValueError(f'Unknown fields: {", ".join(unknown)}. Available: {", ".join(self.columns)}')
+        return fields or self.default
+
+    def query(self, fields):
+        """Query selecting only ``fields``; filter/order it like any other query"""
+        return db.session.query(*[self.columns[name].label(name) for name in fields])
+
+    def serialize(self, rows, fields):
+        return [dict(zip(fields, row)) for row in rows]
+
+EVENT = Projection({
+    'id': Event.id,
+    'name': Event.name,
+    'description': Event.description,
+    'event_type_id': Event.event_type_id,
+    'is_online': Event.is_online,
+    'start_datetime': Event.start_datetime,
+    'end_datetime': Event.end_datetime,
+    'governorate': Event.governorate,
+    'status': Event.status,
+    'user_id': Event.user_id,
+    'created_at': Event.created_at,
+    'updated_at': Event.updated_at,
+}, default=('id', 'name', 'start_datetime', 'end_datetime', 'status', 'is_online', 'event_type_id', 'governorate'))
+
+# Same fields for events moved to the archive (see archival.py)
+ARCHIVED_EVENT = Projection({name: getattr(ArchivedEvent, name) for name in EVENT.columns}, default=EVENT.default)
+
+# Never exposes password_hash
+USER = Projection({
+    'id': User.id,
+    'email': User.email,
+    'role': User.role,
+})
+
+EVENT_CATEGORY = Projection({
+    'id': EventCategory.id,
+    'name': EventCategory.name,
+    'description': EventCategory.description,
+    'created_at': EventCategory.created_at,
+}, default=('id', 'name'))
+
+EVENT_TYPE = Projection({
+    'id': EventType.id,
+    'name': EventType.name,
+    'description': EventType.description,
+    'created_at': EventType.created_at,
+}, default=('id', 'name'))
+
+def _default(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+def dumps(payload):
+    """Encode ``payload`` as compact JSON bytes; datetimes become ISO 8601 strings"""
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, separators=(',', ':'), default=_default).encode('utf-8')
+
+def compress(response):
+    """Compress a response body with brotli or gzip if the client accepts it and it is large enough"""
+    if response.status_code != 200 or response.direct_passthrough or 'Content-Encoding' in response.headers:
+        return response
+    body = response.get_data()
+    if len(body) < COMPRESS_MIN_SIZE:
+        return response
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        body, encoding = brotli.compress(body, quality=5), 'br'
+    elif accepted['gzip']:
+        body, encoding = gzip.compress(body, compresslevel=6), 'gzip'
+    else:
+        return response
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    return response
+
+def json_response(payload, status=200):
+    """Fast-encoded, compressed JSON response (use instead of jsonify for API data)"""
+    response = Response(dumps(payload), status=status, mimetype='application/json')
+    return compress(response)
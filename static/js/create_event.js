@@ -40,7 +40,46 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
 
-    // Venue is now free text, no dropdown handling needed
+    // Venue name suggestions from /api/venues as the user types
+    const venueInput = document.getElementById('venue');
+    const venueSuggestions = document.getElementById('venue_suggestions');
+    const governorateSelect = document.getElementById('governorate');
+    let venueTimer = null;
+    let venueRequest = 0;
+
+    if (venueInput && venueSuggestions) {
+        venueInput.addEventListener('input', function() {
+            clearTimeout(venueTimer);
+            const query = venueInput.value.trim();
+            if (!query) {
+                venueSuggestions.innerHTML = '';
+                return;
+            }
+            venueTimer = setTimeout(() => {
+                const params = new URLSearchParams({ q: query });
+                if (governorateSelect && governorateSelect.value) {
+                    params.set('governorate', governorateSelect.value);
+                }
+                // Only the latest request may fill the list
+                const requestId = ++venueRequest;
+                fetch('/api/venues?' + params.toString())
+                    .then(response => response.ok ? response.json() : { venues: [] })
+                    .then(data => {
+                        if (requestId !== venueRequest) return;
+                        venueSuggestions.innerHTML = '';
+                        data.venues.forEach(venue => {
+                            const option = document.createElement('option');
+                            option.value = venue.name;
+                            if (venue.capacity) {
+                                option.label = venue.name + ' (' + venue.capacity + ' seats)';
+                            }
+                            venueSuggestions.appendChild(option);
+                        });
+                    })
+                    .catch(error => console.error('Error loading venues:', error));
+            }, 200);
+        });
+    }
 
     // Online event toggle logic
     const onlineCheckbox = document.getElementById('is_online');
@@ -132,6 +171,18 @@ document.addEventListener('DOMContentLoaded', function() {
             submitButton.disabled = true;
             submitButton.innerHTML = '<span class="spinner-border spinner-border-sm me-2" role="status" aria-hidden="true"></span> Processing...';
 
+            // The attendee list goes up in resumable chunks first (see uploads.js)
+            const attendeesInput = document.getElementById('attendees_file');
+            if (attendeesInput && attendeesInput.dataset.chunkedUpload && attendeesInput.files && attendeesInput.files[0]) {
+                ChunkedUpload.submitWithUpload(form, attendeesInput, 'attendees_upload_id', 'attendees', null).catch(() => {
+                    if (loadingOverlay) {
+                        loadingOverlay.style.display = 'none';
+                    }
+                    submitButton.innerHTML = '<i class="fas fa-save me-2"></i> Create Event';
+                });
+                return;
+            }
+
             // Submit the form
             form.submit();
         });
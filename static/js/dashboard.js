@@ -34,6 +34,9 @@ document.addEventListener('DOMContentLoaded', function() {
         
         // Load dashboard statistics
         loadDashboardStats();
+        
+        // Keep statistics live via server push
+        subscribeToDashboardUpdates();
     }
     
     initDashboard();
@@ -76,6 +79,40 @@ function loadDashboardStats() {
         });
 }
 
+// Apply pushed changes from /api/events/stream instead of reloading
+function subscribeToDashboardUpdates() {
+    if (typeof EventSource === 'undefined') return;
+    
+    const source = new EventSource('/api/events/stream', { withCredentials: true });
+    const statElements = {
+        total_events: 'total_events_count',
+        upcoming_events: 'upcoming_events_count',
+        online_events: 'online_events_count',
+        offline_events: 'offline_events_count',
+        pending_events: 'pending_events_count'
+    };
+    
+    source.addEventListener('stats', function(e) {
+        const delta = JSON.parse(e.data);
+        Object.keys(delta).forEach(key => {
+            const element = document.getElementById(statElements[key]);
+            if (element && delta[key]) {
+                const current = parseInt(element.textContent, 10) || 0;
+                element.textContent = Math.max(0, current + delta[key]);
+            }
+        });
+    });
+    
+    // Edits and deletions can't be expressed as deltas; refetch (usually a 304)
+    source.addEventListener('refresh', function() {
+        loadDashboardStats();
+    });
+    
+    source.addEventListener('error', function() {
+        console.warn('Dashboard update stream interrupted, reconnecting...');
+    });
+}
+
 // Initialize Category Chart
 function initCategoryChart() {
     fetch('/api/dashboard/categories', { 
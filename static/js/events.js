@@ -35,8 +35,43 @@ document.addEventListener('DOMContentLoaded', function() {
             });
         });
     });
+    
+    // Tell approvers about new pending events without polling
+    subscribeToApprovalQueue();
 });
 
+// Show a banner when events are added to or leave the approval queue
+function subscribeToApprovalQueue() {
+    const container = document.getElementById('events_container');
+    if (!container || typeof EventSource === 'undefined') return;
+    
+    const source = new EventSource('/api/events/stream', { withCredentials: true });
+    let banner = null;
+    let changes = 0;
+    
+    source.addEventListener('pending', function(e) {
+        const data = JSON.parse(e.data);
+        changes += 1;
+        if (!banner) {
+            banner = document.createElement('div');
+            banner.className = 'alert alert-warning d-flex justify-content-between align-items-center';
+            container.parentNode.insertBefore(banner, container);
+        }
+        const what = data.action === 'added'
+            ? `New event pending approval: "${data.name}"`
+            : `"${data.name}" was ${data.status === 'active' ? 'approved' : 'declined'}`;
+        banner.innerHTML = '';
+        const text = document.createElement('span');
+        text.textContent = changes > 1 ? `${what} (+${changes - 1} more changes)` : what;
+        const reload = document.createElement('a');
+        reload.href = window.location.href;
+        reload.className = 'btn btn-sm btn-warning';
+        reload.textContent = 'Refresh list';
+        banner.appendChild(text);
+        banner.appendChild(reload);
+    });
+}
+
 // Apply all filters and redirect
 function applyFilters() {
     const searchInput = document.getElementById('search_input');
@@ -255,11 +255,114 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
 
-    // Delete user buttons
-    const deleteUserBtns = document.querySelectorAll('.btn-delete-user');
-    deleteUserBtns.forEach(btn => {
-        btn.addEventListener('click', function() {
-            const userId = this.getAttribute('data-id');
+    // User list: loaded a page at a time from /api/users/list
+    const userList = document.getElementById('user_list');
+    if (userList) {
+        const currentUserId = Number(userList.dataset.currentUserId);
+        const userSearch = document.getElementById('user_search');
+        const userRoleFilter = document.getElementById('user_role_filter');
+        const userSort = document.getElementById('user_sort');
+        const userCount = document.getElementById('user_count');
+        const userListEmpty = document.getElementById('user_list_empty');
+        const loadMoreUsers = document.getElementById('load_more_users');
+        const roleBadges = { admin: 'primary', medical_rep: 'info' };
+        let nextPage = 1;
+        let total = 0;
+        let requestId = 0;
+
+        function userRow(user) {
+            const row = document.createElement('tr');
+            row.dataset.id = user.id;
+
+            const email = document.createElement('td');
+            email.textContent = user.email;
+
+            const role = document.createElement('td');
+            const badge = document.createElement('span');
+            badge.className = `badge bg-${roleBadges[user.role] || 'secondary'}`;
+            badge.textContent = (user.role || '').replace('_', ' ').toUpperCase();
+            role.appendChild(badge);
+
+            const actions = document.createElement('td');
+            actions.className = 'text-end';
+            if (user.id !== currentUserId) {
+                actions.innerHTML = `
+                    <button class="btn btn-sm btn-danger btn-delete-user" data-id="${user.id}">
+                        <i class="fas fa-trash-alt"></i>
+                    </button>
+                `;
+            } else {
+                actions.innerHTML = '<span class="badge bg-info">Current User</span>';
+            }
+
+            row.append(email, role, actions);
+            return row;
+        }
+
+        function updateUserCount() {
+            const shown = userList.children.length;
+            userCount.textContent = total ? `Showing ${shown} of ${total}` : '';
+            userListEmpty.classList.toggle('d-none', total > 0);
+        }
+
+        function loadUsers(reset) {
+            if (reset) {
+                nextPage = 1;
+            }
+            const params = new URLSearchParams({
+                page: nextPage,
+                sort: userSort.value,
+                role: userRoleFilter.value,
+                q: userSearch.value.trim()
+            });
+            // Ignore responses to requests superseded by a newer search
+            const thisRequest = ++requestId;
+            loadMoreUsers.disabled = true;
+
+            fetch(`/api/users/list?${params}`, { credentials: 'same-origin' })
+            .then(response => response.json())
+            .then(data => {
+                if (thisRequest !== requestId) {
+                    return;
+                }
+                if (!data.success) {
+                    showAlert(data.error || 'Error loading users', 'danger');
+                    return;
+                }
+                if (reset) {
+                    userList.innerHTML = '';
+                }
+                data.users.forEach(user => userList.appendChild(userRow(user)));
+                total = data.total;
+                nextPage = data.page + 1;
+                loadMoreUsers.classList.toggle('d-none', !data.has_more);
+                updateUserCount();
+            })
+            .catch(error => {
+                console.error('Error:', error);
+                showAlert('Error loading users', 'danger');
+            })
+            .finally(() => {
+                loadMoreUsers.disabled = false;
+            });
+        }
+
+        let searchTimer = null;
+        userSearch.addEventListener('input', function() {
+            clearTimeout(searchTimer);
+            searchTimer = setTimeout(() => loadUsers(true), 300);
+        });
+        userRoleFilter.addEventListener('change', () => loadUsers(true));
+        userSort.addEventListener('change', () => loadUsers(true));
+        loadMoreUsers.addEventListener('click', () => loadUsers(false));
+
+        // Delete user buttons (rows are added dynamically)
+        userList.addEventListener('click', function(e) {
+            const btn = e.target.closest('.btn-delete-user');
+            if (!btn) {
+                return;
+            }
+            const userId = btn.getAttribute('data-id');
             if (confirm('Are you sure you want to delete this user?')) {
                 fetch(`/api/users/${userId}`, {
                     method: 'DELETE',
@@ -269,7 +372,9 @@ document.addEventListener('DOMContentLoaded', function() {
                 .then(data => {
                     if (data.success) {
                         showAlert('User deleted successfully!', 'success');
-                        setTimeout(() => location.reload(), 1000);
+                        btn.closest('tr').remove();
+                        total -= 1;
+                        updateUserCount();
                     } else {
                         showAlert(data.error || 'Error deleting user', 'danger');
                     }
@@ -280,5 +385,7 @@ document.addEventListener('DOMContentLoaded', function() {
                 });
             }
         });
-    });
-});
\ No newline at end of file
+
+        loadUsers(true);
+    }
+});
@@ -0,0 +1,174 @@
+// Chunked, resumable file uploads for PharmaEvents (server side: uploads.py)
+//
+// ChunkedUpload.upload(file, purpose, onProgress) sends a file in chunks and
+// resolves with the id of the finished upload, which a form then submits
+// instead of the file. A dropped connection is retried from the offset the
+// server has; an upload interrupted by closing the page resumes when the
+// same file is chosen again.
+
+const ChunkedUpload = (function() {
+    const MAX_RETRIES = 8;
+
+    function storageKey(file, purpose) {
+        return 'upload:' + purpose + ':' + file.name + ':' + file.size + ':' + file.lastModified;
+    }
+
+    function toHex(buffer) {
+        return Array.from(new Uint8Array(buffer)).map(b => b.toString(16).padStart(2, '0')).join('');
+    }
+
+    function toBase64(buffer) {
+        return btoa(String.fromCharCode.apply(null, new Uint8Array(buffer)));
+    }
+
+    // SHA-256 needs a secure context (HTTPS or localhost); without it uploads go unchecked
+    function sha256(blob) {
+        if (!window.crypto || !window.crypto.subtle) {
+            return Promise.resolve(null);
+        }
+        return blob.arrayBuffer().then(buffer => window.crypto.subtle.digest('SHA-256', buffer));
+    }
+
+    function sleep(ms) {
+        return new Promise(resolve => setTimeout(resolve, ms));
+    }
+
+    function request(method, url, options) {
+        return fetch(url, Object.assign({ method: method, credentials: 'same-origin' }, options)).then(response => {
+            if (!response.ok) {
+                return response.json().catch(() => ({})).then(data => {
+                    const error = new Error(data.error || ('Upload failed (' + response.status + ')'));
+                    error.status = response.status;
+                    throw error;
+                });
+            }
+            return response.json();
+        });
+    }
+
+    // The upload left by an earlier attempt at this file, if the server still has it
+    function resume(key) {
+        const uploadId = localStorage.getItem(key);
+        if (!uploadId) {
+            return Promise.resolve(null);
+        }
+        return request('GET', '/api/uploads/' + uploadId).catch(() => {
+            localStorage.removeItem(key);
+            return null;
+        });
+    }
+
+    function start(file, purpose, key) {
+        return sha256(file).then(digest => request('POST', '/api/uploads', {
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({
+                filename: file.name,
+                length: file.size,
+                purpose: purpose,
+                checksum: digest ? toHex(digest) : null
+            })
+        })).then(state => {
+            localStorage.setItem(key, state.id);
+            return state;
+        });
+    }
+
+    function sendChunks(file, state, onProgress) {
+        let retries = 0;
+
+        function next(offset) {
+            if (onProgress) {
+                onProgress(offset, file.size);
+            }
+            if (offset >= file.size) {
+                return Promise.resolve(offset);
+            }
+            const chunk = file.slice(offset, offset + state.chunk_size);
+            return sha256(chunk).then(digest => {
+                const headers = {
+                    'Content-Type': 'application/offset+octet-stream',
+                    'Upload-Offset': String(offset)
+                };
+                if (digest) {
+                    headers['Upload-Checksum'] = 'sha256 ' + toBase64(digest);
+                }
+                return request('PATCH', '/api/uploads/' + state.id, { headers: headers, body: chunk });
+            }).then(updated => {
+                retries = 0;
+                return next(updated.offset);
+            }).catch(error => {
+                // Client errors other than a stale offset (409) won't get better by retrying
+                if (error.status && error.status < 500 && error.status !== 409 || ++retries > MAX_RETRIES) {
+                    throw error;
+                }
+                return sleep(Math.min(1000 * Math.pow(2, retries - 1), 30000))
+                    .then(() => request('GET', '/api/uploads/' + state.id))
+                    .then(current => next(current.offset), () => next(offset));
+            });
+        }
+
+        return next(state.offset);
+    }
+
+    function upload(file, purpose, onProgress) {
+        const key = storageKey(file, purpose);
+        return resume(key)
+            .then(state => state && state.status === 'uploading' ? state : start(file, purpose, key))
+            .then(state => sendChunks(file, state, onProgress)
+                .then(() => request('POST', '/api/uploads/' + state.id + '/finalize')))
+            .then(state => {
+                localStorage.removeItem(key);
+                return state.id;
+            }, error => {
+                // A file that failed its checksum has to start over
+                if (error.status === 460) {
+                    localStorage.removeItem(key);
+                }
+                throw error;
+            });
+    }
+
+    // Send the file input's file in chunks before submitting the form normally
+    function attach(form, input, fieldName, purpose, progressElement) {
+        if (!form || !input) return;
+        form.addEventListener('submit', function(event) {
+            if (form.dataset.uploaded === 'true' || !input.files || !input.files[0]) {
+                return;
+            }
+            event.preventDefault();
+            submitWithUpload(form, input, fieldName, purpose, progressElement);
+        });
+    }
+
+    function submitWithUpload(form, input, fieldName, purpose, progressElement) {
+        const submitButtons = form.querySelectorAll('[type="submit"]');
+        submitButtons.forEach(button => { button.disabled = true; });
+        return upload(input.files[0], purpose, (sent, total) => {
+            if (progressElement) {
+                progressElement.textContent = 'Uploading... ' + Math.floor(sent * 100 / Math.max(total, 1)) + '%';
+            }
+        }).then(uploadId => {
+            let hidden = form.querySelector('input[name="' + fieldName + '"]');
+            if (!hidden) {
+                hidden = document.createElement('input');
+                hidden.type = 'hidden';
+                hidden.name = fieldName;
+                form.appendChild(hidden);
+            }
+            hidden.value = uploadId;
+            // The file is on the server already; don't send it again
+            input.disabled = true;
+            form.dataset.uploaded = 'true';
+            form.submit();
+        }).catch(error => {
+            submitButtons.forEach(button => { button.disabled = false; });
+            if (progressElement) {
+                progressElement.textContent = '';
+            }
+            alert(error.message);
+            throw error;
+        });
+    }
+
+    return { upload: upload, attach: attach, submitWithUpload: submitWithUpload };
+})();
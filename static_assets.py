@@ -0,0 +1,227 @@
+"""
+Static asset delivery and response compression for PharmaEvents
+
+- Text assets under static/ (JS, CSS, SVG) are compressed once per deploy
+  into STATIC_COMPRESSED_DIR: gzip, plus brotli when it is installed. This
+  runs at startup (files that are already up to date are skipped) or at
+  build time with ``flask compress-static``. The static route then serves
+  the best variant the client accepts, falling back to the plain file.
+- Dynamic text responses (HTML, JSON, CSV) over
+  serialization.COMPRESS_MIN_SIZE are compressed in an after_request hook.
+- script_tags() renders main.js plus a page's scripts; with ASSET_BUNDLING on
+  they are served as one content-hashed, precompressed file instead.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+import click
+from flask import current_app, request, send_file, url_for
+from flask.cli import with_appcontext
+from markupsafe import Markup, escape
+from werkzeug.exceptions import NotFound
+from werkzeug.security import safe_join
+
+from serialization import brotli, compress
+
+COMPRESSIBLE_EXTENSIONS = ('.js', '.css', '.svg', '.json', '.txt', '.map')
+COMPRESSIBLE_MIMETYPES = {
+    'text/html', 'text/plain', 'text/csv', 'text/css', 'text/javascript',
+    'application/javascript', 'application/json', 'image/svg+xml',
+}
+# User uploads are images/spreadsheets and change at runtime; never precompressed
+SKIP_DIRECTORIES = {'uploads'}
+
+# Preferred first; variants are served whether or not brotli is installed here
+VARIANT_SUFFIXES = (('br', '.br'), ('gzip', '.gz'))
+
+BUNDLE_DIRECTORY = 'bundles'
+# Bundle names contain their content hash, so browsers may keep them for good
+BUNDLE_MAX_AGE = 365 * 24 * 3600
+
+def _compressors():
+    compressors = [('gzip', '.gz', lambda data: gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        compressors.insert(0, ('br', '.br', lambda data: brotli.compress(data, quality=11)))
+    return compressors
+
+def _write_atomic(path, data):
+    """Write via a temp file so concurrently starting workers never serve a partial file"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+def _write_variants(base_path, data):
+    """Write compressed variants of ``data`` next to ``base_path``, dropping ones that don't help"""
+    for _, suffix, compressor in _compressors():
+        compressed = compressor(data)
+        if len(compressed) < len(data):
+            _write_atomic(base_path + suffix, compressed)
+        elif os.path.exists(base_path + suffix):
+            os.remove(base_path + suffix)
+
+def precompress(static_folder, output_dir):
+    """Compress every text asset of ``static_folder`` into ``output_dir``; returns the number written"""
+    written = 0
+    for root, directories, filenames in os.walk(static_folder):
+        directories[:] = [name for name in directories
+                          if not (root == static_folder and name in SKIP_DIRECTORIES)]
+        for filename in filenames:
+            if not filename.lower().endswith(COMPRESSIBLE_EXTENSIONS):
+                continue
+            source = os.path.join(root, filename)
+            base_path = os.path.join(output_dir, os.path.relpath(source, static_folder))
+            source_mtime = os.path.getmtime(source)
+            if all(os.path.exists(base_path + suffix) and os.path.getmtime(base_path + suffix) >= source_mtime
+                   for _, suffix, _ in _compressors()):
+                continue
+            with open(source, 'rb') as f:
+                _write_variants(base_path, f.read())
+            written += 1
+    return written
+
+def _accepted_variant(base_path, newer_than=None):
+    """(path, encoding) of the preferred variant of ``base_path`` the client accepts, or None"""
+    accepted = request.accept_encodings
+    for encoding, suffix in VARIANT_SUFFIXES:
+        if not accepted[encoding]:
+            continue
+        path = base_path + suffix
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            continue
+        # A variant older than its source (edited since startup) is stale
+        if newer_than is None or mtime >= newer_than:
+            return path, encoding
+    return None
+
+def _send_variant(path, encoding, filename, max_age):
+    response = send_file(path, mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream',
+                         conditional=True, max_age=max_age)
+    if response.status_code in (200, 206):
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    return response
+
+def send_static(filename):
+    """Replacement for Flask's static view that prefers precompressed variants"""
+    app = current_app
+    output_dir = app.config.get('STATIC_COMPRESSED_DIR')
+    if not output_dir or not filename.lower().endswith(COMPRESSIBLE_EXTENSIONS):
+        return app.send_static_file(filename)
+
+    source = safe_join(app.static_folder, filename)
+    base_path = safe_join(output_dir, filename)
+    if source and base_path and os.path.isfile(source):
+        variant = _accepted_variant(base_path, newer_than=os.path.getmtime(source))
+        if variant:
+            path, encoding = variant
+            return _send_variant(path, encoding, filename, app.get_send_file_max_age(filename))
+    response = app.send_static_file(filename)
+    response.vary.add('Accept-Encoding')
+    return response
+
+# (static paths, their mtimes) -> bundle file name, per worker
+_bundles = {}
+_bundles_lock = threading.Lock()
+
+def bundle_name(paths):
+    """Name of the bundle concatenating the static files ``paths``, building it if needed"""
+    app = current_app
+    sources = [safe_join(app.static_folder, path) for path in paths]
+    if None in sources:
+        raise ValueError(f'Invalid static path in {paths}')
+    mtimes = tuple(os.path.getmtime(source) for source in sources)
+    with _bundles_lock:
+        cached = _bundles.get(paths)
+    if cached and cached[0] == mtimes:
+        return cached[1]
+
+    parts = []
+    for path, source in zip(paths, sources):
+        with open(source, 'rb') as f:
+            # The separator keeps a file without a trailing semicolon from merging into the next
+            parts.append(b'/* ' + path.encode('utf-8') + b' */\n' + f.read().rstrip() + b'\n;\n')
+    body = b''.join(parts)
+    name = f'{hashlib.sha1(body).hexdigest()[:16]}.js'
+    base_path = os.path.join(app.config['STATIC_COMPRESSED_DIR'], BUNDLE_DIRECTORY, name)
+    if not os.path.exists(base_path):
+        _write_atomic(base_path, body)
+        _write_variants(base_path, body)
+    with _bundles_lock:
+        _bundles[paths] = (mtimes, name)
+    return name
+
+def send_bundle(name):
+    output_dir = current_app.config.get('STATIC_COMPRESSED_DIR')
+    base_path = safe_join(os.path.join(output_dir, BUNDLE_DIRECTORY), name) if output_dir else None
+    if not base_path or not os.path.isfile(base_path):
+        raise NotFound()
+    variant = _accepted_variant(base_path) or (base_path, None)
+    path, encoding = variant
+    if encoding is None:
+        response = send_file(path, mimetype='text/javascript', conditional=True, max_age=BUNDLE_MAX_AGE)
+        response.vary.add('Accept-Encoding')
+    else:
+        response = _send_variant(path, encoding, name, BUNDLE_MAX_AGE)
+    response.cache_control.immutable = True
+    return response
+
+def script_tags(*paths):
+    """<script> tags for the static files ``paths``, or one tag for their bundle"""
+    app = current_app
+    if app.config.get('ASSET_BUNDLING') and app.config.get('STATIC_COMPRESSED_DIR') and len(paths) > 1:
+        try:
+            urls = [url_for('asset_bundle', name=bundle_name(tuple(paths)))]
+        except (OSError, ValueError) as e:
+            app.logger.error(f'Error building script bundle for {", ".join(paths)}: {str(e)}')
+            urls = [url_for('static', filename=path) for path in paths]
+    else:
+        urls = [url_for('static', filename=path) for path in paths]
+    return Markup(''.join(f'<script src="{escape(url)}"></script>' for url in urls))
+
+def compress_response(response):
+    """after_request hook compressing large dynamic text responses"""
+    if not current_app.config.get('COMPRESS_RESPONSES') or response.is_streamed \
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES:
+        return response
+    etag, weak = response.get_etag()
+    compress(response)
+    # Same rule as http_cache: a compressed body is a different representation
+    encoding = response.headers.get('Content-Encoding')
+    if etag and encoding and not etag.endswith(f'-{encoding}'):
+        response.set_etag(f'{etag}-{encoding}', weak)
+    return response
+
+@click.command('compress-static')
+@with_appcontext
+def compress_static_command():
+    """Precompress static assets (run at build time)"""
+    output_dir = current_app.config.get('STATIC_COMPRESSED_DIR')
+    if not output_dir:
+        click.echo('STATIC_COMPRESSED_DIR is not set')
+        return
+    # Creating the app already refreshed stale files; this catches any left over
+    written = precompress(current_app.static_folder, output_dir)
+    click.echo(f'Precompressed static files in {output_dir} are up to date ({written} rewritten)')
+
+def init_app(app):
+    """Install precompressed static serving, bundling and response compression"""
+    output_dir = app.config.get('STATIC_COMPRESSED_DIR')
+    if output_dir and app.static_folder:
+        try:
+            written = precompress(app.static_folder, output_dir)
+            if written:
+                app.logger.info(f'Compressed {written} static files into {output_dir}')
+        except OSError as e:
+            app.logger.error(f'Error precompressing static files: {str(e)}')
+        app.view_functions['static'] = send_static
+        app.add_url_rule('/assets/bundles/<name>', 'asset_bundle', send_bundle)
+    app.jinja_env.globals['script_tags'] = script_tags
+    app.after_request(compress_response)
+    app.cli.add_command(compress_static_command)
@@ -0,0 +1,104 @@
+"""
+Shared fixtures: an app on a fresh SQLite database per test, logged-in
+clients per role, and a SQL statement counter.
+"""
+
+import os
+import sys
+import tempfile
+
+# The module-level app in app.py must not touch a real database
+os.environ.setdefault('DATABASE_URL', 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'import.db'))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from sqlalchemy import event as sa_event
+
+from app import create_app, initialize_database
+from archival import archive_summary
+from audit import audit_writer
+from caching import event_card_cache
+from conflicts import conflict_index
+from extensions import db
+from governorates import governorate_rollup
+from models import User
+from reference_data import reference_cache
+from venues import venue_cache
+
+# Per-worker caches are keyed by stamp versions, which start over with every
+# test database
+CACHES = (archive_summary, conflict_index, event_card_cache, governorate_rollup, reference_cache, venue_cache)
+
+@pytest.fixture
+def app_config():
+    """Extra config for the app fixture; override it in a test module"""
+    return {}
+
+@pytest.fixture
+def app(tmp_path, app_config):
+    for cache in CACHES:
+        cache.__init__()
+    flask_app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "test.db"}',
+        'PROFILE_DIR': '',
+        'MEMORY_STATS_DIR': '',
+        'MAIL_SERVER': '',
+        'UPLOAD_STAGING_DIR': str(tmp_path / 'staging'),
+        'IMPORT_UPLOAD_DIR': str(tmp_path / 'imports'),
+        'JINJA_BYTECODE_CACHE_DIR': '',
+        'STATIC_COMPRESSED_DIR': '',
+        'AUDIT_FLUSH_INTERVAL': 0.01,
+        **app_config,
+    })
+    with flask_app.app_context():
+        initialize_database()
+        # Seeding settings queues audit records; write them now rather than
+        # in the middle of a test that counts statements
+        audit_writer.flush()
+        yield flask_app
+        db.session.remove()
+        db.engine.dispose()
+
+def add_user(email, role):
+    user = User(email=email, role=role)
+    user.set_password('password')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+@pytest.fixture
+def login(app):
+    """login(email) -> a test client logged in as that user"""
+    def _login(email, password='password'):
+        client = app.test_client()
+        response = client.post('/login', data={'email': email, 'password': password})
+        assert response.status_code == 302
+        return client
+    return _login
+
+class StatementCounter:
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __len__(self):
+        return len(self.statements)
+
+@pytest.fixture
+def count_statements(app):
+    """Context manager counting the SQL statements run inside it"""
+    from contextlib import contextmanager
+
+    @contextmanager
+    def _count():
+        counter = StatementCounter()
+        engine = db.engine
+        sa_event.listen(engine, 'before_cursor_execute', counter)
+        try:
+            yield counter
+        finally:
+            sa_event.remove(engine, 'before_cursor_execute', counter)
+    return _count
@@ -0,0 +1,85 @@
+"""
+Archiving events logs them in the change log and leaves them out of the
+pending totals.
+"""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import inspect
+
+from app import ensure_event_id_floor
+from archival import archive_cutoff, archive_events
+from change_tracking import record_event_change
+from conflicts import find_conflicts
+from event_stream import change_to_dict, stats_delta
+from extensions import db
+from models import ArchivedEvent, Event, EventChange, User
+from scoping import event_totals
+
+def add_event(user_id, start, status='pending'):
+    event = Event(name='Visit', user_id=user_id, start_datetime=start, end_datetime=start + timedelta(hours=1),
+                  status=status)
+    db.session.add(event)
+    db.session.flush()
+    record_event_change(event, 'create')
+    db.session.commit()
+    return event
+
+def test_archiving_is_logged_and_not_pending(app):
+    admin = User.query.filter_by(email='admin@test.com').one()
+    old_start = datetime.now() - timedelta(days=1000)
+    old = add_event(admin.id, old_start)
+    recent = add_event(admin.id, datetime.now() + timedelta(days=3))
+    old_id = old.id
+    assert [conflict[1] for conflict in find_conflicts(old_start, None, admin.id)] == [old_id]
+
+    assert archive_events(archive_cutoff()) == 1
+    assert db.session.query(Event.id).all() == [(recent.id,)]
+    assert db.session.get(ArchivedEvent, (old_id, old_start)) is not None
+
+    change = EventChange.query.order_by(EventChange.id.desc()).first()
+    assert (change.event_id, change.operation, change.data['status']) == (old_id, 'archive', 'pending')
+    assert stats_delta(change_to_dict(change)) == {'pending_events': -1}
+    # Consumers of the log drop the event
+    assert find_conflicts(old_start, None, admin.id) == []
+
+    totals = event_totals(datetime.now(), admin)
+    assert (totals['total_events'], totals['pending_events']) == (2, 1)
+
+def test_cutoff_is_local_time(app):
+    assert abs(archive_cutoff(0) - datetime.now()) < timedelta(seconds=5)
+
+def archive_then_add(admin_id):
+    old = add_event(admin_id, datetime.now() - timedelta(days=1000))
+    old_id = old.id
+    assert archive_events(archive_cutoff()) == 1
+    return old_id, add_event(admin_id, datetime.now() - timedelta(days=900)).id
+
+def test_archived_ids_are_not_reused(app):
+    admin = User.query.filter_by(email='admin@test.com').one()
+    archived_id, event_id = archive_then_add(admin.id)
+    assert event_id > archived_id
+    # A second run archives the new event alongside the first
+    assert archive_events(archive_cutoff()) == 1
+    assert sorted(id for id, in db.session.query(ArchivedEvent.id)) == [archived_id, event_id]
+
+def test_event_table_without_autoincrement_is_rebuilt(app):
+    admin_id = User.query.filter_by(email='admin@test.com').one().id
+    archived_id, event_id = archive_then_add(admin_id)
+    db.session.close()
+    # An event table created before ids were AUTOINCREMENT
+    with db.engine.begin() as connection:
+        table_sql = connection.execute(db.text("SELECT sql FROM sqlite_master WHERE name = 'event'")).scalar()
+        connection.execute(db.text('DROP TABLE event'))
+        connection.execute(db.text(table_sql.replace('AUTOINCREMENT', '')))
+        connection.execute(db.text(f'INSERT INTO event (id, name, user_id, start_datetime) '
+                                   f"VALUES ({event_id}, 'Visit', {admin_id}, '2026-01-01 10:00:00')"))
+        connection.execute(db.text("DELETE FROM sqlite_sequence WHERE name = 'event'"))
+
+    ensure_event_id_floor()
+    assert db.session.query(Event.id).all() == [(event_id,)]
+    assert {index.name for index in Event.__table__.indexes} <= {
+        index['name'] for index in inspect(db.engine).get_indexes('event')}
+    db.session.execute(db.delete(Event.__table__))
+    db.session.commit()
+    assert add_event(admin_id, datetime.now()).id > max(archived_id, event_id)
@@ -0,0 +1,63 @@
+"""
+Admin actions through the bulk event API and the settings API are audited.
+"""
+
+from datetime import datetime
+
+import pytest
+
+from audit import audit_writer
+from extensions import db
+from models import AuditLog, Event, User
+
+@pytest.fixture
+def admin(app, login):
+    User.query.filter_by(email='admin@test.com').one().set_password('password')
+    db.session.commit()
+    return login('admin@test.com')
+
+def audited():
+    assert audit_writer.flush()
+    db.session.expire_all()
+    return [(entry.action, entry.target_type, entry.target_id, entry.details)
+            for entry in AuditLog.query.filter(AuditLog.action != 'setting.update').order_by(AuditLog.id)]
+
+def test_bulk_status_and_delete(app, admin):
+    owner = User.query.filter_by(email='admin@test.com').one()
+    events = [Event(name=f'Event {number}', user_id=owner.id, start_datetime=datetime(2026, 6, number + 1),
+                    status='pending') for number in range(3)]
+    db.session.add_all(events)
+    db.session.commit()
+    ids = [event.id for event in events]
+    events[2].status = 'active'
+    db.session.commit()
+
+    response = admin.post('/api/events/bulk-status', json={'status': 'active', 'ids': ids})
+    assert response.status_code == 200
+    assert admin.post('/api/events/bulk-delete', json={'ids': ids[:2]}).status_code == 200
+    # The event already active is not recorded as changed
+    assert audited() == [
+        ('event.status', 'event', str(ids[0]), {'old': 'pending', 'new': 'active', 'bulk': True}),
+        ('event.status', 'event', str(ids[1]), {'old': 'pending', 'new': 'active', 'bulk': True}),
+        ('event.delete', 'event', str(ids[0]), {'name': 'Event 0', 'bulk': True}),
+        ('event.delete', 'event', str(ids[1]), {'name': 'Event 1', 'bulk': True}),
+    ]
+
+def test_reference_data_changes(app, admin):
+    category_id = admin.post('/api/categories', data={'category_name': 'Test Category'}).get_json()['id']
+    type_id = admin.post('/api/event-types', data={'type_name': 'Test Type'}).get_json()['id']
+    venue_id = admin.post('/api/venues', data={'venue_name': 'Hall A', 'governorate': 'Cairo'}).get_json()['id']
+    assert admin.patch(f'/api/venues/{venue_id}', data={'capacity': '120'}).status_code == 200
+    for path in (f'/api/categories/{category_id}', f'/api/event-types/{type_id}', f'/api/venues/{venue_id}'):
+        assert admin.delete(path).status_code == 200
+    assert audited() == [
+        ('category.create', 'category', str(category_id), {'name': 'Test Category'}),
+        ('event_type.create', 'event_type', str(type_id), {'name': 'Test Type'}),
+        ('venue.create', 'venue', str(venue_id),
+         {'name': 'Hall A', 'governorate': 'Cairo', 'capacity': None, 'address': None}),
+        ('venue.update', 'venue', str(venue_id),
+         {'name': 'Hall A', 'old': {'capacity': None, 'address': None}, 'new': {'capacity': 120, 'address': None}}),
+        ('category.delete', 'category', str(category_id), {'name': 'Test Category'}),
+        ('event_type.delete', 'event_type', str(type_id), {'name': 'Test Type'}),
+        ('venue.delete', 'venue', str(venue_id), {'name': 'Hall A'}),
+    ]
@@ -0,0 +1,78 @@
+"""
+The event change feed's cursor follows commit order: a missing id (a
+transaction still committing) holds the cursor back until it settles.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from change_tracking import settled_change_id
+from conftest import add_user
+from extensions import db
+from models import EventChange
+
+def add_change(change_id, age_seconds=0, owner_id=1):
+    db.session.add(EventChange(id=change_id, event_id=change_id, owner_id=owner_id, operation='create',
+                               data={'name': f'Event {change_id}'},
+                               changed_at=datetime.utcnow() - timedelta(seconds=age_seconds)))
+    db.session.commit()
+
+@pytest.fixture
+def admin(app, login):
+    from models import User
+    User.query.filter_by(email='admin@test.com').one().set_password('password')
+    db.session.commit()
+    return login('admin@test.com')
+
+def feed(client, since=0, limit=100):
+    response = client.get(f'/api/events/changes?since={since}&limit={limit}')
+    assert response.status_code == 200
+    data = response.get_json()
+    return [int(change['cursor']) for change in data['changes']], int(data['next_cursor']), data['has_more']
+
+def test_settled_change_id_stops_before_a_recent_gap(app):
+    for change_id in (1, 2, 4, 5):
+        add_change(change_id)
+    assert settled_change_id(0, 30) == (2, False)
+    # The late transaction commits
+    add_change(3)
+    assert settled_change_id(2, 30) == (5, False)
+
+def test_settled_change_id_skips_a_gap_that_settled(app):
+    add_change(1, age_seconds=120)
+    add_change(3, age_seconds=60)
+    assert settled_change_id(0, 30) == (3, False)
+
+def test_settled_change_id_limit(app):
+    for change_id in range(1, 6):
+        add_change(change_id)
+    assert settled_change_id(0, 30, limit=3) == (3, True)
+    assert settled_change_id(3, 30, limit=3) == (5, False)
+
+def test_feed_does_not_skip_a_late_commit(app, admin):
+    for change_id in (1, 2, 4):
+        add_change(change_id)
+    ids, cursor, has_more = feed(admin)
+    assert (ids, cursor, has_more) == ([1, 2], 2, False)
+    add_change(3)
+    ids, cursor, _ = feed(admin, cursor)
+    assert (ids, cursor) == ([3, 4], 4)
+
+def test_feed_pages(app, admin):
+    for change_id in range(1, 8):
+        add_change(change_id)
+    ids, cursor, has_more = feed(admin, limit=3)
+    assert (ids, cursor, has_more) == ([1, 2, 3], 3, True)
+    ids, cursor, has_more = feed(admin, cursor, limit=3)
+    assert (ids, cursor, has_more) == ([4, 5, 6], 6, True)
+    ids, cursor, has_more = feed(admin, cursor, limit=3)
+    assert (ids, cursor, has_more) == ([7], 7, False)
+
+def test_rep_cursor_moves_past_other_owners_changes(app, login):
+    rep = add_user('rep@test.com', 'medical_rep')
+    add_change(1, owner_id=rep.id)
+    add_change(2, owner_id=1)
+    add_change(3, owner_id=1)
+    ids, cursor, has_more = feed(login('rep@test.com'))
+    assert (ids, cursor, has_more) == ([1], 3, False)
@@ -0,0 +1,116 @@
+"""
+The per-worker conflict index: overlaps per resource, incremental updates
+from the change log (without reloading), and changes committed out of id
+order.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from change_tracking import bump_stamps, event_snapshot
+from conflicts import conflict_index, find_conflicts
+from conftest import add_user
+from extensions import db
+from governorates import backfill_event_governorates
+from models import Event, EventChange
+from reference_data import get_reference_data
+
+START = datetime(2026, 3, 2, 10, 0)
+
+def add_event(user_id, start=START, hours=1, change_id=None, **fields):
+    """An event and its change-log row (with ``change_id`` to simulate a late commit)"""
+    event = Event(name='Visit', user_id=user_id, start_datetime=start,
+                  end_datetime=start + timedelta(hours=hours), **fields)
+    db.session.add(event)
+    db.session.flush()
+    db.session.add(EventChange(id=change_id, event_id=event.id, owner_id=user_id, operation='create',
+                               data=event_snapshot(event), changed_at=datetime.utcnow()))
+    db.session.commit()
+    return event
+
+def update_event(event, operation='update', change_id=None, **fields):
+    for name, value in fields.items():
+        setattr(event, name, value)
+    db.session.flush()
+    db.session.add(EventChange(id=change_id, event_id=event.id, owner_id=event.user_id, operation=operation,
+                               data=event_snapshot(event), changed_at=datetime.utcnow()))
+    db.session.commit()
+
+def conflicting_ids(start=START, hours=1, user_id=1, **slot):
+    return [(dimension, event_id) for dimension, event_id, _, _ in
+            find_conflicts(start, start + timedelta(hours=hours), user_id, **slot)]
+
+def test_overlap_on_creator_and_venue(app):
+    first = add_event(1, venue_id=1)
+    second = add_event(2, start=START + timedelta(minutes=30), venue_id=1)
+    add_event(1, start=START + timedelta(hours=1))  # starts as the slot ends
+    assert conflicting_ids(venue_id=1) == [('creator', first.id), ('venue', first.id), ('venue', second.id)]
+    assert conflicting_ids(venue_id=1, is_online=True) == [('creator', first.id)]
+    assert conflicting_ids(user_id=3, venue_id=1, exclude_id=first.id) == [('venue', second.id)]
+
+def test_incremental_updates(app):
+    event = add_event(1)
+    assert conflicting_ids() == [('creator', event.id)]
+    update_event(event, start_datetime=START + timedelta(days=1), end_datetime=START + timedelta(days=1, hours=1))
+    assert conflicting_ids() == []
+    assert conflicting_ids(start=START + timedelta(days=1)) == [('creator', event.id)]
+    update_event(event, operation='status', status='declined')
+    assert conflicting_ids(start=START + timedelta(days=1)) == []
+    update_event(event, operation='status', status='active')
+    assert conflicting_ids(start=START + timedelta(days=1)) == [('creator', event.id)]
+    update_event(event, operation='delete')
+    assert conflicting_ids(start=START + timedelta(days=1)) == []
+
+def test_change_committed_after_a_later_id_is_applied(app):
+    add_event(1, change_id=1)
+    find_conflicts(START, START, 1)
+    # Change 2's transaction is still in flight while change 3 commits
+    add_event(2, start=START + timedelta(days=1), change_id=3)
+    assert conflicting_ids(start=START + timedelta(days=1), user_id=2) == []
+    late = add_event(3, change_id=2)
+    assert conflicting_ids(user_id=3) == [('creator', late.id)]
+    assert conflict_index._last_change_id == 3
+
+def test_reload_does_not_regress_to_an_older_snapshot(app):
+    event = add_event(1, change_id=1)
+    update_event(event, change_id=3,
+                 start_datetime=START + timedelta(days=1), end_datetime=START + timedelta(days=1, hours=1))
+    # The load reads the moved row, then replays the log up to the gap at 2:
+    # the older snapshot in change 1 must not move the event back
+    assert conflicting_ids() == []
+    assert conflicting_ids(start=START + timedelta(days=1)) == [('creator', event.id)]
+
+def test_governorate_spellings_share_a_slot(app):
+    sharkia = get_reference_data().resolve_governorate('Sharkia')
+    find_conflicts(START, START, 1)
+    # Indexed from the change log, then from a full load
+    event = add_event(2, governorate=sharkia.name, governorate_id=sharkia.id)
+    assert conflicting_ids(governorate='Sharqia') == [('governorate', event.id)]
+    conflict_index._load()
+    assert conflicting_ids(governorate='sharqiya') == [('governorate', event.id)]
+    assert conflicting_ids(governorate='Cairo') == []
+
+def test_backfill_and_archiving_do_not_reload(app, monkeypatch):
+    # Written before the governorate reference table
+    event = add_event(1, governorate='sharkia')
+    assert conflicting_ids(user_id=2, governorate='Sharqia') == [('governorate', event.id)]
+    monkeypatch.setattr(conflict_index, '_load', lambda: pytest.fail('the index was reloaded'))
+    assert backfill_event_governorates() == 1
+    # The archive job moving other events
+    bump_stamps(db.session.connection(), ['event_archive'])
+    db.session.commit()
+    assert conflicting_ids(user_id=2, governorate='Sharqia') == [('governorate', event.id)]
+    assert conflict_index._updated[event.id] == event.updated_at
+
+def test_conflict_api_resolves_governorates(app, login):
+    add_user('rep@test.com', 'medical_rep')
+    sharkia = get_reference_data().resolve_governorate('Sharkia')
+    event = add_event(1, governorate=sharkia.name, governorate_id=sharkia.id)
+    client = login('rep@test.com')
+    slot = {'start_datetime': START.isoformat(), 'governorate': 'Sharqia'}
+    response = client.post('/api/events/conflicts', json={'events': [slot]})
+    assert response.status_code == 200
+    assert [conflict['event_id'] for conflict in response.get_json()['results'][0]['conflicts']] == [event.id]
+    response = client.post('/api/events/conflicts', json={'events': [dict(slot, governorate='Atlantis')]})
+    assert response.status_code == 400
@@ -0,0 +1,128 @@
+"""
+The dashboard aggregates (scoping.count_events_by) against the per-row
+Python loops they replaced, for every role, plus a bounded statement count.
+"""
+
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from conftest import add_user
+from extensions import db
+from models import Event, EventCategory, EventType, User
+
+ROLES = ('admin', 'event_manager', 'medical_rep')
+
+def seed_events(count, users, seed=1):
+    rng = random.Random(seed)
+    categories = EventCategory.query.all()
+    event_types = EventType.query.all()
+    start = datetime(2030, 1, 1, 9, 0)
+    for number in range(count):
+        event = Event(
+            name=f'Event {number}',
+            start_datetime=start + timedelta(days=rng.randrange(365)),
+            user_id=rng.choice(users).id,
+            # A few events without a type, as old rows have
+            event_type_id=rng.choice(event_types).id if rng.random() > 0.1 else None,
+            is_online=rng.random() > 0.5,
+            status=rng.choice(('pending', 'active', 'declined')),
+        )
+        event.categories = rng.sample(categories, rng.randrange(0, 3))
+        db.session.add(event)
+    db.session.commit()
+
+def visible(event, viewer):
+    return viewer.can_approve_events() or event.user_id == viewer.id
+
+# The loops the endpoints used before the counts moved into SQL; event types
+# and requesters get the role scoping the request added
+
+def old_categories(viewer):
+    data = []
+    for category in EventCategory.query.order_by(EventCategory.id).all():
+        count = len([event for event in category.events if visible(event, viewer)])
+        if count > 0:
+            data.append({'name': category.name, 'count': count})
+    data.sort(key=lambda item: item['count'], reverse=True)
+    return data
+
+def old_event_types(viewer):
+    events = [event for event in Event.query.all() if visible(event, viewer)]
+    data = []
+    for event_type in EventType.query.order_by(EventType.id).all():
+        count = len([event for event in events if event.event_type_id == event_type.id])
+        if count > 0:
+            data.append({'name': event_type.name, 'count': count})
+    data.sort(key=lambda item: item['count'], reverse=True)
+    if not data:
+        online = len([event for event in events if event.is_online])
+        offline = len([event for event in events if not event.is_online])
+        if online or offline:
+            data = [{'name': 'Online Events', 'count': online}, {'name': 'Offline Events', 'count': offline}]
+    return data
+
+def old_requesters(viewer):
+    events = [event for event in Event.query.all() if visible(event, viewer)]
+    data = []
+    for user in User.query.order_by(User.id).all():
+        count = len([event for event in events if event.user_id == user.id])
+        if count > 0:
+            data.append({'name': user.email, 'count': count})
+    data.sort(key=lambda item: item['count'], reverse=True)
+    return data
+
+ENDPOINTS = {
+    '/api/dashboard/categories': old_categories,
+    '/api/dashboard/event-types': old_event_types,
+    '/api/dashboard/requesters': old_requesters,
+}
+
+@pytest.fixture
+def users(app):
+    admin = User.query.filter_by(email='admin@test.com').one()
+    admin.set_password('password')
+    db.session.commit()
+    return {
+        'admin': admin,
+        'event_manager': add_user('manager@test.com', 'event_manager'),
+        'medical_rep': add_user('rep@test.com', 'medical_rep'),
+        'other_rep': add_user('rep2@test.com', 'medical_rep'),
+    }
+
+@pytest.mark.parametrize('count', [0, 60])
+@pytest.mark.parametrize('role', ROLES)
+@pytest.mark.parametrize('path', sorted(ENDPOINTS))
+def test_matches_python_loops(app, login, users, role, path, count):
+    seed_events(count, list(users.values()))
+    viewer = users[role]
+    client = login(viewer.email)
+    response = client.get(path)
+    assert response.status_code == 200
+    assert response.get_json() == ENDPOINTS[path](viewer)
+
+@pytest.mark.parametrize('role', ROLES)
+def test_event_types_fall_back_to_online_split(app, login, users, role):
+    seed_events(30, list(users.values()))
+    Event.query.update({Event.event_type_id: None})
+    db.session.commit()
+    viewer = users[role]
+    data = login(viewer.email).get('/api/dashboard/event-types').get_json()
+    assert [item['name'] for item in data] == ['Online Events', 'Offline Events']
+    assert data == old_event_types(viewer)
+
+@pytest.mark.parametrize('role', ROLES)
+@pytest.mark.parametrize('path', sorted(ENDPOINTS))
+def test_statement_count_does_not_grow_with_events(app, login, users, count_statements, role, path):
+    client = login(users[role].email)
+    counts = []
+    for batch in range(3):
+        seed_events(100, list(users.values()), seed=batch)
+        with count_statements() as statements:
+            assert client.get(path).status_code == 200
+        counts.append(len(statements))
+    # Change stamps and the grouped query (plus the online split when nothing
+    # has a type)
+    assert counts[0] == counts[1] == counts[2]
+    assert counts[0] <= 3
@@ -0,0 +1,173 @@
+"""
+Read/write splitting: GET requests read from a replica, writes and the
+reads that follow them use the primary, and lagging replicas drop out.
+
+The replica is a copy of the primary's SQLite file taken after setup.
+"""
+
+import shutil
+import time
+from types import SimpleNamespace
+
+import pytest
+from flask import g
+from sqlalchemy import select, text
+
+import db_routing
+from change_tracking import bump_stamps
+from db_routing import PRIMARY_UNTIL_KEY, ReplicaMonitor, replica_monitor
+from extensions import db
+from models import EventCategory, User
+
+@pytest.fixture
+def app_config(tmp_path):
+    return {'DATABASE_REPLICA_URLS': [f'sqlite:///{tmp_path / "replica.db"}']}
+
+@pytest.fixture
+def replica(app, tmp_path):
+    """Bring the replica up to date with the primary"""
+    def _sync():
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+        shutil.copy(tmp_path / 'test.db', tmp_path / 'replica.db')
+    _sync()
+    replica_monitor.__init__()
+    yield _sync
+    db.session.remove()
+    for engine in db.engines.values():
+        engine.dispose()
+    replica_monitor.__init__()
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Monotonic clock of the replica monitor, moved by hand"""
+    now = [1000.0]
+    monkeypatch.setattr(db_routing, 'time', SimpleNamespace(monotonic=lambda: now[0], time=time.time))
+    return now
+
+def bind_for(clause):
+    return db.session.get_bind(clause=clause)
+
+def test_get_reads_from_the_replica(app, replica):
+    db.session.add(EventCategory(name='Primary Only'))
+    db.session.commit()
+    with app.test_request_context('/', method='GET'):
+        app.preprocess_request()
+        assert g._db_replica == 'replica1'
+        assert bind_for(select(EventCategory)) is db.engines['replica1']
+        assert EventCategory.query.filter_by(name='Primary Only').first() is None
+        assert not g._db_wrote
+
+def test_writes_use_the_primary(app, replica):
+    with app.test_request_context('/', method='POST'):
+        app.preprocess_request()
+        assert g._db_replica is None
+        assert bind_for(select(EventCategory)) is db.engine
+
+    for clause in (select(EventCategory).with_for_update(), text('SELECT 1')):
+        with app.test_request_context('/', method='GET'):
+            app.preprocess_request()
+            assert bind_for(clause) is db.engine
+            assert g._db_wrote
+            # The rest of the request reads what it wrote
+            assert bind_for(select(EventCategory)) is db.engine
+
+    with app.test_request_context('/', method='GET'):
+        app.preprocess_request()
+        db.session.add(EventCategory(name='Flushed'))
+        db.session.flush()
+        assert g._db_wrote
+        assert EventCategory.query.filter_by(name='Flushed').one()
+        db.session.rollback()
+
+    # Background jobs and CLI commands have no request
+    assert bind_for(select(EventCategory)) is db.engine
+
+def test_read_your_writes(app, replica, login):
+    User.query.filter_by(email='admin@test.com').one().set_password('password')
+    db.session.commit()
+    replica()
+    admin = login('admin@test.com')
+
+    def categories():
+        with admin:
+            names = [row['name'] for row in admin.get('/api/categories').get_json()['categories']]
+            return names, g._db_replica
+
+    assert categories() == (categories()[0], 'replica1')
+    assert admin.post('/api/categories', data={'category_name': 'Fresh'}).status_code == 200
+    with admin.session_transaction() as session:
+        until = session[PRIMARY_UNTIL_KEY]
+    assert until - time.time() == pytest.approx(app.config['READ_YOUR_WRITES_SECONDS'], abs=5)
+    names, bind = categories()
+    assert 'Fresh' in names and bind is None
+
+    # Once the window has passed, reads go back to the replica, which hasn't got it yet
+    with admin.session_transaction() as session:
+        session[PRIMARY_UNTIL_KEY] = time.time() - 1
+    names, bind = categories()
+    assert 'Fresh' not in names and bind == 'replica1'
+
+def test_lagging_replica_is_dropped_until_it_catches_up(app, replica, clock):
+    monitor = ReplicaMonitor()
+    check = lambda: monitor.check(db.engines, ['replica1'], max_lag=5)
+    check()
+    assert (monitor.healthy, monitor.lag) == (['replica1'], {'replica1': 0.0})
+
+    bump_stamps(db.session.connection(), ['event'])
+    db.session.commit()
+    check()
+    # Behind, but not for long yet
+    assert monitor.healthy == ['replica1']
+    clock[0] += 6
+    check()
+    assert (monitor.healthy, monitor.lag) == ([], {'replica1': 6.0})
+
+    replica()
+    check()
+    assert (monitor.healthy, monitor.lag) == (['replica1'], {'replica1': 0.0})
+    # Checkpoints the replica has passed are dropped
+    assert len(monitor._checkpoints) == 1
+
+def test_unreachable_replica_is_dropped(app, replica, clock, tmp_path):
+    monitor = ReplicaMonitor()
+    check = lambda: monitor.check(db.engines, ['replica1'], max_lag=5)
+    check()
+    db.engines['replica1'].dispose()
+    (tmp_path / 'replica.db').rename(tmp_path / 'replica.db.down')
+    (tmp_path / 'replica.db').write_bytes(b'not a database')
+    check()
+    assert (monitor.healthy, monitor.lag) == ([], {'replica1': None})
+
+    # The primary moves on while the replica is down
+    bump_stamps(db.session.connection(), ['event'])
+    db.session.commit()
+    check()
+    clock[0] += 60
+    bump_stamps(db.session.connection(), ['event'])
+    db.session.commit()
+    check()
+
+    # It comes back with what it had: a minute behind, not just the last change
+    db.engines['replica1'].dispose()
+    (tmp_path / 'replica.db.down').replace(tmp_path / 'replica.db')
+    check()
+    assert monitor.healthy == []
+    assert monitor.lag['replica1'] == 60.0
+    replica()
+    check()
+    assert monitor.healthy == ['replica1']
+
+def test_pick_rechecks_at_the_interval(app, replica, clock):
+    app.config.update(REPLICA_CHECK_INTERVAL=10, REPLICA_MAX_LAG_SECONDS=5)
+    assert replica_monitor.pick(app) == 'replica1'
+    bump_stamps(db.session.connection(), ['event'])
+    db.session.commit()
+    clock[0] += 10
+    assert replica_monitor.pick(app) == 'replica1'
+    # Too far behind by now, but not checked again before the interval is up
+    clock[0] += 6
+    assert replica_monitor.pick(app) == 'replica1'
+    clock[0] += 4
+    assert replica_monitor.pick(app) is None
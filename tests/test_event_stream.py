@@ -0,0 +1,29 @@
+"""
+The SSE change broker and replay publish changes in commit order.
+"""
+
+import re
+
+from event_stream import ChangeBroker, broker, stream
+from test_change_feed import add_change
+
+def test_broker_waits_for_a_late_commit(app):
+    change_broker = ChangeBroker(settle_seconds=30)
+    subscriber = change_broker.subscribe()
+    change_broker._poll()
+    assert change_broker.last_id == 0
+    for change_id in (1, 2, 4):
+        add_change(change_id)
+    change_broker._poll()
+    assert change_broker.last_id == 2
+    add_change(3)
+    change_broker._poll()
+    published = [subscriber.get_nowait()['id'] for _ in range(subscriber.qsize())]
+    assert published == [1, 2, 3, 4]
+
+def test_replay_stops_before_a_gap(app):
+    for change_id in (1, 2, 4):
+        add_change(change_id)
+    broker.settle_seconds = 30
+    text = ''.join(stream(user_id=1, can_approve=True, last_event_id=0, max_seconds=0))
+    assert [int(value) for value in re.findall(r'^id: (\d+)$', text, re.M)] == [1, 2]
@@ -0,0 +1,75 @@
+"""
+The governorate rollup follows event writes, including the governorate
+backfill, through the change log instead of reloading.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import func
+
+from change_tracking import get_stamps, record_event_change
+from extensions import db
+from governorates import GovernorateRollup, backfill_event_governorates
+from models import Event, EventChange
+from reference_data import get_reference_data
+
+def add_event(user_id, governorate, start):
+    record = get_reference_data().resolve_governorate(governorate)
+    event = Event(name='Visit', user_id=user_id, start_datetime=start,
+                  governorate=record.name, governorate_id=record.id)
+    db.session.add(event)
+    db.session.flush()
+    record_event_change(event, 'create')
+    db.session.commit()
+    return event
+
+def expected_counts(user_id=None):
+    query = db.session.query(Event.governorate_id, func.count()).filter(Event.governorate_id.isnot(None))
+    if user_id is not None:
+        query = query.filter(Event.user_id == user_id)
+    return dict(query.group_by(Event.governorate_id).all())
+
+def test_rollup_applies_changes_without_reloading(app, monkeypatch):
+    rollup = GovernorateRollup()
+    cairo = add_event(1, 'Cairo', datetime(2026, 1, 5))
+    add_event(2, 'Giza', datetime(2026, 2, 5))
+    assert rollup.counts() == expected_counts()
+    loads = []
+    monkeypatch.setattr(rollup, '_load_hot', lambda: loads.append(True))
+
+    alex = add_event(1, 'Alexandria', datetime(2026, 3, 5))
+    cairo.governorate, cairo.governorate_id = 'Luxor', get_reference_data().resolve_governorate('Luxor').id
+    cairo.start_datetime = datetime(2026, 4, 1)
+    db.session.flush()
+    record_event_change(cairo, 'update')
+    db.session.commit()
+    record_event_change(alex, 'delete')
+    db.session.delete(alex)
+    db.session.commit()
+
+    assert rollup.counts() == expected_counts()
+    assert rollup.counts(user_id=1) == expected_counts(user_id=1)
+    assert rollup.counts(start_month=(2026, 3)) == {cairo.governorate_id: 1}
+    assert loads == []
+
+def test_backfill_is_logged(app, monkeypatch):
+    rollup = GovernorateRollup()
+    event = Event(name='Visit', user_id=1, start_datetime=datetime(2026, 1, 5), governorate='sharkia')
+    db.session.add(event)
+    db.session.flush()
+    record_event_change(event, 'create')
+    db.session.commit()
+    assert rollup.counts() == {}
+    loads = []
+    monkeypatch.setattr(rollup, '_load_hot', lambda: loads.append(True))
+    archive_stamp = get_stamps('event_archive')
+
+    assert backfill_event_governorates() == 1
+    sharqia = get_reference_data().resolve_governorate('Sharqia')
+    assert (event.governorate, event.governorate_id) == (sharqia.name, sharqia.id)
+    change = EventChange.query.order_by(EventChange.id.desc()).first()
+    assert (change.event_id, change.operation, change.data['governorate_id']) == (event.id, 'update', sharqia.id)
+    # Nothing archived changed, so archive-backed caches keep their version
+    assert get_stamps('event_archive') == archive_stamp
+    assert rollup.counts() == {sharqia.id: 1}
+    assert loads == []
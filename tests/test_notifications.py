@@ -0,0 +1,82 @@
+"""
+The notification outbox: claims, leases and retries of the dispatcher.
+"""
+
+import smtplib
+from datetime import datetime, timedelta
+
+import pytest
+
+import notifications
+from extensions import db
+from models import OutboxMessage
+
+def add_messages(*recipients):
+    for number, recipient in enumerate(recipients):
+        db.session.add(OutboxMessage(recipient=recipient, kind='event_pending', event_id=number + 1,
+                                     data={'name': f'Event {number + 1}'}))
+    db.session.commit()
+
+class FakeSMTP:
+    def __init__(self, fail_for=()):
+        self.fail_for = set(fail_for)
+        self.sent = []
+
+    def send_message(self, email):
+        if email['To'] in self.fail_for:
+            raise smtplib.SMTPRecipientsRefused({email['To']: (550, b'No such user')})
+        self.sent.append(email)
+
+    def quit(self):
+        pass
+
+@pytest.fixture
+def smtp(app, monkeypatch):
+    connection = FakeSMTP()
+    monkeypatch.setattr(notifications, '_smtp_connection', lambda app: connection)
+    return connection
+
+def test_claimed_messages_are_leased(app):
+    add_messages('a@test.com', 'b@test.com', 'c@test.com')
+    first = notifications.claim_batch(2, lease_seconds=300)
+    assert [message.recipient for message in first] == ['a@test.com', 'b@test.com']
+    # Another dispatcher only gets what is left, then nothing
+    assert [message.recipient for message in notifications.claim_batch(10, 300)] == ['c@test.com']
+    assert notifications.claim_batch(10, 300) == []
+
+def test_expired_lease_is_claimed_again(app):
+    add_messages('a@test.com')
+    [message] = notifications.claim_batch(10, lease_seconds=300)
+    claim = message.claim
+    assert notifications.claim_batch(10, 300) == []
+    # The dispatcher holding it died; its lease runs out
+    message.locked_until = datetime.utcnow() - timedelta(seconds=1)
+    db.session.commit()
+    [again] = notifications.claim_batch(10, 300)
+    assert (again.id, again.status) == (message.id, 'pending')
+    assert again.claim != claim
+
+def test_dispatch_sends_one_email_per_recipient(app, smtp):
+    add_messages('a@test.com', 'a@test.com', 'b@test.com')
+    assert notifications.dispatch(app) == (2, 3, 0)
+    assert sorted(email['To'] for email in smtp.sent) == ['a@test.com', 'b@test.com']
+    assert {message.status for message in OutboxMessage.query} == {'sent'}
+    assert notifications.dispatch(app) == (0, 0, 0)
+
+def test_failed_send_backs_off_then_gives_up(app, smtp):
+    app.config['NOTIFY_MAX_ATTEMPTS'] = 2
+    smtp.fail_for.add('bad@test.com')
+    add_messages('bad@test.com', 'good@test.com')
+    before = datetime.utcnow()
+    assert notifications.dispatch(app) == (1, 1, 0)
+    failing = OutboxMessage.query.filter_by(recipient='bad@test.com').one()
+    assert (failing.status, failing.attempts, failing.claim) == ('pending', 1, None)
+    assert failing.next_attempt_at >= before + timedelta(seconds=app.config['NOTIFY_RETRY_BASE_SECONDS'])
+    # Not due again until the backoff has passed
+    assert notifications.dispatch(app) == (0, 0, 0)
+    failing.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+    db.session.commit()
+    assert notifications.dispatch(app) == (0, 0, 1)
+    db.session.refresh(failing)
+    assert (failing.status, failing.attempts) == ('failed', 2)
+    assert '550' in failing.last_error
@@ -0,0 +1,102 @@
+"""
+Chunked uploads: offsets, per-chunk and whole-file checksums, and resuming.
+"""
+
+import base64
+import hashlib
+import io
+
+import pytest
+
+import uploads
+from conftest import add_user
+from extensions import db
+from models import ChunkedUpload
+
+CONTENT = b'name,email\n' + b''.join(b'Attendee %d,a%d@example.com\n' % (n, n) for n in range(200))
+
+@pytest.fixture
+def rep(app, login):
+    add_user('rep@test.com', 'medical_rep')
+    return login('rep@test.com')
+
+def start(client, content=CONTENT, checksum=None):
+    response = client.post('/api/uploads', json={'filename': 'attendees.csv', 'length': len(content),
+                                                 'purpose': 'attendees', 'checksum': checksum})
+    assert response.status_code == 201
+    return response.get_json()['id']
+
+def send(client, upload_id, offset, data, checksum=None):
+    headers = {'Upload-Offset': str(offset)}
+    if checksum is not None:
+        headers['Upload-Checksum'] = 'sha256 ' + base64.b64encode(checksum).decode()
+    return client.patch(f'/api/uploads/{upload_id}', data=data, headers=headers)
+
+def test_chunks_at_the_offset(rep):
+    upload_id = start(rep, checksum=hashlib.sha256(CONTENT).hexdigest())
+    response = send(rep, upload_id, 0, CONTENT[:1000], hashlib.sha256(CONTENT[:1000]).digest())
+    assert response.status_code == 200
+    assert response.headers['Upload-Offset'] == '1000'
+    # A chunk sent again, or from the wrong place, is refused
+    assert send(rep, upload_id, 0, CONTENT[:1000]).status_code == 409
+    assert send(rep, upload_id, 1500, CONTENT[1500:]).status_code == 409
+    assert send(rep, upload_id, 1000, CONTENT[1000:]).headers['Upload-Offset'] == str(len(CONTENT))
+    response = rep.post(f'/api/uploads/{upload_id}/finalize')
+    assert response.status_code == 200
+    assert response.get_json()['status'] == 'complete'
+    with open(db.session.get(ChunkedUpload, upload_id).stored_path, 'rb') as f:
+        assert f.read() == CONTENT
+
+def test_chunk_checksum_mismatch_is_discarded(rep):
+    upload_id = start(rep)
+    response = send(rep, upload_id, 0, CONTENT[:1000], hashlib.sha256(b'something else').digest())
+    assert response.status_code == uploads.CHECKSUM_MISMATCH
+    assert rep.get(f'/api/uploads/{upload_id}').headers['Upload-Offset'] == '0'
+
+def test_file_checksum_mismatch_deletes_the_upload(rep):
+    upload_id = start(rep, checksum=hashlib.sha256(b'another file').hexdigest())
+    send(rep, upload_id, 0, CONTENT)
+    assert rep.post(f'/api/uploads/{upload_id}/finalize').status_code == uploads.CHECKSUM_MISMATCH
+    assert rep.get(f'/api/uploads/{upload_id}').status_code == 404
+
+def test_resume_after_a_short_chunk(rep):
+    upload_id = start(rep)
+    # The connection drops after 700 of 1000 bytes: what arrived is kept
+    response = rep.patch(f'/api/uploads/{upload_id}', input_stream=io.BytesIO(CONTENT[:700]),
+                         headers={'Upload-Offset': '0', 'Content-Length': '1000'})
+    assert response.status_code == 200
+    assert rep.get(f'/api/uploads/{upload_id}').headers['Upload-Offset'] == '700'
+    assert send(rep, upload_id, 700, CONTENT[700:]).status_code == 200
+    assert rep.post(f'/api/uploads/{upload_id}/finalize').status_code == 200
+
+def test_offset_moved_while_receiving_is_refused(app, rep):
+    upload_id = start(rep)
+    upload = db.session.get(ChunkedUpload, upload_id)
+
+    class Stream(io.BytesIO):
+        def read(self, size=-1):
+            # Another writer records an offset while this chunk is arriving
+            db.session.execute(db.update(ChunkedUpload).where(ChunkedUpload.id == upload_id).values(received=5))
+            db.session.commit()
+            return super().read(size)
+
+    with pytest.raises(uploads.UploadError) as error:
+        uploads.append_chunk(upload, 0, Stream(CONTENT[:100]), 100)
+    assert error.value.status == 409
+    assert db.session.get(ChunkedUpload, upload_id).received == 5
+
+def test_event_form_consumes_the_upload_only_once_saved(app, rep, tmp_path):
+    app.static_folder = str(tmp_path / 'static')
+    upload_id = start(rep)
+    send(rep, upload_id, 0, CONTENT)
+    rep.post(f'/api/uploads/{upload_id}/finalize')
+    form = {'title': 'Launch', 'description': 'Product launch', 'start_date': '2026-05-04',
+            'start_time': '10:00', 'is_online': 'on', 'attendees_upload_id': upload_id}
+    # A form refused by validation keeps the upload for the next attempt
+    response = rep.post('/create_event', data=dict(form, title=''))
+    assert response.status_code == 200
+    assert rep.get(f'/api/uploads/{upload_id}').status_code == 200
+    assert rep.post('/create_event', data=form).status_code == 302
+    assert rep.get(f'/api/uploads/{upload_id}').status_code == 404
+    [stored] = (tmp_path / 'static' / 'uploads' / 'attendees').iterdir()
+    assert stored.read_bytes() == CONTENT
@@ -0,0 +1,233 @@
+"""
+Chunked, resumable uploads of spreadsheets
+
+Large attendee lists and user/event sheets are sent in pieces over a
+tus-like protocol instead of one multipart POST:
+
+1. POST /api/uploads with the file name, total length, purpose and
+   optionally the file's SHA-256 creates an upload.
+2. PATCH /api/uploads/<id> appends the raw request body at Upload-Offset.
+   An Upload-Checksum: sha256 <base64> header is verified per chunk.
+3. HEAD (or GET) /api/uploads/<id> returns the current Upload-Offset, so
+   after a dropped connection the client continues from there.
+4. POST /api/uploads/<id>/finalize checks the length and the checksum. Only
+   a finished upload can be handed to a form (create event, bulk users,
+   bulk events) by id instead of a file field; the form consumes it.
+
+Chunks are streamed from the request body to a staging file in
+UPLOAD_STAGING_DIR, so werkzeug never buffers them and a worker is only
+busy while a chunk is arriving. The offset is kept in the database and the
+staging directory must be shared by all workers, like IMPORT_UPLOAD_DIR.
+Uploads untouched for UPLOAD_EXPIRE_HOURS are deleted.
+"""
+
+import base64
+import fcntl
+import hashlib
+import os
+import shutil
+import uuid
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import update
+from werkzeug.exceptions import ClientDisconnected
+
+from extensions import db
+from models import ChunkedUpload
+
+# Purpose -> allowed file extensions
+PURPOSES = {
+    'attendees': {'csv', 'xlsx', 'xls'},
+    'users': {'xlsx', 'xls'},
+    'events': {'csv', 'xlsx'},
+}
+# Status for a chunk whose checksum doesn't match (as in tus)
+CHECKSUM_MISMATCH = 460
+READ_SIZE = 64 * 1024
+
+class UploadError(Exception):
+    """A request the upload protocol refuses; ``status`` is the HTTP status to answer with"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+def _extension(filename):
+    return filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
+
+def expire_uploads():
+    """Delete uploads (and their files) not touched for UPLOAD_EXPIRE_HOURS"""
+    cutoff = datetime.utcnow() - timedelta(hours=current_app.config['UPLOAD_EXPIRE_HOURS'])
+    expired = ChunkedUpload.query.filter(ChunkedUpload.updated_at < cutoff).all()
+    for upload in expired:
+        _remove_file(upload.stored_path)
+        db.session.delete(upload)
+    if expired:
+        db.session.commit()
+    return len(expired)
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+def create_upload(user_id, filename, length, purpose, checksum=None):
+    """Start an upload of ``length`` bytes; the staging file is created empty"""
+    filename = os.path.basename((filename or '').strip())
+    if purpose not in PURPOSES:
+        raise UploadError(f'Unknown purpose "{purpose}". Must be one of: {", ".join(PURPOSES)}')
+    if not filename:
+        raise UploadError('File name is required')
+    if _extension(filename) not in PURPOSES[purpose]:
+        raise UploadError(f'Please upload a {", ".join(sorted(PURPOSES[purpose]))} file')
+    if length is None or length <= 0:
+        raise UploadError('Length must be a positive number of bytes')
+    if length > current_app.config['UPLOAD_MAX_BYTES']:
+        raise UploadError(f'File is larger than {current_app.config["UPLOAD_MAX_BYTES"] // (1024 * 1024)} MB', 413)
+    if checksum is not None:
+        checksum = checksum.strip().lower()
+        if len(checksum) != 64 or any(char not in '0123456789abcdef' for char in checksum):
+            raise UploadError('Checksum must be a hex SHA-256 digest')
+
+    staging_dir = current_app.config['UPLOAD_STAGING_DIR']
+    os.makedirs(staging_dir, exist_ok=True)
+    upload_id = uuid.uuid4().hex
+    stored_path = os.path.join(staging_dir, f'{upload_id}.part')
+    open(stored_path, 'wb').close()
+    upload = ChunkedUpload(id=upload_id, user_id=user_id, purpose=purpose, filename=filename[:255],
+                           length=length, checksum=checksum, stored_path=stored_path)
+    db.session.add(upload)
+    db.session.commit()
+    return upload
+
+def get_upload(upload_id, user_id):
+    """The user's upload with this id, or None"""
+    return ChunkedUpload.query.filter_by(id=upload_id, user_id=user_id).first()
+
+def _parse_chunk_checksum(header):
+    if not header:
+        return None
+    algorithm, _, value = header.partition(' ')
+    if algorithm.lower() != 'sha256':
+        raise UploadError('Upload-Checksum must be "sha256 <base64 digest>"')
+    try:
+        return base64.b64decode(value.strip(), validate=True)
+    except ValueError:
+        raise UploadError('Upload-Checksum digest is not valid base64')
+
+def append_chunk(upload, offset, stream, chunk_length, checksum_header=None):
+    """Write the chunk in ``stream`` at ``offset``; returns the new offset.
+
+    Without a checksum, the bytes received before a dropped connection are
+    kept and the client resumes after them. With one, a chunk is only kept
+    whole.
+    """
+    if upload.status != 'uploading':
+        raise UploadError('Upload is already finished', 409)
+    if offset != upload.received:
+        raise UploadError(f'Upload-Offset must be {upload.received}', 409)
+    if chunk_length is None:
+        raise UploadError('Content-Length is required', 411)
+    if offset + chunk_length > upload.length:
+        raise UploadError('Chunk goes past the declared length', 413)
+    expected = _parse_chunk_checksum(checksum_header)
+    upload_id = upload.id
+
+    with open(upload.stored_path, 'r+b') as f:
+        try:
+            # One writer per upload; a second connection for the same upload is refused
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise UploadError('Another chunk of this upload is being received', 409)
+        # A chunk that finished while this request waited may have moved the offset
+        received = db.session.query(ChunkedUpload.received).filter(ChunkedUpload.id == upload_id).scalar()
+        if received != offset:
+            raise UploadError(f'Upload-Offset must be {received}', 409)
+        # Don't hold a database connection while the chunk arrives
+        db.session.close()
+        f.seek(offset)
+        f.truncate()
+        digest = hashlib.sha256()
+        written = 0
+        try:
+            while written < chunk_length:
+                data = stream.read(min(READ_SIZE, chunk_length - written))
+                if not data:
+                    break
+                f.write(data)
+                digest.update(data)
+                written += len(data)
+        except ClientDisconnected:
+            pass
+        if expected is not None and (written < chunk_length or digest.digest() != expected):
+            f.truncate(offset)
+            if written < chunk_length:
+                raise UploadError('Chunk was incomplete', 400)
+            raise UploadError('Chunk checksum does not match', CHECKSUM_MISMATCH)
+        f.flush()
+        os.fsync(f.fileno())
+        # Record the offset before releasing the lock, so the next chunk sees it
+        new_offset = offset + written
+        result = db.session.execute(
+            update(ChunkedUpload)
+            .where(ChunkedUpload.id == upload_id, ChunkedUpload.received == offset,
+                   ChunkedUpload.status == 'uploading')
+            .values(received=new_offset, updated_at=datetime.utcnow())
+        )
+        db.session.commit()
+        if result.rowcount == 0:
+            raise UploadError('Upload was changed, finished or deleted while the chunk was received', 409)
+    return new_offset
+
+def finalize_upload(upload):
+    """Check that every byte arrived (and the checksum, if one was given) and mark the upload complete"""
+    if upload.status == 'complete':
+        return upload
+    if upload.received != upload.length:
+        raise UploadError(f'Upload is incomplete: {upload.received} of {upload.length} bytes received', 409)
+    if upload.checksum:
+        digest = hashlib.sha256()
+        with open(upload.stored_path, 'rb') as f:
+            for data in iter(lambda: f.read(READ_SIZE), b''):
+                digest.update(data)
+        if digest.hexdigest() != upload.checksum:
+            # The file can't be trusted; the client has to send it again
+            _remove_file(upload.stored_path)
+            db.session.delete(upload)
+            db.session.commit()
+            raise UploadError('File checksum does not match; please upload it again', CHECKSUM_MISMATCH)
+    upload.status = 'complete'
+    upload.updated_at = datetime.utcnow()
+    db.session.commit()
+    return upload
+
+def delete_upload(upload):
+    _remove_file(upload.stored_path)
+    db.session.delete(upload)
+    db.session.commit()
+
+def get_finished_upload(upload_id, user_id, purpose):
+    """The user's complete upload for ``purpose``, or None"""
+    upload = get_upload(upload_id, user_id)
+    if upload is None or upload.status != 'complete' or upload.purpose != purpose:
+        return None
+    return upload
+
+def consume_upload(upload, destination):
+    """Move a finished upload's file to ``destination`` and forget the upload"""
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    shutil.move(upload.stored_path, destination)
+    db.session.delete(upload)
+    db.session.commit()
+
+def upload_to_dict(upload):
+    return {
+        'id': upload.id,
+        'filename': upload.filename,
+        'purpose': upload.purpose,
+        'length': upload.length,
+        'offset': upload.received,
+        'status': upload.status,
+        'chunk_size': current_app.config['UPLOAD_CHUNK_SIZE'],
+    }
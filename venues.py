@@ -0,0 +1,144 @@
+"""
+Venues: name lookup, typeahead search and utilisation
+
+Each worker keeps a directory of all venues, reloaded when the venue table's
+change stamp moves (like reference_data.py). Typeahead queries are answered
+from a sorted list of the words in venue names, so "hil" finds "Cairo
+Hilton" with a binary search instead of a LIKE scan over the table.
+
+Event forms store venues by name: find_or_create_venue() resolves the name
+within the event's governorate through the (governorate, search_name) index.
+"""
+
+import threading
+from bisect import bisect_left
+from collections import namedtuple
+from flask import current_app, g
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+
+from change_tracking import get_stamps
+from extensions import db
+from models import Event, Venue
+from scoping import scoped
+
+VenueOption = namedtuple('VenueOption', 'id name governorate capacity')
+
+def normalize_name(name):
+    """Lookup form of a venue name: lowercased, with single spaces"""
+    return ' '.join((name or '').split()).lower()
+
+class VenueDirectory:
+    """Immutable snapshot of all venues with a word index for prefix search"""
+
+    def __init__(self, venues):
+        self.venues = {venue.id: venue for venue in venues}
+        self.names = {venue.id: normalize_name(venue.name) for venue in venues}
+        self.name_words = {venue_id: name.split() for venue_id, name in self.names.items()}
+        # (word, venue id) for every word of every name
+        self.words = sorted({(word, venue_id) for venue_id, words in self.name_words.items() for word in words})
+
+    def _prefix_range(self, prefix):
+        # Words starting with prefix sort between prefix and prefix + U+FFFF
+        return bisect_left(self.words, (prefix,)), bisect_left(self.words, (prefix + '\uffff',))
+
+    def search(self, query, governorate=None, limit=10):
+        """Venues whose name has a word starting with each word of ``query``.
+
+        Names starting with the query come first, then alphabetical order.
+        """
+        query = normalize_name(query)
+        terms = query.split()
+        if not terms:
+            return []
+        # Candidates come from the term with the fewest matching words
+        low, high = min((self._prefix_range(term) for term in terms), key=lambda bounds: bounds[1] - bounds[0])
+        matches = set()
+        for _, venue_id in self.words[low:high]:
+            if governorate and self.venues[venue_id].governorate != governorate:
+                continue
+            name_words = self.name_words[venue_id]
+            if all(any(word.startswith(term) for word in name_words) for term in terms):
+                matches.add(venue_id)
+        ranked = sorted(matches, key=lambda venue_id: (not self.names[venue_id].startswith(query),
+                                                       self.names[venue_id], venue_id))
+        return [self.venues[venue_id] for venue_id in ranked[:limit]]
+
+class VenueCache:
+    def __init__(self):
+        self._directory = None
+        self._version = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        """Current venue directory, reloaded if the venue table changed"""
+        version = g.get('_venue_version')
+        if version is None:
+            version = get_stamps(Venue.__tablename__)[Venue.__tablename__][0]
+            g._venue_version = version
+        with self._lock:
+            if self._directory is not None and self._version == version:
+                return self._directory
+        directory = VenueDirectory([
+            VenueOption(*row) for row in
+            db.session.query(Venue.id, Venue.name, Venue.governorate, Venue.capacity)
+        ])
+        with self._lock:
+            self._directory = directory
+            self._version = version
+        return directory
+
+    def invalidate(self):
+        """Drop this worker's copy (other workers notice the stamp change)"""
+        with self._lock:
+            self._directory = None
+            self._version = None
+        g.pop('_venue_version', None)
+
+venue_cache = VenueCache()
+
+def get_venue_directory():
+    return venue_cache.get()
+
+def find_or_create_venue(name, governorate=None):
+    """The venue called ``name`` in ``governorate``, added if it doesn't exist; None for a blank name"""
+    search_name = normalize_name(name)
+    if not search_name:
+        return None
+    governorate = governorate or None
+    same_governorate = Venue.governorate.is_(None) if governorate is None else Venue.governorate == governorate
+    query = Venue.query.filter(Venue.search_name == search_name, same_governorate)
+    venue = query.first()
+    if venue is None:
+        try:
+            # A concurrent request may add the same venue; the unique index decides
+            with db.session.begin_nested():
+                venue = Venue(name=' '.join(name.split()), search_name=search_name, governorate=governorate)
+                db.session.add(venue)
+        except IntegrityError:
+            venue = query.first()
+        venue_cache.invalidate()
+    return venue
+
+def _hours_sql(start, end):
+    """SQL expression for the hours between two datetime columns"""
+    if db.engine.dialect.name == 'postgresql':
+        return func.extract('epoch', end - start) / 3600.0
+    return (func.julianday(end) - func.julianday(start)) * 24.0
+
+def venue_utilisation(range_start, range_end, user=None):
+    """Per-venue event count and booked hours for the viewer's events starting in [range_start, range_end).
+
+    One GROUP BY over the (venue_id, start_datetime) index; events without an
+    end count as EVENT_DEFAULT_DURATION_MINUTES. Returns
+    [(venue_id, events, hours)] ordered by booked hours, descending.
+    """
+    default_hours = current_app.config['EVENT_DEFAULT_DURATION_MINUTES'] / 60.0
+    hours = func.sum(func.coalesce(_hours_sql(Event.start_datetime, Event.end_datetime), default_hours))
+    rows = scoped(db.session.query(Event.venue_id, func.count(Event.id), hours), user).filter(
+        Event.venue_id.isnot(None),
+        Event.start_datetime >= range_start,
+        Event.start_datetime < range_end,
+    ).group_by(Event.venue_id).all()
+    return sorted(((venue_id, count, round(float(total or 0), 2)) for venue_id, count, total in rows),
+                  key=lambda row: (-row[2], row[0]))